@@ -856,6 +856,110 @@ function! vimspector#PrintDebugInfo() abort
   py3 _vimspector_session.PrintDebugInfo()
 endfunction
 
+function! vimspector#Trace( action, ... ) abort
+  if !s:Enabled()
+    return
+  endif
+
+  py3 << EOF
+from vimspector import tracing, utils
+action = vim.eval( 'a:action' )
+if action == 'start':
+  tracing.Enable()
+  utils.UserMessage( 'Tracing started' )
+elif action == 'stop':
+  tracing.Disable()
+  utils.UserMessage( f'Tracing stopped; { tracing.EventCount() } events' )
+elif action == 'clear':
+  tracing.Clear()
+elif action == 'save':
+  path = vim.eval( 'expand( get( a:000, 0, "~/.vimspector-trace.json" ) )' )
+  tracing.Export( path )
+  utils.UserMessage( f'Saved { tracing.EventCount() } events to { path }' )
+else:
+  utils.UserMessage( f'Unknown trace action: { action }', error = True )
+EOF
+endfunction
+
+function! vimspector#CompleteTrace( ArgLead, CmdLine, CursorPos ) abort
+  return join( [ 'start', 'stop', 'save', 'clear' ], "\n" )
+endfunction
+
+function! vimspector#Profile( action, ... ) abort
+  if !s:Enabled()
+    return
+  endif
+
+  py3 << EOF
+from vimspector import profiler, utils
+action = vim.eval( 'a:action' )
+p = profiler.Get()
+if action == 'start':
+  p.Start()
+  utils.UserMessage( 'Profiling started' )
+elif action == 'stop':
+  p.Stop()
+  utils.UserMessage( f'Profiling stopped; { p.SampleCount() } samples' )
+elif action == 'dump':
+  paths = p.Dump( vim.eval( 'expand( get( a:000, 0, '
+                            '"~/.vimspector-profile" ) )' ) )
+  if paths:
+    utils.UserMessage( 'Wrote ' + ' and '.join( paths ) )
+  else:
+    utils.UserMessage( 'Nothing to dump; use start first', error = True )
+else:
+  utils.UserMessage( f'Unknown profile action: { action }', error = True )
+EOF
+endfunction
+
+function! vimspector#CompleteProfile( ArgLead, CmdLine, CursorPos ) abort
+  return join( [ 'start', 'stop', 'dump' ], "\n" )
+endfunction
+
+function! vimspector#Memory( ... ) abort
+  if !s:Enabled()
+    return
+  endif
+
+  let action = get( a:000, 0, 'report' )
+  if action ==# 'report'
+    let lines = py3eval( '__import__( "vimspector", fromlist = [ "memory" ] )'
+          \ . '.memory.Report( [ b.name for b in vim.buffers ],'
+          \ . '                set( _vimspector_session_man.sessions ) )' )
+    new
+    setlocal buftype=nofile bufhidden=wipe noswapfile
+    call setline( 1, lines )
+    setlocal nomodifiable
+    return
+  endif
+
+  py3 << EOF
+from vimspector import memory, utils
+action = vim.eval( 'action' )
+if action == 'start':
+  memory.StartTracing()
+  utils.UserMessage( 'Tracing memory allocations' )
+elif action == 'stop':
+  memory.StopTracing()
+  utils.UserMessage( 'Stopped tracing memory allocations' )
+else:
+  utils.UserMessage( f'Unknown memory action: { action }', error = True )
+EOF
+endfunction
+
+function! vimspector#CompleteMemory( ArgLead, CmdLine, CursorPos ) abort
+  return join( [ 'report', 'start', 'stop' ], "\n" )
+endfunction
+
+function! vimspector#GetStats() abort
+  if !s:Enabled()
+    return {}
+  endif
+
+  return py3eval( '_vimspector_session.GetStats() '
+                \ . ' if _vimspector_session else {}' )
+endfunction
+
 function! vimspector#ReadSessionFile( ... ) abort
   if !s:Enabled()
     return
@@ -127,11 +127,31 @@ function! vimspector#internal#channel#Send( session_id, msg ) abort
   endtry
 endfunction
 
+function! vimspector#internal#channel#Wait( session_id, timeout ) abort
+  " Block until some data arrives from the server (and handle it), or timeout
+  " msec elapse. Returns false if there is no channel to wait on.
+  if !s:_ChannelExists( a:session_id )
+    return 0
+  endif
+
+  let data = ch_read( s:channels[ a:session_id ],
+        \             { 'timeout': float2nr( a:timeout ) } )
+  if data !=# '' && has_key( s:channels, a:session_id )
+    call s:_OnServerData( a:session_id, s:channels[ a:session_id ], data )
+  endif
+  return 1
+endfunction
+
 function! vimspector#internal#channel#Timeout( session_id, id ) abort
   py3 _VimspectorSession( vim.eval( 'a:session_id' ) ).OnRequestTimeout(
         \ vim.eval( 'a:id' ) )
 endfunction
 
+function! vimspector#internal#channel#CachedReplies( session_id, id ) abort
+  py3 _VimspectorSession( vim.eval( 'a:session_id' ) ).OnCachedReplies(
+        \ vim.eval( 'a:id' ) )
+endfunction
+
 function! s:_ChannelExists( session_id ) abort
   return has_key( s:channels, a:session_id ) &&
           \ count( [ 'closed', 'fail' ],
@@ -150,6 +150,26 @@ function! vimspector#internal#job#Send( session_id, msg ) abort
   endtry
 endfunction
 
+function! vimspector#internal#job#Wait( session_id, timeout ) abort
+  " Block until some data arrives from the server (and handle it), or timeout
+  " msec elapse. Returns false if there is no job to wait on.
+  if ! has_key( s:jobs, a:session_id ) ||
+        \ job_status( s:jobs[ a:session_id ] ) !=# 'run'
+    return 0
+  endif
+
+  let ch = job_getchannel( s:jobs[ a:session_id ] )
+  if ch ==# 'channel fail'
+    return 0
+  endif
+
+  let data = ch_read( ch, { 'timeout': float2nr( a:timeout ) } )
+  if data !=# ''
+    call s:_OnServerData( a:session_id, ch, data )
+  endif
+  return 1
+endfunction
+
 function! vimspector#internal#job#StopDebugSession( session_id ) abort
   if ! has_key( s:jobs, a:session_id )
     echom "Not stopping session: Job doesn't exist"
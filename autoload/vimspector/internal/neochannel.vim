@@ -23,6 +23,10 @@ set cpoptions&vim
 let s:channels = {}
 let s:jobs = {}
 
+" Key: session_id
+" Value: true if data was received since the last call to Wait
+let s:received = {}
+
 
 function! s:_OnEvent( session_id, chan_id, data, event ) abort
   if v:exiting isnot# v:null
@@ -34,6 +38,8 @@ function! s:_OnEvent( session_id, chan_id, data, event ) abort
     return
   endif
 
+  let s:received[ a:session_id ] = v:true
+
   if a:data == ['']
     echom 'Channel closed'
     redraw
@@ -107,6 +113,20 @@ function! vimspector#internal#neochannel#Send( session_id, msg ) abort
   return 1
 endfunction
 
+function! vimspector#internal#neochannel#Wait( session_id, timeout ) abort
+  " Process events until some data arrives from the server, or timeout msec
+  " elapse. Returns false if there is no channel to wait on.
+  if ! has_key( s:channels, a:session_id )
+    return 0
+  endif
+
+  let s:received[ a:session_id ] = v:false
+  call wait( float2nr( a:timeout ),
+        \    { -> get( s:received, a:session_id, v:true ) },
+        \    1 )
+  return 1
+endfunction
+
 function! vimspector#internal#neochannel#StopDebugSession( session_id ) abort
   if has_key( s:channels, a:session_id )
     call chanclose( s:channels[ a:session_id ] )
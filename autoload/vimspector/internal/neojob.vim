@@ -22,6 +22,10 @@ set cpoptions&vim
 let s:jobs = {}
 let s:commands = {}
 
+" Key: session_id
+" Value: true if data was received since the last call to Wait
+let s:received = {}
+
 
 
 function! s:_OnEvent( session_id, chan_id, data, event ) abort
@@ -35,6 +39,7 @@ function! s:_OnEvent( session_id, chan_id, data, event ) abort
 
   " In neovim, the data argument is a list.
   if a:event ==# 'stdout'
+    let s:received[ a:session_id ] = v:true
     py3 _VimspectorSession( vim.eval( 'a:session_id' ) ).OnChannelData(
           \ '\n'.join( vim.eval( 'a:data' ) ) )
   elseif a:event ==# 'stderr'
@@ -105,6 +110,21 @@ function! vimspector#internal#neojob#Send( session_id, msg ) abort
   return 1
 endfunction
 
+function! vimspector#internal#neojob#Wait( session_id, timeout ) abort
+  " Process events until some data arrives from the server, or timeout msec
+  " elapse. Returns false if there is no job to wait on.
+  if ! has_key( s:jobs, a:session_id ) ||
+        \ !vimspector#internal#neojob#JobIsRunning( s:jobs[ a:session_id ] )
+    return 0
+  endif
+
+  let s:received[ a:session_id ] = v:false
+  call wait( float2nr( a:timeout ),
+        \    { -> get( s:received, a:session_id, v:true ) },
+        \    1 )
+  return 1
+endfunction
+
 function! vimspector#internal#neojob#StopDebugSession( session_id ) abort
   if !has_key( s:jobs, a:session_id )
     return
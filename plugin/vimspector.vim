@@ -175,6 +175,15 @@ command! -bar
 command! -bar
       \ VimspectorDebugInfo
       \ call vimspector#PrintDebugInfo()
+command! -bar -nargs=+ -complete=custom,vimspector#CompleteTrace
+      \ VimspectorTrace
+      \ call vimspector#Trace( <f-args> )
+command! -bar -nargs=+ -complete=custom,vimspector#CompleteProfile
+      \ VimspectorProfile
+      \ call vimspector#Profile( <f-args> )
+command! -bar -nargs=? -complete=custom,vimspector#CompleteMemory
+      \ VimspectorMemory
+      \ call vimspector#Memory( <f-args> )
 command! -nargs=1 -complete=custom,vimspector#CompleteExpr
       \ VimspectorEval
       \ call vimspector#Evaluate( <f-args> )
@@ -860,8 +860,10 @@ class ProjectBreakpoints( object ):
           error = True )
         continue
 
-      self._logger.debug( f"Updating temporary breakpoint { user_bp } line "
-                          f"{ user_bp[ 'line' ] } to { server_bp[ 'line' ] }" )
+      self._logger.debug( "Updating temporary breakpoint %s line %s to %s",
+                          user_bp,
+                          user_bp[ 'line' ],
+                          server_bp[ 'line' ] )
 
       # if it was moved, update the user-breakpoint so that we unset it
       # again properly
@@ -17,7 +17,7 @@ import vim
 import logging
 import os
 
-from vimspector import utils, terminal, signs
+from vimspector import utils, terminal, signs, tracing
 
 # NEXT_SIGN_ID = 1
 
@@ -112,10 +112,17 @@ class CodeView( object ):
                        frame[ 'line' ] )
 
 
-  def SetCurrentFrame( self, frame, should_jump_to_location ):
+  @tracing.Traced
+  def SetCurrentFrame( self,
+                       frame,
+                       should_jump_to_location,
+                       should_move_cursor = True ):
     """Returns True if the code window was updated with the frame, False
     otherwise. False means either the frame is junk, we couldn't find the file
-    (or don't have the data) or the code window no longer exits."""
+    (or don't have the data) or the code window no longer exits.
+
+    If should_move_cursor is False, only the PC sign is updated; the cursor in
+    the code window is left where the user put it."""
 
     if not frame or not frame.get( 'source' ):
       self._UndisplayPC()
@@ -138,10 +145,16 @@ class CodeView( object ):
             self._RenderWinBar()
         vim.command( 'doautocmd <nomodeline> User VimspectorJumpedToFrame' )
       except vim.error:
-        self._logger.exception( 'Unexpected vim error opening file {}'.format(
-          frame[ 'source' ][ 'path' ] ) )
+        self._logger.exception( 'Unexpected vim error opening file %s',
+                                frame[ 'source' ][ 'path' ] )
         return False
 
+    if not should_move_cursor:
+      self.current_syntax = utils.ToUnicode(
+        self._window.buffer.options[ 'syntax' ] )
+      self._DisplayPC()
+      return True
+
     if should_jump_to_location:
       utils.JumpToWindow( self._window )
 
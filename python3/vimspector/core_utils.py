@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+import difflib
 import functools
 import typing
 import os
@@ -102,3 +104,70 @@ def NormalizePath( filepath ):
   if drive:
     absolute_path = drive.upper() + tail
   return absolute_path if os.path.isfile( absolute_path ) else filepath
+
+
+# Above this many old * new lines, DiffLines doesn't look for matches within
+# the changed region, which would be slow, and replaces the whole region
+DIFF_MATCH_LIMIT = 1000000
+
+
+def DiffLines( old: typing.Sequence, new: typing.Sequence ):
+  """Return the changes needed to turn the list old into the list new, as a
+  list of ( old_start, old_end, new_start, new_end ), in order, meaning that
+  old[ old_start : old_end ] is replaced by new[ new_start : new_end ]. Either
+  range can be empty (an insert or delete).
+
+  Unchanged lines at the start and end are skipped by comparing them directly,
+  so the typical change (expanding or collapsing one thing, changing a few
+  values) costs one comparison per line, and the changes are exactly the lines
+  which differ."""
+  common = min( len( old ), len( new ) )
+  prefix = 0
+  while prefix < common and old[ prefix ] == new[ prefix ]:
+    prefix += 1
+
+  suffix = 0
+  while ( suffix < common - prefix
+          and old[ -1 - suffix ] == new[ -1 - suffix ] ):
+    suffix += 1
+
+  old_end = len( old ) - suffix
+  new_end = len( new ) - suffix
+  if prefix == old_end and prefix == new_end:
+    return []
+
+  if ( prefix == old_end
+       or prefix == new_end
+       or ( old_end - prefix ) * ( new_end - prefix ) > DIFF_MATCH_LIMIT ):
+    return [ ( prefix, old_end, prefix, new_end ) ]
+
+  matcher = difflib.SequenceMatcher( None,
+                                     old[ prefix : old_end ],
+                                     new[ prefix : new_end ],
+                                     autojunk = False )
+  return [ ( prefix + i1, prefix + i2, prefix + j1, prefix + j2 )
+           for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+           if tag != 'equal' ]
+
+
+def MatchByKey( existing: typing.Iterable,
+                new: typing.Iterable,
+                existing_key: typing.Callable,
+                new_key: typing.Callable ):
+  """Pair each item in new with the item in existing with the same key, so
+  that the existing item can be updated (keeping its state) rather than
+  replaced. Returns a list of ( existing item or None, new item ), in the
+  order of new.
+
+  Keys can be repeated (e.g. shadowed locals in C), in which case the
+  repeats are paired in order: the first in new with the first in existing,
+  and so on. Each existing item is used at most once."""
+  index = collections.defaultdict( collections.deque )
+  for item in existing:
+    index[ existing_key( item ) ].append( item )
+
+  matches = []
+  for item in new:
+    candidates = index.get( new_key( item ) )
+    matches.append( ( candidates.popleft() if candidates else None, item ) )
+  return matches
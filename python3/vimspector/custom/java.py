@@ -31,10 +31,7 @@ class JavaDebugAdapter( object ):
     if body.get( 'changeType' ) == 'BUILD_COMPLETE':
       def handler( result ):
         if result == 1:
-          self.debug_session._connection.DoRequest( None, {
-            'command': 'redefineClasses',
-            'arguments': {},
-          } )
+          self._RedefineClasses()
 
       mode = settings.Get( 'java_hotcodereplace_mode' )
       if mode == 'ask':
@@ -43,9 +40,16 @@ class JavaDebugAdapter( object ):
                        handler,
                        default_value = 1 )
       elif mode == 'always':
-        self.debug_session._connection.DoRequest( None, {
-          'command': 'redefineClasses',
-          'arguments': {},
-        } )
+        self._RedefineClasses()
     elif body.get( 'message' ):
       utils.UserMessage( 'Hot code replace: ' + body[ 'message' ] )
+
+  def _RedefineClasses( self ):
+    # Replacing the code can drop frames, so refresh the stacks (and so the
+    # variables) rather than reloading everything
+    self.debug_session._connection.DoRequest(
+      lambda msg: self.debug_session.Invalidate( [ 'stacks', 'variables' ] ),
+      {
+        'command': 'redefineClasses',
+        'arguments': {},
+      } )
@@ -13,22 +13,121 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import logging
+import collections
+import copy
 import json
+import logging
 import vim
 
-from vimspector import utils
+from vimspector import ( dispatch,
+                         framing,
+                         scheduler,
+                         stats,
+                         tracing,
+                         transcript,
+                         utils )
 
 DEFAULT_SYNC_TIMEOUT = 5000
 DEFAULT_ASYNC_TIMEOUT = 15000
 
+# Maximum number of prioritised requests which can be outstanding at once; more
+# are queued. 0 means no limit.
+DEFAULT_MAX_IN_FLIGHT = 16
+
+# Request priorities, most urgent first. Requests without a priority are sent
+# immediately.
+PRIORITY_UI = 0          # What the user is waiting for, e.g. the current frame
+PRIORITY_VISIBLE = 1     # Refreshing other visible views, e.g. watches
+PRIORITY_BACKGROUND = 2  # Prefetching
+
+# Names for the priorities in the stats. These are dict keys returned to vim,
+# which only allows string keys.
+PRIORITY_NAMES = {
+  PRIORITY_UI: 'ui',
+  PRIORITY_VISIBLE: 'visible',
+  PRIORITY_BACKGROUND: 'background',
+}
+
+# How often (ms) to check for expired requests while any are outstanding
+TIMEOUT_SWEEP_INTERVAL = 250
+
+# Requests which only read the debuggee state. While one of these is
+# outstanding, an identical request is not sent again; the caller just gets a
+# copy of the response.
+COALESCABLE_COMMANDS = frozenset( [
+  'loadedSources',
+  'scopes',
+  'source',
+  'stackTrace',
+  'threads',
+  'variables',
+] )
+
+
+# Requests whose results are only meaningful while the debuggee remains stopped
+# where it was when they were sent. See BumpStopEpoch.
+EPOCH_SCOPED_COMMANDS = frozenset( [
+  'evaluate',
+  'scopes',
+  'stackTrace',
+  'variables',
+] )
+
+
+# Successful responses to these requests are cached until the debuggee resumes
+# (see BumpStopEpoch), as they can't change while it's stopped. Watches,
+# hovers, moving up and down the stack, etc. then don't ask again.
+CACHEABLE_COMMANDS = EPOCH_SCOPED_COMMANDS
+
+# Requests which change the debuggee's state, so the cached responses are out
+# of date
+STATE_CHANGING_COMMANDS = frozenset( [
+  'setExpression',
+  'setVariable',
+  'writeMemory',
+] )
+
+# Events after which the cached responses are out of date
+CACHE_INVALIDATING_EVENTS = frozenset( [
+  'continued',
+  'invalidated',
+  'stopped',
+] )
+
+# The maximum number of responses cached; the least recently used are dropped
+RESPONSE_CACHE_SIZE = 2000
+
 
 class PendingRequest( object ):
-  def __init__( self, msg, handler, failure_handler, expiry_id ):
+  def __init__( self,
+                msg,
+                handler,
+                failure_handler,
+                key = None,
+                timeout = None,
+                priority = None ):
     self.msg = msg
     self.handler = handler
     self.failure_handler = failure_handler
-    self.expiry_id = expiry_id
+    self.key = key
+    self.timeout = timeout
+    self.priority = priority
+    # Handle in the queue, if queued
+    self.queued = None
+    # The stop epoch when the request was made, if it's only valid within it
+    self.epoch = None
+    # Superseded by a resume; the response will be ignored
+    self.cancelled = False
+    # ( handler, failure_handler ) for identical requests which were coalesced
+    # with this one
+    self.waiters = []
+    # When the request was actually sent (scheduler.Now())
+    self.sent_at = None
+    # Counts towards max_in_flight
+    self.holds_slot = False
+    # The response cache key and generation, if the response can be cached
+    self.cache_key = None
+    self.cache_generation = None
 
 
 class DebugAdapterConnection( object ):
@@ -37,7 +136,11 @@ class DebugAdapterConnection( object ):
                 session_id,
                 send_func,
                 sync_timeout = None,
-                async_timeout = None ):
+                async_timeout = None,
+                wait_func = None,
+                max_in_flight = None,
+                recorder = None,
+                cache_responses = True ):
     self._logger = logging.getLogger( __name__ + '.' + str( session_id ) )
     utils.SetUpLogging( self._logger, session_id )
 
@@ -47,51 +150,303 @@ class DebugAdapterConnection( object ):
       async_timeout = DEFAULT_ASYNC_TIMEOUT
 
     self._Write = send_func
-    self._SetState( 'READ_HEADER' )
-    self._buffer = bytes()
-    self._handlers = handlers
+    self._Wait = wait_func
+    self._recorder = recorder
+    self._decoder = framing.MessageDecoder( self._logger )
+    self._handlers = dispatch.DispatchTable( handlers )
     self._session_id = session_id
     self._next_message_id = 1
     self._outstanding_requests = {}
+    # Coalescing key -> the outstanding or queued request
+    self._in_flight = {}
+    self._queue = scheduler.PriorityQueue()
+    self.max_in_flight = ( DEFAULT_MAX_IN_FLIGHT if max_in_flight is None
+                           else max_in_flight )
+    self.max_outstanding = 0
+    # Number of outstanding requests which count towards max_in_flight
+    self._slots_held = 0
+    self.stop_epoch = 0
+    self.cancelled_requests = 0
+    self.coalesced_requests = 0
+    self._deadlines = scheduler.DeadlineHeap()
+    self._sweep_timer = None
+    self.stats = stats.ConnectionStats( scheduler.Now() )
+    self.cache_responses = cache_responses
+    # Cache key -> the response, encoded as JSON so each hit gets its own copy
+    self._response_cache = collections.OrderedDict()
+    # Incremented whenever the cache is cleared, so that responses to
+    # requests sent before then aren't cached
+    self._cache_generation = 0
+    self.cache_hits = 0
+    self.cache_misses = 0
+    # ( handler, response ) for cache hits, which are delivered from a timer
+    # so that handlers are never called from within DoRequest
+    self._cached_replies = collections.deque()
+    self._reply_timer = None
     self.async_timeout = async_timeout
     self.sync_timeout = sync_timeout
 
   def GetSessionId( self ):
     return self._session_id
 
+  def AddHandler( self, handler, index = None ):
+    if self._handlers is not None:
+      self._handlers.AddHandler( handler, index )
+
+  def RemoveHandler( self, handler ):
+    if self._handlers is not None:
+      self._handlers.RemoveHandler( handler )
+
   def DoRequest( self,
                  handler,
                  msg,
                  failure_handler=None,
-                 timeout = None ):
+                 timeout = None,
+                 priority = None ):
+    """Send a request. If priority is supplied (one of the PRIORITY_
+    constants), the request may be queued behind more urgent ones to limit the
+    number outstanding; the timeout starts when it is actually sent."""
 
     if timeout is None:
       timeout = self.async_timeout
 
-    this_id = self._next_message_id
-    self._next_message_id += 1
+    if tracing.IsEnabled():
+      # Link the handlers' spans to whatever is making the request
+      handler = tracing.Bind( handler, 'response: ' + msg[ 'command' ] )
+      failure_handler = tracing.Bind( failure_handler,
+                                      'failure: ' + msg[ 'command' ] )
+
+    if msg[ 'command' ] in STATE_CHANGING_COMMANDS or _IsReplEvaluate( msg ):
+      self.ClearResponseCache()
+
+    cache_key = self._CacheKey( msg )
+    if cache_key is not None:
+      cached = self._response_cache.get( cache_key )
+      if cached is not None:
+        self._response_cache.move_to_end( cache_key )
+        self.cache_hits += 1
+        tracing.Instant( 'cache hit: ' + msg[ 'command' ] )
+        if handler:
+          self._cached_replies.append( ( handler, cached ) )
+          self._StartReplyTimer()
+        return
+      self.cache_misses += 1
+
+    key = _CoalescingKey( msg )
+    if key is not None and key in self._in_flight:
+      request = self._in_flight[ key ]
+      request.waiters.append( ( handler, failure_handler ) )
+      self.coalesced_requests += 1
+      if ( priority is not None and request.queued is not None and
+           priority < request.priority ):
+        # Something more urgent is now waiting for it, e.g. the user moved to
+        # a frame which was being prefetched
+        self._queue.Remove( request.queued )
+        request.priority = priority
+        request.queued = self._queue.Push( request, priority )
+      self._logger.debug( 'Coalesced request %s with seq %s',
+                          msg[ 'command' ],
+                          request.msg.get( 'seq' ) )
+      return
 
-    msg[ 'seq' ] = this_id
     msg[ 'type' ] = 'request'
 
-    expiry_id = vim.eval(
-      'timer_start( {}, '
-      '             function( "vimspector#internal#channel#Timeout", '
-      '                       [ {} ] ) )'.format(
-        timeout,
-        self._session_id ) )
-
     request = PendingRequest( msg,
                               handler,
                               failure_handler,
-                              expiry_id )
-    self._outstanding_requests[ this_id ] = request
+                              key,
+                              timeout,
+                              priority )
+    if _IsEpochScoped( msg ):
+      request.epoch = self.stop_epoch
+    if cache_key is not None:
+      request.cache_key = cache_key
+      request.cache_generation = self._cache_generation
+    if key is not None:
+      self._in_flight[ key ] = request
+
+    if priority is not None and ( self._queue or self._InFlightLimitReached() ):
+      request.queued = self._queue.Push( request, priority )
+      self._logger.debug( 'Queued request %s at priority %s (depth %s)',
+                          msg[ 'command' ],
+                          priority,
+                          len( self._queue ) )
+      return
+
+    self._SendRequest( request )
+
+
+  def _InFlightLimitReached( self ):
+    return ( self.max_in_flight > 0 and
+             self._slots_held >= self.max_in_flight )
+
 
-    if not self._SendMessage( msg ):
+  def _SendRequest( self, request ):
+    this_id = self._next_message_id
+    self._next_message_id += 1
+
+    request.msg[ 'seq' ] = this_id
+    request.sent_at = scheduler.Now()
+    tracing.AsyncBegin( request.msg[ 'command' ],
+                        self._TraceId( this_id ),
+                        priority = request.priority )
+    self._outstanding_requests[ this_id ] = request
+    request.holds_slot = True
+    self._slots_held += 1
+    self.max_outstanding = max( self.max_outstanding,
+                                len( self._outstanding_requests ) )
+    self._deadlines.Add( this_id, scheduler.Now() + request.timeout )
+    self._StartSweepTimer()
+
+    if not self._SendMessage( request.msg ):
       self._AbortRequest( request, 'Unable to send message' )
 
 
+  def _PumpQueue( self ):
+    while self._queue and not self._InFlightLimitReached():
+      request = self._queue.Pop()
+      request.queued = None
+      self._SendRequest( request )
+
+
+  def BumpStopEpoch( self, send_cancel = False ):
+    """Called when the debuggee is resumed. Outstanding requests for the
+    state of the debuggee (variables, stack, etc.) are now stale: queued ones
+    are dropped, and responses to ones already sent are discarded without
+    calling their handlers. Ones already sent no longer count towards
+    max_in_flight, so they don't hold up requests for the next stop. If
+    send_cancel is set (i.e. the adapter supports the cancel request), the
+    adapter is asked to cancel them too."""
+    self.stop_epoch += 1
+    self.ClearResponseCache()
+
+    requests = list( self._outstanding_requests.values() ) + self._queue.Items()
+    stale = [ request for request in requests
+              if request.epoch is not None and not request.cancelled ]
+    if not stale:
+      return
+
+    self._logger.debug( 'Superseding %s requests in stop epoch %s',
+                        len( stale ),
+                        self.stop_epoch )
+
+    for request in stale:
+      request.cancelled = True
+      self.cancelled_requests += 1
+      # Don't coalesce new requests with this one
+      self._ForgetCoalescingKey( request )
+
+      if request.queued is not None:
+        # Never sent, so just forget it
+        self._FinishRequest( request )
+        continue
+
+      self._ReleaseSlot( request )
+      if send_cancel:
+        self.DoRequest( None, {
+          'command': 'cancel',
+          'arguments': {
+            'requestId': request.msg[ 'seq' ]
+          }
+        }, failure_handler = lambda *_: None )
+
+    self._PumpQueue()
+
+
+  def ClearResponseCache( self ):
+    self._cache_generation += 1
+    self._response_cache.clear()
+    # A request sent before now may get an out of date response too, so new
+    # requests mustn't wait for it
+    self._in_flight.clear()
+
+
+  def _CacheKey( self, msg ):
+    if ( not self.cache_responses
+         or msg.get( 'command' ) not in CACHEABLE_COMMANDS
+         or not _IsEpochScoped( msg ) ):
+      return None
+
+    try:
+      return ( self.stop_epoch,
+               msg[ 'command' ],
+               json.dumps( msg.get( 'arguments' ), sort_keys = True ) )
+    except TypeError:
+      return None
+
+
+  def _CacheResponse( self, request, message ):
+    if ( request.cache_key is None
+         or request.cache_generation != self._cache_generation ):
+      # Something changed after the request was sent, so the response may
+      # already be out of date
+      return
+
+    self._response_cache[ request.cache_key ] = json.dumps( message )
+    self._response_cache.move_to_end( request.cache_key )
+    while len( self._response_cache ) > RESPONSE_CACHE_SIZE:
+      self._response_cache.popitem( last = False )
+
+
+  def OnReplyTimer( self, timer_id ):
+    self._reply_timer = None
+    try:
+      self.DeliverCachedReplies()
+    finally:
+      if self._cached_replies:
+        # A handler raised; deliver the rest on the next tick
+        self._StartReplyTimer()
+
+
+  def DeliverCachedReplies( self ):
+    while self._cached_replies:
+      handler, cached = self._cached_replies.popleft()
+      handler( json.loads( cached ) )
+
+
+  def _StartReplyTimer( self ):
+    if self._reply_timer is not None:
+      return
+
+    self._reply_timer = vim.eval(
+      'timer_start( 0, '
+      '             function( "vimspector#internal#channel#CachedReplies", '
+      '                       [ {} ] ) )'.format( self._session_id ) )
+
+
+  def GetQueueStats( self ):
+    return {
+      'outstanding': len( self._outstanding_requests ),
+      'max_outstanding': self.max_outstanding,
+      'max_in_flight': self.max_in_flight,
+      'queued': len( self._queue ),
+      'queued_by_priority': {
+        PRIORITY_NAMES.get( priority, str( priority ) ): depth
+        for priority, depth in self._queue.Depths().items()
+      },
+      'max_queue_depth': self._queue.max_depth,
+      'total_queued': self._queue.enqueued,
+      'coalesced': self.coalesced_requests,
+      'cancelled': self.cancelled_requests,
+      'stop_epoch': self.stop_epoch,
+      'cache': {
+        'hits': self.cache_hits,
+        'misses': self.cache_misses,
+        'size': len( self._response_cache ),
+      },
+    }
+
+
+  def GetStats( self ):
+    return self.stats.AsDict( scheduler.Now() )
+
+
   def DoRequestSync( self, msg, timeout = None ):
+    if _IsEpochScoped( msg ):
+      # It could be superseded while we wait, and then nothing would answer
+      raise ValueError( "Can't make a synchronous {} request".format(
+        msg[ 'command' ] ) )
+
     result = {}
 
     if timeout is None:
@@ -104,12 +459,33 @@ class DebugAdapterConnection( object ):
       result[ 'response' ] = msg
       result[ 'exception' ] = RuntimeError( reason )
 
+    start = scheduler.Now()
     self.DoRequest( handler, msg, failure_handler, timeout )
 
-    to_wait = timeout + 1000
-    while not result and to_wait >= 0:
-      vim.command( 'sleep 10m' )
-      to_wait -= 10
+    # The request should be aborted by the timeout, but don't wait forever if
+    # that doesn't happen
+    give_up = start + timeout + 1000
+    while not result:
+      remaining = give_up - scheduler.Now()
+      if remaining <= 0:
+        break
+
+      if self._Wait and self._Wait( min( remaining,
+                                         TIMEOUT_SWEEP_INTERVAL ) ):
+        # Timers don't fire while blocked reading the channel, so expire
+        # requests here
+        self.OnRequestTimeout( None )
+      else:
+        vim.command( 'sleep 10m' )
+
+    elapsed = scheduler.Now() - start
+    self.stats.OnSyncRequest( msg[ 'command' ],
+                              elapsed,
+                              'response' in result and
+                              'exception' not in result )
+    self._logger.debug( 'Sync request %s completed in %.1fms',
+                        msg[ 'command' ],
+                        elapsed )
 
     if result.get( 'exception' ) is not None:
       raise result[ 'exception' ]
@@ -121,16 +497,16 @@ class DebugAdapterConnection( object ):
 
 
   def OnRequestTimeout( self, timer_id ):
-    request_id = None
-    for seq, request in self._outstanding_requests.items():
-      if request.expiry_id == timer_id:
-        request_id = seq
-        break
+    for request_id in self._deadlines.PopExpired( scheduler.Now() ):
+      request = self._outstanding_requests.pop( request_id, None )
+      if request is not None:
+        self.stats.OnTimeout( request.msg[ 'command' ] )
+        self._AbortRequest( request, 'Timeout' )
+
+    self._PumpQueue()
 
-    # Avoid modifying _outstanding_requests while looping
-    if request_id is not None:
-      request = self._outstanding_requests.pop( request_id )
-      self._AbortRequest( request, 'Timeout' )
+    if not self._deadlines:
+      self._StopSweepTimer()
 
   def DoResponse( self, request, error, response ):
     this_id = self._next_message_id
@@ -152,16 +528,38 @@ class DebugAdapterConnection( object ):
 
   def Reset( self ):
     self._Write = None
+    self._Wait = None
     self._handlers = None
+    if self._recorder:
+      self._recorder.Close()
+      self._recorder = None
+    self._deadlines.Clear()
+    self._StopSweepTimer()
+    self.ClearResponseCache()
+    self._cached_replies.clear()
+    if self._reply_timer is not None:
+      vim.eval( 'timer_stop( {} )'.format( self._reply_timer ) )
+      self._reply_timer = None
+
+    for request in self._queue.Clear():
+      request.queued = None
+      self._AbortRequest( request, 'Closing down' )
 
     while self._outstanding_requests:
       _, request = self._outstanding_requests.popitem()
       self._AbortRequest( request, 'Closing down' )
 
   def _AbortRequest( self, request, reason ):
-    self._logger.debug( '{}: Aborting request {}'.format( reason,
-                                                          request.msg ) )
-    _KillTimer( request )
+    self._logger.debug( '%s: Aborting request %s', reason, request.msg )
+    self._outstanding_requests.pop( request.msg.get( 'seq' ), None )
+    self._FinishRequest( request )
+    if request.sent_at is not None:
+      tracing.AsyncEnd( request.msg[ 'command' ],
+                        self._TraceId( request.msg[ 'seq' ] ),
+                        aborted = reason )
+    if request.cancelled:
+      return
+
     if request.failure_handler:
       request.failure_handler( reason, {} )
     else:
@@ -169,105 +567,91 @@ class DebugAdapterConnection( object ):
         request.msg[ 'command' ],
         reason ) )
 
+    for _, failure_handler in request.waiters:
+      if failure_handler:
+        failure_handler( reason, {} )
 
-  def OnData( self, data ):
-    data = bytes( data, 'utf-8' )
-    # self._logger.debug( 'Received ({0}/{1}): {2},'.format( type( data ),
-    #                                                   len( data ),
-    #                                                   data ) )
 
-    self._buffer += data
+  def _FinishRequest( self, request ):
+    if request.queued is not None:
+      self._queue.Remove( request.queued )
+      request.queued = None
+    self._ReleaseSlot( request )
+    self._deadlines.Remove( request.msg.get( 'seq' ) )
+    self._ForgetCoalescingKey( request )
 
-    while True:
-      if self._state == 'READ_HEADER':
-        self._ReadHeaders()
 
-      if self._state == 'READ_BODY':
-        self._ReadBody()
-      else:
-        break
+  def _ReleaseSlot( self, request ):
+    if request.holds_slot:
+      request.holds_slot = False
+      self._slots_held -= 1
 
-      if self._state != 'READ_HEADER':
-        # We ran out of data whilst reading the body. Await more data.
-        break
 
-  def _SetState( self, state ):
-    self._state = state
-    if state == 'READ_HEADER':
-      self._headers = {}
+  def _TraceId( self, seq ):
+    return f'{self._session_id}:{seq}'
 
-  def _SendMessage( self, msg ):
-    if not self._Write:
-      # Connection was destroyed
-      return False
 
-    msg = json.dumps( msg )
-    self._logger.debug( 'Sending Message: {0}'.format( msg ) )
+  def _ForgetCoalescingKey( self, request ):
+    if ( request.key is not None and
+         self._in_flight.get( request.key ) is request ):
+      del self._in_flight[ request.key ]
 
-    data = 'Content-Length: {0}\r\n\r\n{1}'.format( len( msg ), msg )
-    # self._logger.debug( 'Sending: {0}'.format( data ) )
-    return self._Write( data )
 
-  def _ReadHeaders( self ):
-    parts = self._buffer.split( bytes( '\r\n\r\n', 'utf-8' ), 1 )
-
-    if len( parts ) > 1:
-      headers = parts[ 0 ]
-      for header_line in headers.split( bytes( '\r\n', 'utf-8' ) ):
-        if bytes( '\n', 'utf-8' ) in header_line:
-          # Work around bugs in cppdbg where mono spams nonesense to stdout.
-          # This is such a dodgyhack, but it fixes the issues.
-          header_line = header_line.split( bytes( '\n', 'utf-8' ) )[ -1 ]
-
-        if header_line.strip():
-          key, value = str( header_line, 'utf-8' ).split( ':', 1 )
-          self._headers[ key ] = value
-
-      # Chomp (+4 for the 2 newlines which were the separator)
-      # self._buffer = self._buffer[ len( headers[ 0 ] ) + 4 : ]
-      self._buffer = parts[ 1 ]
-      self._SetState( 'READ_BODY' )
+  def _StartSweepTimer( self ):
+    if self._sweep_timer is not None:
       return
 
-    # otherwise waiting for more data
+    self._sweep_timer = vim.eval(
+      'timer_start( {}, '
+      '             function( "vimspector#internal#channel#Timeout", '
+      '                       [ {} ] ), '
+      '             {{ "repeat": -1 }} )'.format(
+        TIMEOUT_SWEEP_INTERVAL,
+        self._session_id ) )
 
-  def _ReadBody( self ):
-    try:
-      content_length = int( self._headers[ 'Content-Length' ] )
-    except KeyError:
-      # Ug oh. We seem to have all the headers, but no Content-Length
-      # Skip to reading headers. Because, what else can we do.
-      self._logger.error( 'Missing Content-Length header in: {0}'.format(
-        json.dumps( self._headers ) ) )
-
-      self._buffer = bytes( '', 'utf-8' )
-      self._SetState( 'READ_HEADER' )
-      return
 
-    if len( self._buffer ) < content_length:
-      # Need more data
-      assert self._state == 'READ_BODY'
-      return
+  def _StopSweepTimer( self ):
+    if self._sweep_timer is not None:
+      vim.eval( 'timer_stop( {} )'.format( self._sweep_timer ) )
+      self._sweep_timer = None
 
-    payload = str( self._buffer[ : content_length ], 'utf-8' )
-    self._buffer = self._buffer[ content_length : ]
 
-    # self._logger.debug( 'Message received (raw): %s', payload )
-    # We read the message, so the next time we get data from the socket it must
-    # be a header.
-    self._SetState( 'READ_HEADER' )
+  def OnData( self, data ):
+    data = bytes( data, 'utf-8' )
+    self.stats.OnBytesReceived( len( data ) )
+    # self._logger.debug( 'Received ({0}/{1}): {2},'.format( type( data ),
+    #                                                   len( data ),
+    #                                                   data ) )
 
-    try:
-      message = json.loads( payload, strict = False )
-    except Exception:
-      self._logger.exception( "Invalid message received: %s", payload )
-      raise
+    for message in self._decoder.FeedMessages( data ):
+      self.OnMessage( message )
 
-    self._logger.debug( 'Message received: {0}'.format( message ) )
 
+  def OnMessage( self, message ):
+    """Handle a message which has already been decoded, e.g. by a threaded
+    transport"""
+    self._logger.debug( 'Message received: %s', message )
+    self.stats.OnReceived()
+    if self._recorder:
+      self._recorder.Record( transcript.RECEIVED, message )
     self._OnMessageReceived( message )
 
 
+  def _SendMessage( self, msg ):
+    if not self._Write:
+      # Connection was destroyed
+      return False
+
+    data = framing.Encode( msg )
+    self._logger.debug( 'Sending Message: %s', msg )
+    if self._recorder:
+      self._recorder.Record( transcript.SENT, msg )
+    # self._logger.debug( 'Sending: {0}'.format( data ) )
+    # Encode's output is ASCII, so the length is the number of bytes
+    self.stats.OnSent( len( data ) )
+    return self._Write( data )
+
+
   def _OnMessageReceived( self, message ):
     if not self._handlers:
       return
@@ -281,51 +665,92 @@ class DebugAdapterConnection( object ):
         utils.UserMessage(
           "Protocol error: duplicate response for request {}".format(
             message[ 'request_seq' ] ) )
-        self._logger.exception( 'Duplicate response: {}'.format( message ) )
+        self._logger.exception( 'Duplicate response: %s', message )
         return
 
-      _KillTimer( request )
+      self._FinishRequest( request )
+      tracing.AsyncEnd( request.msg[ 'command' ],
+                        self._TraceId( message[ 'request_seq' ] ),
+                        success = message.get( 'success', False ),
+                        cancelled = request.cancelled )
+      if request.sent_at is not None:
+        self.stats.OnResponse( request.msg[ 'command' ],
+                               scheduler.Now() - request.sent_at,
+                               message.get( 'success', False ) )
 
-      if message[ 'success' ]:
-        if request.handler:
-          request.handler( message )
-      else:
-        reason = message.get( 'message' )
-        error = message.get( 'body', {} ).get( 'error', {} )
-        if error:
-          try:
-            fmt = error[ 'format' ]
-            variables = error.get( 'variables', {} )
-            reason = fmt.format( **variables )
-          except Exception:
-            self._logger.exception( "Failed to parse error, using default: %s",
-                                    error )
-
-        if request.failure_handler:
-          self._logger.info( 'Request failed (handled): %s', reason )
-          request.failure_handler( reason, message )
+      try:
+        if request.cancelled:
+          self._logger.debug( 'Discarding stale response to %s',
+                              request.msg[ 'command' ] )
         else:
-          self._logger.error( 'Request failed (unhandled): %s', reason )
-          for h in self._handlers:
-            if 'OnFailure' in dir( h ):
-              if h.OnFailure( reason, request.msg, message ):
-                break
+          self._OnResponse( request, message )
+      finally:
+        # A slot is free, so send the next queued request
+        self._PumpQueue()
 
     elif message[ 'type' ] == 'event':
-      method = 'OnEvent_' + message[ 'event' ]
-      for h in self._handlers:
-        if method in dir( h ):
-          if getattr( h, method )( message ):
-            break
+      if message[ 'event' ] in CACHE_INVALIDATING_EVENTS:
+        self.ClearResponseCache()
+      with tracing.Span( 'event: ' + message[ 'event' ] ):
+        self._handlers.Dispatch( 'OnEvent_' + message[ 'event' ], message )
     elif message[ 'type' ] == 'request':
-      method = 'OnRequest_' + message[ 'command' ]
-      for h in self._handlers:
-        if method in dir( h ):
-          if getattr( h, method )( message ):
-            break
+      self._handlers.Dispatch( 'OnRequest_' + message[ 'command' ], message )
+
+
+  def _OnResponse( self, request, message ):
+    if message[ 'success' ]:
+      self._CacheResponse( request, message )
+      # Handlers are allowed to modify the message, so each coalesced caller
+      # gets its own copy
+      waiters = [ ( handler, copy.deepcopy( message ) )
+                  for handler, _ in request.waiters if handler ]
+      if request.handler:
+        request.handler( message )
+      for handler, response in waiters:
+        handler( response )
+    else:
+      reason = message.get( 'message' )
+      error = message.get( 'body', {} ).get( 'error', {} )
+      if error:
+        try:
+          fmt = error[ 'format' ]
+          variables = error.get( 'variables', {} )
+          reason = fmt.format( **variables )
+        except Exception:
+          self._logger.exception( "Failed to parse error, using default: %s",
+                                  error )
+
+      if request.failure_handler:
+        self._logger.info( 'Request failed (handled): %s', reason )
+        request.failure_handler( reason, message )
+      else:
+        self._logger.error( 'Request failed (unhandled): %s', reason )
+        self._handlers.Dispatch( 'OnFailure', reason, request.msg, message )
+
+      for _, failure_handler in request.waiters:
+        if failure_handler:
+          failure_handler( reason, message )
+
+
+def _IsReplEvaluate( msg ):
+  return ( msg.get( 'command' ) == 'evaluate' and
+           ( msg.get( 'arguments' ) or {} ).get( 'context' ) == 'repl' )
+
+
+def _IsEpochScoped( msg ):
+  if msg.get( 'command' ) not in EPOCH_SCOPED_COMMANDS:
+    return False
+
+  # Things the user typed in the console are still wanted
+  return not _IsReplEvaluate( msg )
+
 
+def _CoalescingKey( msg ):
+  if msg.get( 'command' ) not in COALESCABLE_COMMANDS:
+    return None
 
-def _KillTimer( request ):
-  if request.expiry_id is not None:
-    vim.eval( 'timer_stop( {} )'.format( request.expiry_id ) )
-    request.expiry_id = None
+  try:
+    return ( msg[ 'command' ],
+             json.dumps( msg.get( 'arguments' ), sort_keys = True ) )
+  except TypeError:
+    return None
@@ -31,12 +31,16 @@ from vimspector import ( breakpoints,
                          disassembly,
                          install,
                          output,
+                         render,
                          stack_trace,
                          session_manager,
                          utils,
                          variables,
                          settings,
                          terminal,
+                         transcript,
+                         tracing,
+                         transport,
                          installer )
 from vimspector.vendor.json_minify import minify
 
@@ -139,7 +143,7 @@ class DebugSession( object ):
 
     self._logger.info( "**** INITIALISING NEW VIMSPECTOR SESSION FOR ID "
                        f"{session_id } ****" )
-    self._logger.info( "API is: {}".format( api_prefix ) )
+    self._logger.info( "API is: %s", api_prefix )
     self._logger.info( 'VIMSPECTOR_HOME = %s', VIMSPECTOR_HOME )
     self._logger.info( 'gadgetDir = %s',
                        install.GetGadgetDir( VIMSPECTOR_HOME ) )
@@ -172,6 +176,9 @@ class DebugSession( object ):
 
     self._run_on_server_exit = None
 
+    self._transport: transport.ThreadedTransport = None
+    self._transport_timer = None
+
     self._configuration = None
     self._adapter = None
     self._launch_config = None
@@ -196,7 +203,8 @@ class DebugSession( object ):
     for launch_config_file in PathsToAllConfigFiles( VIMSPECTOR_HOME,
                                                      current_file,
                                                      filetypes ):
-      self._logger.debug( f'Reading configurations from: {launch_config_file}' )
+      self._logger.debug( 'Reading configurations from: %s',
+                          launch_config_file )
       if not launch_config_file or not os.path.exists( launch_config_file ):
         continue
 
@@ -259,7 +267,7 @@ class DebugSession( object ):
     glob.glob( install.GetGadgetDir( VIMSPECTOR_HOME ) )
     for gadget_config_file in PathsToAllGadgetConfigs( VIMSPECTOR_HOME,
                                                        current_file ):
-      self._logger.debug( f'Reading gadget config: {gadget_config_file}' )
+      self._logger.debug( 'Reading gadget config: %s', gadget_config_file )
       if not gadget_config_file or not os.path.exists( gadget_config_file ):
         continue
 
@@ -576,8 +584,18 @@ class DebugSession( object ):
 
 
   def OnRequestTimeout( self, timer_id ):
+    if self._connection is None:
+      # The connection was torn down without being Reset; make sure its sweep
+      # timer doesn't keep firing
+      vim.eval( 'timer_stop( {} )'.format( timer_id ) )
+      return
+
     self._connection.OnRequestTimeout( timer_id )
 
+  def OnCachedReplies( self, timer_id ):
+    if self._connection is not None:
+      self._connection.OnReplyTimer( timer_id )
+
   def OnChannelClosed( self ):
     # TODO: Not called
     self._connection = None
@@ -819,6 +837,7 @@ class DebugSession( object ):
       'granularity': self._CurrentSteppingGranularity(),
     }
     arguments.update( kwargs )
+    self.SupersedeRequests()
     self._connection.DoRequest( handler, {
       'command': 'next',
       'arguments': arguments,
@@ -840,6 +859,7 @@ class DebugSession( object ):
       'granularity': self._CurrentSteppingGranularity(),
     }
     arguments.update( kwargs )
+    self.SupersedeRequests()
     self._connection.DoRequest( handler, {
       'command': 'stepIn',
       'arguments': arguments,
@@ -861,11 +881,18 @@ class DebugSession( object ):
       'granularity': self._CurrentSteppingGranularity(),
     }
     arguments.update( kwargs )
+    self.SupersedeRequests()
     self._connection.DoRequest( handler, {
       'command': 'stepOut',
       'arguments': arguments,
     } )
 
+  def SupersedeRequests( self ):
+    # The debuggee is about to run, so anything we asked about its state is
+    # out of date
+    self._connection.BumpStopEpoch(
+      self._server_capabilities.get( 'supportsCancelRequest' ) )
+
   def _CurrentSteppingGranularity( self ):
     if self._disassemblyView and self._disassemblyView.IsCurrent():
       return 'instruction'
@@ -892,6 +919,7 @@ class DebugSession( object ):
         } )
       self.ClearCurrentPC()
 
+    self.SupersedeRequests()
     self._connection.DoRequest( handler, {
       'command': 'continue',
       'arguments': {
@@ -1028,6 +1056,11 @@ class DebugSession( object ):
       self._disassemblyView.OnWindowScrolled( win_id )
 
 
+  def OnVariablesWindowScrolled( self, win_id ):
+    if self._variablesView:
+      self._variablesView.OnWindowScrolled( win_id )
+
+
   @ParentSession()
   def AddDataBreakpoint( self, opts, buf = None, line_num = None ):
     # Use the parent session, because the _connection_ comes from the
@@ -1470,6 +1503,7 @@ class DebugSession( object ):
 
 
   @RequiresUI()
+  @tracing.Traced
   def SetCurrentFrame( self, frame, reason = '' ):
     if not frame:
       self._variablesView.Clear()
@@ -1478,14 +1512,21 @@ class DebugSession( object ):
     if self._disassemblyView and self._disassemblyView.IsCurrent():
       target = self._disassemblyView
 
-    if not self._codeView.SetCurrentFrame( frame,
-                                           target == self._codeView ):
+    # When the debug adapter says the stack is out of date, the user didn't
+    # ask to go anywhere, so don't move them
+    move_cursor = reason != 'invalidated'
+
+    if not self._codeView.SetCurrentFrame(
+        frame,
+        move_cursor and target == self._codeView,
+        move_cursor ):
       return False
 
     if self._disassemblyView:
-      self._disassemblyView.SetCurrentFrame( self._connection,
-                                             frame,
-                                             target == self._disassemblyView )
+      self._disassemblyView.SetCurrentFrame(
+        self._connection,
+        frame,
+        move_cursor and target == self._disassemblyView )
 
     # the codeView.SetCurrentFrame already checked the frame was valid and
     # countained a valid source
@@ -1497,7 +1538,13 @@ class DebugSession( object ):
       self._variablesView.SetSyntax( None )
       self._stackTraceView.SetSyntax( None )
 
-    self._variablesView.LoadScopes( self._connection, frame )
+    prefetch_frames = []
+    if reason == 'stopped':
+      # The user will probably look at the callers next
+      prefetch_frames = self._stackTraceView.CallerFrames(
+        settings.Int( 'variables_prefetch_frames' ) )
+
+    self._variablesView.LoadScopes( self._connection, frame, prefetch_frames )
     self._variablesView.EvaluateWatches( self._connection, frame )
 
     if reason == 'stopped':
@@ -1536,7 +1583,7 @@ class DebugSession( object ):
         self._adapter[ 'port' ] = port
 
     self._connection_type = self._api_prefix + self._connection_type
-    self._logger.debug( f"Connection Type: { self._connection_type }" )
+    self._logger.debug( "Connection Type: %s", self._connection_type )
 
     self._adapter[ 'env' ] = self._adapter.get( 'env', {} )
 
@@ -1576,11 +1623,7 @@ class DebugSession( object ):
           self._codeView._window,
           self._adapter_term )
 
-    if not vim.eval( "vimspector#internal#{}#StartDebugSession( "
-                     "  {},"
-                     "  g:_vimspector_adapter_spec "
-                     ")".format( self._connection_type,
-                                 self.session_id ) ):
+    if not self._StartTransport():
       self._logger.error( "Unable to start debug server" )
       self._splash_screen = utils.DisplaySplash(
         self._api_prefix,
@@ -1610,19 +1653,137 @@ class DebugSession( object ):
           self._logger.exception( "Unable to load custom adapter %s",
                                   spec )
 
+      if self._transport:
+        send_func = self._transport.Send
+        wait_func = self._WaitForTransport
+      else:
+        def send_func( msg ):
+          return utils.Call(
+            "vimspector#internal#{}#Send".format( self._connection_type ),
+            self.session_id,
+            msg )
+
+        def wait_func( timeout ):
+          return int( utils.Call(
+            "vimspector#internal#{}#Wait".format( self._connection_type ),
+            self.session_id,
+            timeout ) )
+
+      recorder = None
+      if settings.Get( 'transcript_dir' ):
+        try:
+          recorder = transcript.NewRecorder(
+            os.path.expanduser( settings.Get( 'transcript_dir' ) ),
+            self.session_id )
+          self._logger.info( 'Recording transcript to %s', recorder.path )
+        except OSError:
+          self._logger.exception( 'Unable to create transcript file' )
+
       self._connection = debug_adapter_connection.DebugAdapterConnection(
         handlers = handlers,
         session_id = self.session_id,
-        send_func = lambda msg: utils.Call(
-          "vimspector#internal#{}#Send".format( self._connection_type ),
-          self.session_id,
-          msg ),
+        send_func = send_func,
         sync_timeout = self._adapter.get( 'sync_timeout' ),
-        async_timeout = self._adapter.get( 'async_timeout' ) )
+        async_timeout = self._adapter.get( 'async_timeout' ),
+        wait_func = wait_func,
+        max_in_flight = self._adapter.get( 'max_in_flight' ),
+        recorder = recorder,
+        cache_responses = self._adapter.get( 'cache_responses', True ) )
 
     self._logger.info( 'Debug Adapter Started' )
     return True
 
+  def _StartTransport( self ):
+    if settings.Get( 'transport' ) != 'python':
+      return vim.eval( "vimspector#internal#{}#StartDebugSession( "
+                       "  {},"
+                       "  g:_vimspector_adapter_spec "
+                       ")".format( self._connection_type,
+                                   self.session_id ) )
+
+    def wake_up():
+      vim.async_call( self.OnTransportReady )
+
+    # Neovim lets threads schedule calls on the main loop; Vim has to poll
+    on_wakeup = wake_up if self._api_prefix == 'neo' else None
+
+    self._transport = transport.ThreadedTransport( on_wakeup, self._logger )
+    try:
+      if 'port' in self._adapter:
+        command = None
+        if not self._adapter.get( 'tty', False ):
+          command = self._adapter.get( 'command' )
+
+        utils.UserMessage( 'Connecting to {}:{}...'.format(
+          self._adapter.get( 'host', '127.0.0.1' ),
+          self._adapter[ 'port' ] ) )
+        self._transport.StartChannel(
+          self._adapter.get( 'host', '127.0.0.1' ),
+          self._adapter[ 'port' ],
+          command,
+          self._adapter[ 'cwd' ],
+          self._adapter[ 'env' ] )
+      else:
+        self._transport.StartJob( self._adapter[ 'command' ],
+                                  self._adapter[ 'cwd' ],
+                                  self._adapter[ 'env' ] )
+      started = True
+    except ( OSError, ValueError ):
+      self._logger.exception( 'Unable to start debug adapter' )
+      started = False
+
+    if not started:
+      self._transport = None
+      return False
+
+    if on_wakeup is None:
+      self._transport_timer = vim.eval(
+        'timer_start( {}, '
+        '             function( "vimspector#internal#transport#Poll", '
+        '                       [ {} ] ), '
+        '             {{ "repeat": -1 }} )'.format(
+          settings.Int( 'transport_poll_interval' ),
+          self.session_id ) )
+
+    return True
+
+
+  def OnTransportReady( self, timer_id = None ):
+    if self._transport is None:
+      if timer_id is not None:
+        vim.eval( 'timer_stop( {} )'.format( timer_id ) )
+      return
+
+    for kind, payload in self._transport.Poll():
+      if kind == transport.MESSAGE:
+        if self._connection is not None:
+          self._connection.OnMessage( payload )
+      elif kind == transport.STDERR:
+        self.OnServerStderr( payload )
+      elif kind == transport.ERROR:
+        utils.UserMessage( payload, persist = True, error = True )
+      elif kind == transport.EXIT:
+        if self._transport_timer is not None:
+          vim.eval( 'timer_stop( {} )'.format( self._transport_timer ) )
+          self._transport_timer = None
+        self._transport = None
+        self.OnServerExit( payload )
+        break
+
+    if self._connection is not None and self._transport is not None:
+      # The transport does the reading, so it counts the bytes
+      self._connection.stats.bytes_received = self._transport.bytes_received
+
+
+  def _WaitForTransport( self, timeout ):
+    if self._transport is None:
+      return False
+
+    self._transport.Wait( timeout / 1000 )
+    self.OnTransportReady()
+    return True
+
+
   def _StopDebugAdapter( self, terminateDebuggee, callback ):
     arguments = {}
 
@@ -1643,9 +1804,14 @@ class DebugSession( object ):
         assert not self._run_on_server_exit
         self._run_on_server_exit = callback
 
-      vim.eval( 'vimspector#internal#{}#StopDebugSession( {} )'.format(
-        self._connection_type,
-        self.session_id ) )
+      if self._transport:
+        self._transport.Stop()
+        # Handle the remaining messages and the exit
+        self.OnTransportReady()
+      else:
+        vim.eval( 'vimspector#internal#{}#StopDebugSession( {} )'.format(
+          self._connection_type,
+          self.session_id ) )
 
     self._connection.DoRequest(
       handler,
@@ -1886,7 +2052,8 @@ class DebugSession( object ):
         'locale': 'en_GB',
         'pathFormat': 'path',
         'supportsVariableType': True,
-        'supportsVariablePaging': False,
+        'supportsVariablePaging': True,
+        'supportsInvalidatedEvent': True,
         'supportsRunInTerminalRequest': True,
         'supportsMemoryReferences': True,
         'supportsStartDebuggingRequest': True
@@ -1998,6 +2165,17 @@ class DebugSession( object ):
       self._stackTraceView.LoadThreads( self, True )
 
 
+  @CurrentSession()
+  def GetStats( self ):
+    if not self._connection:
+      return {}
+
+    stats = self._connection.GetStats()
+    stats[ 'queue' ] = self._connection.GetQueueStats()
+    stats[ 'render' ] = render.Stats()
+    return stats
+
+
   @CurrentSession()
   @IfConnected()
   @RequiresUI()
@@ -2023,6 +2201,11 @@ class DebugSession( object ):
       f"Workspace Root: { self._workspace_root }",
       "Launch Config: " ] + Pretty( self._launch_config ) + [
       "Server Capabilities: " ] + Pretty( self._server_capabilities ) + [
+      "Request Queue: " ] + Pretty( self._connection.GetQueueStats()
+                                    if self._connection else None ) + [
+      "Adapter Statistics: " ] + Pretty( self._connection.GetStats()
+                                         if self._connection else None ) + [
+      "Render Statistics: " ] + Pretty( render.Stats() ) + [
       "Line Breakpoints: " ] + Pretty( self._breakpoints._line_breakpoints ) + [
       "Func Breakpoints: " ] + Pretty( self._breakpoints._func_breakpoints ) + [
       "Ex Breakpoints: " ] + Pretty( self._breakpoints._exception_breakpoints )
@@ -2154,9 +2337,61 @@ class DebugSession( object ):
     pass
 
   def OnEvent_continued( self, message ):
-    self._stackTraceView.OnContinued( self, message[ 'body' ] )
+    body = message[ 'body' ]
+    # The stop epoch covers the whole session, but the views only show the
+    # state of the current thread, so leave it alone if another thread
+    # continued on its own
+    if ( body.get( 'allThreadsContinued', False ) or
+         self._stackTraceView.IsCurrentThread( self, body.get( 'threadId' ) ) ):
+      self.SupersedeRequests()
+    self._stackTraceView.OnContinued( self, body )
     self.ClearCurrentPC()
 
+  def OnEvent_invalidated( self, message ):
+    body = message.get( 'body' ) or {}
+    self.Invalidate( body.get( 'areas' ),
+                     body.get( 'threadId' ),
+                     body.get( 'stackFrameId' ) )
+
+  def Invalidate( self, areas = None, thread_id = None, frame_id = None ):
+    """Refresh the views showing areas ('all', 'stacks', 'threads' and/or
+    'variables', as in the DAP invalidated event), limited to the thread
+    thread_id or the stack frame frame_id if given"""
+    if not self._connection:
+      return
+
+    # The connection clears its cache on the invalidated event, but not when
+    # we're called directly
+    self._connection.ClearResponseCache()
+
+    areas = set( areas or [ 'all' ] )
+    if 'all' in areas:
+      areas.update( [ 'threads', 'stacks', 'variables' ] )
+    if frame_id is not None:
+      # The thread is ignored if the frame is given
+      thread_id = None
+
+    if 'threads' in areas:
+      self._stackTraceView.LoadThreads( self, False )
+
+    refreshed_current = False
+    if 'stacks' in areas:
+      # Refreshing the current thread's stack also reloads the current frame's
+      # scopes and the watches
+      refreshed_current = self._stackTraceView.RefreshStackTraces( self,
+                                                                   thread_id,
+                                                                   frame_id )
+
+    if 'variables' in areas and not refreshed_current:
+      current_frame = self._stackTraceView.GetCurrentFrame()
+      if ( current_frame is not None and
+           self._stackTraceView.GetCurrentSession() == self and
+           frame_id in ( None, current_frame[ 'id' ] ) and
+           ( thread_id is None or
+             self._stackTraceView.IsCurrentThread( self, thread_id ) ) ):
+        self._variablesView.LoadScopes( self._connection, current_frame )
+        self._variablesView.EvaluateWatches( self._connection, current_frame )
+
   @ParentOnly()
   def Clear( self ):
     self._codeView.Clear()
@@ -2195,6 +2430,7 @@ class DebugSession( object ):
     if self._outputView:
       self._outputView.OnOutput( message[ 'body' ] )
 
+  @tracing.Traced
   def OnEvent_stopped( self, message ):
     event = message[ 'body' ]
     reason = event.get( 'reason' ) or '<protocol error>'
@@ -2282,6 +2518,7 @@ class DebugSession( object ):
       if target_selected is None:
         return
 
+      self.SupersedeRequests()
       self._connection.DoRequest( None, {
         'command': 'goto',
         'arguments': {
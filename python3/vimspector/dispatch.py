@@ -0,0 +1,89 @@
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Routing of DAP messages to handler objects.
+
+A handler is any object with methods named OnEvent_<event>,
+OnRequest_<command> or OnFailure. Handlers are consulted in order until one
+returns a truthy value."""
+
+_HANDLER_PREFIXES = ( 'OnEvent_', 'OnRequest_' )
+
+# Handler class -> names of its handler methods
+_method_names = {}
+
+
+def HandlerMethodNames( cls ):
+  try:
+    return _method_names[ cls ]
+  except KeyError:
+    pass
+
+  names = tuple( name for name in dir( cls )
+                 if name.startswith( _HANDLER_PREFIXES ) or
+                 name == 'OnFailure' )
+  _method_names[ cls ] = names
+  return names
+
+
+class DispatchTable( object ):
+  def __init__( self, handlers = () ):
+    self._handlers = list( handlers )
+    self._Rebuild()
+
+
+  def __len__( self ):
+    return len( self._handlers )
+
+
+  def Handlers( self ):
+    return list( self._handlers )
+
+
+  def AddHandler( self, handler, index = None ):
+    """Add handler, by default with the lowest priority. Pass index = 0 to have
+    it consulted before the existing handlers."""
+    if index is None:
+      self._handlers.append( handler )
+    else:
+      self._handlers.insert( index, handler )
+    self._Rebuild()
+
+
+  def RemoveHandler( self, handler ):
+    self._handlers.remove( handler )
+    self._Rebuild()
+
+
+  def Get( self, method ):
+    return self._table.get( method, () )
+
+
+  def Dispatch( self, method, *args ):
+    """Call method on each handler which implements it until one returns a
+    truthy value. Returns that value, or False if none did."""
+    for bound_method in self._table.get( method, () ):
+      result = bound_method( *args )
+      if result:
+        return result
+    return False
+
+
+  def _Rebuild( self ):
+    table = {}
+    for handler in self._handlers:
+      for name in HandlerMethodNames( type( handler ) ):
+        table.setdefault( name, [] ).append( getattr( handler, name ) )
+    self._table = table
@@ -0,0 +1,172 @@
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Encoding and decoding of the DAP base protocol (Content-Length framing).
+
+This module deliberately doesn't import vim so that it can be used by the
+threaded transport and by the standalone support tools."""
+
+import json
+import logging
+import typing
+
+HEADER_SEPARATOR = b'\r\n\r\n'
+
+# Don't bother compacting the buffer until at least this many bytes have been
+# consumed
+COMPACT_THRESHOLD = 64 * 1024
+
+_logger = logging.getLogger( __name__ )
+
+
+class MessageDecoder( object ):
+  """Incremental decoder for a stream of DAP messages.
+
+  Data is appended to a growable bytearray and consumed by advancing a read
+  cursor, so each byte is examined a constant number of times regardless of how
+  the stream is chunked. The consumed prefix of the buffer is discarded only
+  occasionally."""
+
+  def __init__( self, logger = None ):
+    self._buffer = bytearray()
+    self._pos = 0
+    # Where to resume searching for the header separator, so that a header
+    # arriving in many small chunks isn't rescanned from the start each time
+    self._scan_pos = 0
+    self._content_length = None
+    self._logger = logger or _logger
+
+
+  def Feed( self, data ) -> typing.List[ bytes ]:
+    """Append data (any bytes-like object) and return the payloads of all the
+    messages which are now complete, in order."""
+    self._buffer += data
+    payloads = []
+
+    while True:
+      if self._content_length is None and not self._ReadHeaders():
+        break
+
+      if self._content_length is None:
+        # Headers were invalid and were discarded
+        continue
+
+      end = self._pos + self._content_length
+      if len( self._buffer ) < end:
+        # Need more data
+        break
+
+      with memoryview( self._buffer ) as view:
+        payloads.append( bytes( view[ self._pos : end ] ) )
+      self._pos = end
+      self._scan_pos = end
+      self._content_length = None
+
+    self._Compact()
+    return payloads
+
+
+  def FeedMessages( self, data ) -> typing.List[ dict ]:
+    """Like Feed, but returns decoded JSON messages. Payloads which aren't
+    valid JSON are logged and skipped, so they don't lose the messages after
+    them."""
+    messages = []
+    for payload in self.Feed( data ):
+      try:
+        messages.append( DecodePayload( payload, self._logger ) )
+      except Exception:
+        # Logged by DecodePayload; carry on with the next message
+        continue
+    return messages
+
+
+  def Pending( self ):
+    """Number of bytes buffered awaiting a complete message."""
+    return len( self._buffer ) - self._pos
+
+
+  def _ReadHeaders( self ):
+    separator = self._buffer.find( HEADER_SEPARATOR, self._scan_pos )
+    if separator < 0:
+      # Resume the search where a partial separator could start
+      self._scan_pos = max( self._pos,
+                            len( self._buffer ) - len( HEADER_SEPARATOR ) + 1 )
+      return False
+
+    headers = {}
+    with memoryview( self._buffer ) as view:
+      header_block = bytes( view[ self._pos : separator ] )
+
+    for header_line in header_block.split( b'\r\n' ):
+      if b'\n' in header_line:
+        # Work around bugs in cppdbg where mono spams nonesense to stdout.
+        # This is such a dodgyhack, but it fixes the issues.
+        header_line = header_line.split( b'\n' )[ -1 ]
+
+      if header_line.strip():
+        key, value = str( header_line, 'utf-8' ).split( ':', 1 )
+        headers[ key ] = value
+
+    # Chomp (+4 for the 2 newlines which were the separator)
+    self._pos = separator + len( HEADER_SEPARATOR )
+    self._scan_pos = self._pos
+
+    try:
+      self._content_length = int( headers[ 'Content-Length' ] )
+    except KeyError:
+      # Ug oh. We seem to have all the headers, but no Content-Length
+      # Skip to reading headers. Because, what else can we do.
+      self._logger.error( 'Missing Content-Length header in: %s',
+                          json.dumps( headers ) )
+      self._pos = len( self._buffer )
+      self._scan_pos = self._pos
+
+    return True
+
+
+  def _Compact( self ):
+    if self._pos == 0:
+      return
+
+    if self._pos == len( self._buffer ):
+      # Everything was consumed; the common case
+      self._buffer.clear()
+    elif ( self._pos >= COMPACT_THRESHOLD and
+           self._pos * 2 >= len( self._buffer ) ):
+      # Only move the tail when the dead prefix is at least as big as the live
+      # data, so the copying is amortised over the bytes consumed
+      del self._buffer[ : self._pos ]
+    else:
+      return
+
+    self._scan_pos -= self._pos
+    self._pos = 0
+
+
+def DecodePayload( payload: bytes, logger = _logger ) -> dict:
+  try:
+    return json.loads( str( payload, 'utf-8' ), strict = False )
+  except Exception:
+    logger.exception( "Invalid message received: %s", payload )
+    raise
+
+
+def Encode( msg: dict ) -> str:
+  """Serialise msg with the DAP base protocol header. Content-Length is the
+  size in bytes of the utf-8 encoded payload."""
+  payload = json.dumps( msg )
+  return 'Content-Length: {0}\r\n\r\n{1}'.format(
+    len( payload.encode( 'utf-8' ) ),
+    payload )
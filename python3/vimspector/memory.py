@@ -0,0 +1,121 @@
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Memory diagnostics, for finding things which are retained after a debug
+session ends.
+
+ - ObjectCounts() counts the live instances of each vimspector class.
+ - SessionBuffers() groups vimspector's buffers by the session which created
+   them.
+ - With tracemalloc started (StartTracing()), TopAllocations() lists where the
+   most memory was allocated.
+
+This module doesn't import vim; the caller supplies the buffer names."""
+
+import collections
+import gc
+import re
+import tracemalloc
+
+# Buffers for a session are named with utils.BufferNameForSession
+_SESSION_BUFFER = re.compile( r'\[(\d+)\]$' )
+
+TRACEMALLOC_FRAMES = 10
+
+
+def ObjectCounts( package = 'vimspector' ):
+  """Returns { class name: number of live instances } for classes defined in
+  package, after a full garbage collection."""
+  gc.collect()
+  prefix = package + '.'
+  counts = collections.Counter()
+  for obj in gc.get_objects():
+    cls = type( obj )
+    module = getattr( cls, '__module__', None ) or ''
+    if module == package or module.startswith( prefix ):
+      counts[ f'{ module }.{ cls.__qualname__ }' ] += 1
+  return dict( counts )
+
+
+def SessionBuffers( buffer_names ):
+  """Returns { session id: [ buffer name ] } for the names which belong to a
+  session"""
+  buffers = collections.defaultdict( list )
+  for name in buffer_names:
+    match = _SESSION_BUFFER.search( name )
+    if match:
+      buffers[ int( match.group( 1 ) ) ].append( name )
+  return dict( buffers )
+
+
+def StartTracing():
+  if not tracemalloc.is_tracing():
+    tracemalloc.start( TRACEMALLOC_FRAMES )
+
+
+def StopTracing():
+  tracemalloc.stop()
+
+
+def IsTracing():
+  return tracemalloc.is_tracing()
+
+
+def TopAllocations( limit = 10 ):
+  """Returns [ ( 'file:line', size in bytes, count ) ] for the allocation sites
+  with the most memory currently allocated, or [] if not tracing"""
+  if not tracemalloc.is_tracing():
+    return []
+
+  snapshot = tracemalloc.take_snapshot().filter_traces( [
+    tracemalloc.Filter( False, tracemalloc.__file__ ),
+  ] )
+  return [ ( f'{ stat.traceback[ 0 ].filename }:{ stat.traceback[ 0 ].lineno }',
+             stat.size,
+             stat.count )
+           for stat in snapshot.statistics( 'lineno' )[ : limit ] ]
+
+
+def Report( buffer_names, live_session_ids, limit = 10 ):
+  """A human-readable report, as a list of lines"""
+  lines = [ 'Vimspector Memory Info', '' ]
+
+  lines.append( 'Live objects:' )
+  counts = ObjectCounts()
+  for name, count in sorted( counts.items(), key = lambda i: -i[ 1 ] ):
+    lines.append( f'  { count:>8}  { name }' )
+
+  lines += [ '', 'Buffers by session:' ]
+  for session_id, names in sorted( SessionBuffers( buffer_names ).items() ):
+    state = 'live' if session_id in live_session_ids else 'destroyed'
+    lines.append( f'  Session { session_id } ({ state }): '
+                  f'{ len( names ) } buffers' )
+    lines += [ f'    { name }' for name in sorted( names ) ]
+
+  lines += [ '', 'Garbage collector:' ]
+  lines.append( f'  Objects per generation: { gc.get_count() }' )
+  lines.append( f'  Uncollectable: { len( gc.garbage ) }' )
+
+  lines += [ '', 'Top allocations:' ]
+  if not IsTracing():
+    lines.append( '  Not tracing; use :VimspectorMemory start' )
+  else:
+    current, peak = tracemalloc.get_traced_memory()
+    lines.append( f'  Traced: { current // 1024 } KiB '
+                  f'(peak { peak // 1024 } KiB)' )
+    for site, size, count in TopAllocations( limit ):
+      lines.append( f'  { size // 1024:>8} KiB { count:>8} blocks  { site }' )
+
+  return lines
@@ -13,7 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from vimspector import utils, install
+from vimspector import utils, install, render, tracing
 
 import vim
 import json
@@ -89,6 +89,7 @@ class OutputView( object ):
 
     self._Print( category, text_lines )
 
+  @tracing.Traced
   def _Print( self, category, text_lines ):
     if category is None:
       # This category is suppressed
@@ -104,12 +105,17 @@ class OutputView( object ):
 
     self._ToggleFlag( category, True )
 
-    # Scroll the buffer
+    # Scroll the buffer once, however much output arrives at once
+    render.Schedule( self._ScrollToEnd )
+
+
+  def _ScrollToEnd( self ):
     if self._window.valid:
       utils.Call( 'win_execute', utils.WindowID( self._window ), 'normal! G' )
 
 
   def Reset( self ):
+    render.Cancel( self._ScrollToEnd )
     self.Clear()
     VIEWS.remove( self )
 
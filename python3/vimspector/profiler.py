@@ -0,0 +1,135 @@
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Profile vimspector's python code running in vim.
+
+While running, two profilers watch the thread which started profiling (in vim,
+the main thread, which runs every py3 call from the vimscript and the channel
+and timer callbacks):
+
+ - cProfile, which records exact call counts and times. These are dumped in
+   pstats format (view with python -m pstats, snakeviz, etc.)
+ - a sampler, which records the whole python stack every SAMPLE_INTERVAL.
+   These are dumped as folded stacks, the input format for flamegraph.pl,
+   speedscope, inferno, etc.
+
+Only time spent running python is recorded; time when vim is idle or running
+vimscript is not. This module doesn't import vim."""
+
+import collections
+import cProfile
+import os
+import sys
+import threading
+
+SAMPLE_INTERVAL = 0.005
+
+
+def _FrameName( frame ):
+  code = frame.f_code
+  return f'{ os.path.basename( code.co_filename ) }:{ code.co_name }'
+
+
+class Profiler( object ):
+  def __init__( self, sample_interval = SAMPLE_INTERVAL ):
+    self._sample_interval = sample_interval
+    self._profile = None
+    # The profile from the last time we stopped
+    self._result = None
+    self._samples = collections.Counter()
+    self._sampler = None
+    self._stop_sampling = threading.Event()
+    self._thread_id = None
+
+
+  def IsRunning( self ):
+    return self._profile is not None
+
+
+  def Start( self ):
+    if self.IsRunning():
+      return
+
+    self._profile = cProfile.Profile()
+    self._result = None
+    self._samples.clear()
+    self._thread_id = threading.get_ident()
+    self._stop_sampling.clear()
+    self._sampler = threading.Thread( target = self._Sample,
+                                      name = 'vimspector-profiler',
+                                      daemon = True )
+    self._sampler.start()
+    self._profile.enable()
+
+
+  def Stop( self ):
+    """Stop profiling, keeping the results until Dump or Start"""
+    if not self.IsRunning():
+      return
+
+    self._profile.disable()
+    self._stop_sampling.set()
+    self._sampler.join()
+    self._sampler = None
+    self._result = self._profile
+    self._profile = None
+
+
+  def SampleCount( self ):
+    return sum( self._samples.values() )
+
+
+  def Dump( self, base_path ):
+    """Stop profiling, and write base_path.pstats and base_path.folded. Returns
+    the paths written."""
+    self.Stop()
+    if self._result is None:
+      return []
+
+    pstats_path = base_path + '.pstats'
+    self._result.dump_stats( pstats_path )
+
+    folded_path = base_path + '.folded'
+    with open( folded_path, 'w', encoding = 'utf-8' ) as f:
+      for stack, count in self._samples.most_common():
+        f.write( f'{ stack } { count }\n' )
+
+    return [ pstats_path, folded_path ]
+
+
+  def _Sample( self ):
+    while not self._stop_sampling.wait( self._sample_interval ):
+      # There's no frame when the thread isn't running python, e.g. vim is
+      # idle
+      frame = sys._current_frames().get( self._thread_id )
+      if frame is None:
+        continue
+
+      stack = []
+      while frame is not None:
+        stack.append( _FrameName( frame ) )
+        frame = frame.f_back
+      self._samples[ ';'.join( reversed( stack ) ) ] += 1
+
+
+_profiler = None
+
+
+def Get():
+  """The profiler used by :VimspectorProfile"""
+  global _profiler
+  if _profiler is None:
+    _profiler = Profiler()
+  return _profiler
@@ -0,0 +1,188 @@
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Coalesce redraws of the UI.
+
+A single stop event produces a burst of responses (threads, stackTrace,
+scopes, variables, evaluate for each watch, ...) and each used to redraw its
+view as it arrived. Instead, response handlers call Schedule( draw ), which
+marks the view dirty. A zero-delay timer then calls each dirty draw function
+once, when vim next processes timers, i.e. after the current batch of messages
+has been handled.
+
+Use Now( draw ) to draw immediately instead, e.g. in response to the user
+pressing a key; this also cancels any pending draw of the same function.
+
+Draw functions are identified by equality, so bound methods of the same
+object are the same view."""
+
+import collections
+import logging
+import time
+
+import vim
+
+from vimspector import stats, tracing, utils
+
+_logger = logging.getLogger( __name__ )
+utils.SetUpLogging( _logger )
+
+# Number of draw duration samples kept per view
+DURATION_SAMPLES = 256
+
+
+def _Round( ms ):
+  if ms is None:
+    return None
+  return round( ms, 1 )
+
+
+def _Name( draw ):
+  return getattr( draw, '__qualname__', None ) or repr( draw )
+
+
+class ViewStats( object ):
+  def __init__( self ):
+    # Number of times a draw was requested with Schedule or Now
+    self.requested = 0
+    # Number of times it was actually drawn
+    self.count = 0
+    self.failures = 0
+    self.total_ms = 0
+    self.max_ms = 0
+    self.samples = collections.deque( maxlen = DURATION_SAMPLES )
+
+
+  def AddDraw( self, duration_ms, success ):
+    self.count += 1
+    if not success:
+      self.failures += 1
+    self.total_ms += duration_ms
+    self.max_ms = max( self.max_ms, duration_ms )
+    self.samples.append( duration_ms )
+
+
+  def AsDict( self ):
+    samples = sorted( self.samples )
+    return {
+      'requested': self.requested,
+      'count': self.count,
+      'failures': self.failures,
+      'total_ms': _Round( self.total_ms ),
+      'p50': _Round( stats.Percentile( samples, 50 ) ),
+      'p95': _Round( stats.Percentile( samples, 95 ) ),
+      'max': _Round( self.max_ms ),
+    }
+
+
+class Scheduler( object ):
+  def __init__( self ):
+    # draw function -> None, in the order they were first scheduled
+    self._dirty = {}
+    self._timer_pending = False
+    self._stats = collections.defaultdict( ViewStats )
+
+
+  def Schedule( self, draw ):
+    """Call draw once on the next flush, however many times it's scheduled
+    before then"""
+    self._stats[ _Name( draw ) ].requested += 1
+    self._dirty[ draw ] = None
+    if not self._timer_pending:
+      self._timer_pending = True
+      self._StartTimer()
+
+
+  def Now( self, draw ):
+    """Call draw now, cancelling any pending draw"""
+    self._stats[ _Name( draw ) ].requested += 1
+    self._dirty.pop( draw, None )
+    self._Draw( draw )
+
+
+  def Cancel( self, draw ):
+    """Forget any pending draw, e.g. because the view is being destroyed"""
+    self._dirty.pop( draw, None )
+
+
+  def IsPending( self, draw ):
+    return draw in self._dirty
+
+
+  def Flush( self ):
+    """Call each pending draw. Draws scheduled during the flush are called in
+    the same flush."""
+    self._timer_pending = False
+    with tracing.Span( 'render.Flush', views = len( self._dirty ) ):
+      while self._dirty:
+        draw = next( iter( self._dirty ) )
+        del self._dirty[ draw ]
+        self._Draw( draw )
+
+
+  def Stats( self ):
+    return { name: view_stats.AsDict()
+             for name, view_stats in sorted( self._stats.items() ) }
+
+
+  def ClearStats( self ):
+    self._stats.clear()
+
+
+  def _Draw( self, draw ):
+    success = False
+    start = time.perf_counter()
+    try:
+      draw()
+      success = True
+    except Exception:
+      # One broken view mustn't stop the others from drawing
+      _logger.exception( 'Exception drawing %s', _Name( draw ) )
+    finally:
+      self._stats[ _Name( draw ) ].AddDraw(
+        ( time.perf_counter() - start ) * 1000,
+        success )
+
+
+  def _StartTimer( self ):
+    vim.eval( 'timer_start( 0, '
+              'function( "vimspector#internal#render#Flush" ) )' )
+
+
+_scheduler = Scheduler()
+
+
+def Get():
+  return _scheduler
+
+
+def Schedule( draw ):
+  _scheduler.Schedule( draw )
+
+
+def Now( draw ):
+  _scheduler.Now( draw )
+
+
+def Cancel( draw ):
+  _scheduler.Cancel( draw )
+
+
+def Flush():
+  _scheduler.Flush()
+
+
+def Stats():
+  return _scheduler.Stats()
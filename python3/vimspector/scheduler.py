@@ -0,0 +1,161 @@
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Book-keeping for outstanding DAP requests which doesn't depend on vim."""
+
+import heapq
+import time
+
+
+def Now():
+  """Monotonic time in milliseconds"""
+  return time.monotonic() * 1000
+
+
+class DeadlineHeap( object ):
+  """A min-heap of deadlines, keyed by request seq.
+
+  Removal is lazy: entries for keys which are no longer live are discarded when
+  they reach the top of the heap, or when the heap is rebuilt because it has
+  become mostly dead entries."""
+
+  def __init__( self ):
+    self._heap = []
+    self._live = {}
+
+
+  def __len__( self ):
+    return len( self._live )
+
+
+  def __contains__( self, key ):
+    return key in self._live
+
+
+  def Add( self, key, deadline ):
+    self._live[ key ] = deadline
+    heapq.heappush( self._heap, ( deadline, key ) )
+
+
+  def Remove( self, key ):
+    if self._live.pop( key, None ) is None:
+      return
+
+    if not self._live:
+      self._heap.clear()
+    elif len( self._heap ) > 2 * len( self._live ) + 64:
+      self._heap = [ ( d, k ) for k, d in self._live.items() ]
+      heapq.heapify( self._heap )
+
+
+  def Clear( self ):
+    self._heap.clear()
+    self._live.clear()
+
+
+  def NextDeadline( self ):
+    self._DiscardDead()
+    return self._heap[ 0 ][ 0 ] if self._heap else None
+
+
+  def PopExpired( self, now ):
+    """Remove and return the keys of all entries whose deadline is <= now, in
+    deadline order"""
+    expired = []
+    while self._heap and self._heap[ 0 ][ 0 ] <= now:
+      deadline, key = heapq.heappop( self._heap )
+      if self._live.get( key ) == deadline:
+        del self._live[ key ]
+        expired.append( key )
+    return expired
+
+
+  def _DiscardDead( self ):
+    while self._heap:
+      deadline, key = self._heap[ 0 ]
+      if self._live.get( key ) == deadline:
+        return
+      heapq.heappop( self._heap )
+
+
+class PriorityQueue( object ):
+  """A FIFO queue per priority; lower priority values are served first.
+
+  Push returns a handle which can be passed to Remove."""
+
+  def __init__( self ):
+    self._heap = []
+    self._order = 0
+    self._live = 0
+    self._depth_by_priority = {}
+    self.enqueued = 0
+    self.max_depth = 0
+
+
+  def __len__( self ):
+    return self._live
+
+
+  def Push( self, item, priority ):
+    self._order += 1
+    # [ priority, order, item, alive ]
+    handle = [ priority, self._order, item, True ]
+    heapq.heappush( self._heap, handle )
+
+    self._live += 1
+    self._depth_by_priority[ priority ] = (
+      self._depth_by_priority.get( priority, 0 ) + 1 )
+    self.enqueued += 1
+    self.max_depth = max( self.max_depth, self._live )
+    return handle
+
+
+  def Pop( self ):
+    while self._heap:
+      handle = heapq.heappop( self._heap )
+      if handle[ 3 ]:
+        self._Dead( handle )
+        return handle[ 2 ]
+    return None
+
+
+  def Remove( self, handle ):
+    if handle[ 3 ]:
+      self._Dead( handle )
+      if not self._live:
+        self._heap.clear()
+
+
+  def Items( self ):
+    """All queued items, in no particular order"""
+    return [ handle[ 2 ] for handle in self._heap if handle[ 3 ] ]
+
+
+  def Clear( self ):
+    items = []
+    while self:
+      items.append( self.Pop() )
+    return items
+
+
+  def Depths( self ):
+    """Number of queued items, by priority"""
+    return { p: d for p, d in self._depth_by_priority.items() if d }
+
+
+  def _Dead( self, handle ):
+    handle[ 3 ] = False
+    self._live -= 1
+    self._depth_by_priority[ handle[ 0 ] ] -= 1
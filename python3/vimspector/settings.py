@@ -24,6 +24,17 @@ DEFAULTS = {
   'bottombar_height':   10,
   'disassembly_height': 20,
   'variables_display_mode': 'compact', # compact/full
+  # Indexed children (e.g. of arrays) are requested in pages of this size; 0
+  # means request them all at once
+  'variables_page_size': 1000,
+  # When non-zero, only draw this many lines beyond the bottom of the variables
+  # and watches windows, drawing more as they scroll; 0 means draw everything
+  'variables_render_ahead': 0,
+  # When non-zero, on stopping, request the scopes and variables of this many
+  # of the current frame's callers in the background, sending at most
+  # variables_prefetch_budget requests, so that moving up the stack is quick
+  'variables_prefetch_frames': 0,
+  'variables_prefetch_budget': 20,
 
   # For ui_mode = 'horizontal':
   'sidebar_width':      50,
@@ -41,6 +52,16 @@ DEFAULTS = {
   'enable_winbar':      True,
   'enable_auto_hover':  True,
 
+  # Adapter communication
+  'transport': 'vim', # vim/python
+  'transport_poll_interval': 10,
+
+  # Diagnostics
+  'transcript_dir': '',
+  'log_level': 'debug', # debug/info/warning/error/off
+  'log_file_max_mb': 10,
+  'log_file_backups': 1,
+
   # Session files
   'session_file_name': '.vimspector.session',
 
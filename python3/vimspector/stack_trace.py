@@ -18,7 +18,8 @@ import os
 import logging
 import typing
 
-from vimspector import utils, signs, settings
+from vimspector import utils, render, signs, settings, tracing
+from vimspector.debug_adapter_connection import PRIORITY_UI
 
 # Because flake8 wants this to be defined, but it's a circular import, so we
 # can't do it in proper code;
@@ -183,10 +184,15 @@ class StackTraceView( object ):
   def GetCurrentThreadId( self ):
     return self._current_thread
 
+  def IsCurrentThread( self, debug_session, thread_id ):
+    return ( self.GetCurrentSession() is debug_session and
+             self._current_thread == thread_id )
+
   def GetCurrentFrame( self ):
     return self._current_frame
 
   def Clear( self ):
+    render.Cancel( self._DrawThreads )
     self._sessions.clear()
 
     self._current_session = None
@@ -232,6 +238,7 @@ class StackTraceView( object ):
     return None
 
 
+  @tracing.Traced
   def LoadThreads( self,
                    debug_session,
                    infer_current_frame,
@@ -316,7 +323,7 @@ class StackTraceView( object ):
               requesting = True
 
       if not requesting:
-        self._DrawThreads()
+        render.Schedule( self._DrawThreads )
 
     def failure_handler( reason, msg ):
       # Make sure we request them again if the request fails
@@ -331,8 +338,9 @@ class StackTraceView( object ):
     s.requesting_threads = ThreadRequestState.REQUESTING
     debug_session.Connection().DoRequest( consume_threads, {
       'command': 'threads',
-    }, failure_handler )
+    }, failure_handler, priority = PRIORITY_UI )
 
+  @tracing.Traced
   def _DrawThreads( self ):
     self._line_to_frame.clear()
     self._line_to_thread.clear()
@@ -386,6 +394,7 @@ class StackTraceView( object ):
             self._line_to_thread[ line ] = thread
             self._DrawStackTrace( thread )
 
+  @tracing.Traced
   def _LoadStackTrace( self,
                        thread: Thread,
                        infer_current_frame,
@@ -394,18 +403,55 @@ class StackTraceView( object ):
     def consume_stacktrace( message ):
       thread.Expand( message[ 'body' ][ 'stackFrames' ] )
       if infer_current_frame:
-        for frame in thread.stacktrace:
+        frames = thread.stacktrace
+        if reason == 'invalidated' and self._current_frame is not None:
+          # Stay in the current frame if it's still there (the sort is stable,
+          # so otherwise this is the top frame as usual)
+          current_id = self._current_frame[ 'id' ]
+          frames = sorted( frames, key = lambda f: f[ 'id' ] != current_id )
+        for frame in frames:
           if self._JumpToFrame( thread, frame, reason ):
             break
 
-      self._DrawThreads()
+      render.Schedule( self._DrawThreads )
 
     thread.session.session.Connection().DoRequest( consume_stacktrace, {
       'command': 'stackTrace',
       'arguments': {
         'threadId': thread.id,
       }
-    } )
+    }, priority = PRIORITY_UI )
+
+
+  def RefreshStackTraces( self,
+                          debug_session,
+                          thread_id = None,
+                          frame_id = None ):
+    """Request the stack traces again, because the debug adapter said they're
+    out of date. Only the thread containing frame_id if it's set, else only
+    thread thread_id if that's set, else all of the threads whose stack traces
+    have been loaded. Returns True if the current thread is refreshed, in which
+    case its current frame (and so the variables) will be too."""
+    s = self.FindSession( debug_session )
+    if s is None:
+      return False
+
+    refreshed_current = False
+    for thread in s.threads:
+      if not thread.IsExpanded() or not thread.CanExpand():
+        continue
+      if frame_id is not None:
+        if not any( f[ 'id' ] == frame_id for f in thread.stacktrace ):
+          continue
+      elif thread_id is not None and thread.id != thread_id:
+        continue
+
+      is_current = ( s == self._current_session and
+                     thread.id == self._current_thread )
+      refreshed_current = refreshed_current or is_current
+      self._LoadStackTrace( thread, is_current, 'invalidated' )
+
+    return refreshed_current
 
 
   def _GetSelectedThread( self ) -> Thread:
@@ -422,7 +468,7 @@ class StackTraceView( object ):
   def _SetCurrentThread( self, thread: Thread ):
     self._current_session = thread.session
     self._current_thread = thread.id
-    self._DrawThreads()
+    render.Now( self._DrawThreads )
 
   def SetCurrentThread( self ):
     thread = self._GetSelectedThread()
@@ -443,7 +489,7 @@ class StackTraceView( object ):
     if thread:
       if thread.IsExpanded():
         thread.Collapse()
-        self._DrawThreads()
+        render.Now( self._DrawThreads )
       elif thread.CanExpand():
         self._LoadStackTrace( thread, False )
       else:
@@ -480,6 +526,21 @@ class StackTraceView( object ):
     return None, None
 
 
+  def CallerFrames( self, count ):
+    """Up to count frames above the current frame of the current thread which
+    UpFrame could move to"""
+    frames = []
+    offset = 1
+    while len( frames ) < count:
+      _, frame = self._GetFrameOffset( offset )
+      if not frame:
+        break
+      if frame.get( 'line', 0 ) > 0:
+        frames.append( frame )
+      offset += 1
+    return frames
+
+
   def UpFrame( self ):
     offset = 1
     while True:
@@ -522,13 +583,14 @@ class StackTraceView( object ):
     return False
 
 
+  @tracing.Traced
   def _JumpToFrame( self, thread: Thread, frame, reason = '' ):
     def do_jump():
       if 'line' in frame and frame[ 'line' ] > 0:
         self._current_session = thread.session
         self._current_thread = thread.id
         self._current_frame = frame
-        self._DrawThreads()
+        render.Schedule( self._DrawThreads )
         return thread.session.session.SetCurrentFrame( self._current_frame,
                                                        reason )
       return False
@@ -551,13 +613,25 @@ class StackTraceView( object ):
     if thread is None:
       utils.UserMessage( 'No thread selected' )
     elif thread.state == Thread.PAUSED:
-      thread.session.session.Connection().DoRequest(
-        lambda msg: self.OnContinued( thread.session.session, {
+      debug_session = thread.session.session
+      if self.IsCurrentThread( debug_session, thread.id ):
+        debug_session.SupersedeRequests()
+
+      def handler( msg ):
+        all_threads_continued = ( msg.get( 'body' ) or {} ).get(
+          'allThreadsContinued',
+          True )
+        # See DebugSession.OnEvent_continued
+        if ( all_threads_continued and
+             not self.IsCurrentThread( debug_session, thread.id ) ):
+          debug_session.SupersedeRequests()
+        self.OnContinued( debug_session, {
           'threadId': thread.id,
-          'allThreadsContinued': ( msg.get( 'body' ) or {} ).get(
-            'allThreadsContinued',
-            True )
-        } ),
+          'allThreadsContinued': all_threads_continued
+        } )
+
+      debug_session.Connection().DoRequest(
+        handler,
         {
           'command': 'continue',
           'arguments': {
@@ -595,8 +669,9 @@ class StackTraceView( object ):
         thread.Continued()
         break
 
-    self._DrawThreads()
+    render.Schedule( self._DrawThreads )
 
+  @tracing.Traced
   def OnStopped( self, debug_session, event ):
     threadId = event.get( 'threadId' )
     allThreadsStopped = event.get( 'allThreadsStopped', False )
@@ -627,7 +702,7 @@ class StackTraceView( object ):
         if thread.id == event[ 'threadId' ]:
           thread.Exited()
           break
-      self._DrawThreads()
+      render.Schedule( self._DrawThreads )
       return
 
     if event[ 'reason' ] == 'started' and self._current_thread is None:
@@ -647,9 +722,10 @@ class StackTraceView( object ):
     for thread in session.threads:
       thread.Exited()
 
-    self._DrawThreads()
+    render.Schedule( self._DrawThreads )
 
 
+  @tracing.Traced
   def _DrawStackTrace( self, thread: Thread ):
     if not thread.IsExpanded():
       return
@@ -756,7 +832,7 @@ class StackTraceView( object ):
           'sourceReference': source[ 'sourceReference' ],
           'source': source
         }
-      } )
+      }, priority = PRIORITY_UI )
 
   def SetSyntax( self, syntax ):
     self._current_syntax = utils.SetSyntax( self._current_syntax,
@@ -0,0 +1,129 @@
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Timing and traffic statistics for a debug adapter connection. This module
+doesn't import vim; times are in milliseconds, as returned by
+scheduler.Now()."""
+
+import collections
+import math
+
+# Number of latency samples kept per command. Percentiles are over these, so
+# reflect recent behaviour.
+LATENCY_SAMPLES = 256
+
+
+def Percentile( sorted_samples, percent ):
+  """The nearest-rank percentile of a sorted list, or None if it's empty"""
+  if not sorted_samples:
+    return None
+  rank = math.ceil( percent / 100 * len( sorted_samples ) )
+  return sorted_samples[ max( rank, 1 ) - 1 ]
+
+
+class CommandStats( object ):
+  def __init__( self ):
+    self.count = 0
+    self.failures = 0
+    self.timeouts = 0
+    self.max_ms = 0
+    self.samples = collections.deque( maxlen = LATENCY_SAMPLES )
+
+
+  def AddResponse( self, latency_ms, success ):
+    self.count += 1
+    if not success:
+      self.failures += 1
+    self.max_ms = max( self.max_ms, latency_ms )
+    self.samples.append( latency_ms )
+
+
+  def AsDict( self ):
+    samples = sorted( self.samples )
+    return {
+      'count': self.count,
+      'failures': self.failures,
+      'timeouts': self.timeouts,
+      'p50': _Round( Percentile( samples, 50 ) ),
+      'p95': _Round( Percentile( samples, 95 ) ),
+      'p99': _Round( Percentile( samples, 99 ) ),
+      'max': _Round( self.max_ms ),
+    }
+
+
+class ConnectionStats( object ):
+  def __init__( self, now ):
+    self.start = now
+    self.commands = collections.defaultdict( CommandStats )
+    # How long vim was blocked waiting for each synchronous request (see
+    # DebugAdapterConnection.DoRequestSync), by command
+    self.sync = collections.defaultdict( CommandStats )
+    self.bytes_sent = 0
+    self.bytes_received = 0
+    self.messages_sent = 0
+    self.messages_received = 0
+
+
+  def OnSent( self, size ):
+    self.messages_sent += 1
+    self.bytes_sent += size
+
+
+  def OnReceived( self, size = 0 ):
+    """Count a received message. size may be 0 if the bytes are counted
+    separately with OnBytesReceived."""
+    self.messages_received += 1
+    self.bytes_received += size
+
+
+  def OnBytesReceived( self, size ):
+    self.bytes_received += size
+
+
+  def OnResponse( self, command, latency_ms, success ):
+    self.commands[ command ].AddResponse( latency_ms, success )
+
+
+  def OnTimeout( self, command ):
+    self.commands[ command ].timeouts += 1
+
+
+  def OnSyncRequest( self, command, elapsed_ms, success ):
+    self.sync[ command ].AddResponse( elapsed_ms, success )
+
+
+  def AsDict( self, now ):
+    elapsed_s = max( now - self.start, 1 ) / 1000
+    return {
+      'uptime_s': round( elapsed_s, 1 ),
+      'bytes_sent': self.bytes_sent,
+      'bytes_received': self.bytes_received,
+      'messages_sent': self.messages_sent,
+      'messages_received': self.messages_received,
+      'messages_per_second': {
+        'sent': round( self.messages_sent / elapsed_s, 1 ),
+        'received': round( self.messages_received / elapsed_s, 1 ),
+      },
+      'commands': { command: stats.AsDict()
+                    for command, stats in sorted( self.commands.items() ) },
+      'sync': { command: stats.AsDict()
+                for command, stats in sorted( self.sync.items() ) },
+    }
+
+
+def _Round( ms ):
+  if ms is None:
+    return None
+  return round( ms, 1 )
@@ -0,0 +1,274 @@
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Lightweight span tracing, exported in the Chrome trace-event format (load
+the file in chrome://tracing, Perfetto or speedscope).
+
+Tracing is off by default. When it's off, Span() returns a shared object which
+does nothing and Bind() returns the callback unchanged, so instrumentation
+costs a function call and a test.
+
+  with tracing.Span( 'LoadThreads' ):
+    ...
+
+  @tracing.Traced
+  def _DrawThreads( self ):
+    ...
+
+Spans nest, by time, on the thread which runs them. To link work done later in
+a callback (e.g. when a DAP response arrives) to the span which scheduled it,
+wrap the callback with Bind() when scheduling it; the trace then shows a flow
+arrow from the scheduling span to the callback's span.
+
+This module doesn't import vim."""
+
+import collections
+import functools
+import json
+import os
+import threading
+import time
+
+# The most recent events are kept, up to this many
+MAX_EVENTS = 500000
+
+_enabled = False
+_events = collections.deque( maxlen = MAX_EVENTS )
+_next_id = 0
+_local = threading.local()
+
+
+def Enable():
+  global _enabled
+  _enabled = True
+
+
+def Disable():
+  global _enabled
+  _enabled = False
+
+
+def IsEnabled():
+  return _enabled
+
+
+def Clear():
+  _events.clear()
+
+
+def EventCount():
+  return len( _events )
+
+
+def _Now():
+  return time.perf_counter_ns() // 1000
+
+
+def _NextId():
+  global _next_id
+  _next_id += 1
+  return _next_id
+
+
+def _Stack():
+  try:
+    return _local.stack
+  except AttributeError:
+    _local.stack = []
+    return _local.stack
+
+
+class _NullSpan( object ):
+  __slots__ = ()
+
+  def __enter__( self ):
+    return self
+
+  def __exit__( self, *args ):
+    return False
+
+  def Annotate( self, **kwargs ):
+    pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span( object ):
+  __slots__ = ( 'name', 'args', 'flow', 'start' )
+
+  def __init__( self, name, args, flow ):
+    self.name = name
+    self.args = args
+    self.flow = flow
+    self.start = None
+
+
+  def __enter__( self ):
+    self.start = _Now()
+    _Stack().append( self )
+    if self.flow is not None:
+      _events.append( {
+        'name': 'callback',
+        'cat': 'flow',
+        'ph': 'f',
+        'bp': 'e',
+        'id': self.flow,
+        'ts': self.start,
+        'pid': os.getpid(),
+        'tid': threading.get_ident(),
+      } )
+    return self
+
+
+  def __exit__( self, *args ):
+    end = _Now()
+    stack = _Stack()
+    if stack and stack[ -1 ] is self:
+      stack.pop()
+
+    event = {
+      'name': self.name,
+      'cat': 'vimspector',
+      'ph': 'X',
+      'ts': self.start,
+      'dur': end - self.start,
+      'pid': os.getpid(),
+      'tid': threading.get_ident(),
+    }
+    if self.args:
+      event[ 'args' ] = self.args
+    _events.append( event )
+    return False
+
+
+  def Annotate( self, **kwargs ):
+    """Add arguments to the span, e.g. the size of something computed within
+    it"""
+    if self.args is None:
+      self.args = {}
+    self.args.update( kwargs )
+
+
+def Span( name, **args ):
+  """A context manager recording the time spent within it as a span called
+  name. args are recorded with the span."""
+  if not _enabled:
+    return _NULL_SPAN
+  return _Span( name, args or None, None )
+
+
+def Traced( fct ):
+  """Decorator: record each call to fct as a span"""
+  name = fct.__qualname__
+
+  @functools.wraps( fct )
+  def wrapper( *args, **kwargs ):
+    if not _enabled:
+      return fct( *args, **kwargs )
+    with _Span( name, None, None ):
+      return fct( *args, **kwargs )
+
+  return wrapper
+
+
+def Bind( callback, name = None ):
+  """Return a callable which calls callback inside a span linked to the
+  current span (if any), or callback itself if tracing is off."""
+  if not _enabled or callback is None:
+    return callback
+
+  if name is None:
+    name = getattr( callback, '__qualname__', None ) or repr( callback )
+
+  flow = None
+  if _Stack():
+    flow = _NextId()
+    _events.append( {
+      'name': 'callback',
+      'cat': 'flow',
+      'ph': 's',
+      'id': flow,
+      'ts': _Now(),
+      'pid': os.getpid(),
+      'tid': threading.get_ident(),
+    } )
+
+  @functools.wraps( callback )
+  def wrapper( *args, **kwargs ):
+    with _Span( name, None, flow ):
+      return callback( *args, **kwargs )
+
+  return wrapper
+
+
+def AsyncBegin( name, async_id, **args ):
+  """Start an asynchronous span, e.g. a request to the debug adapter, which is
+  ended by AsyncEnd with the same name and id"""
+  if not _enabled:
+    return
+  _events.append( {
+    'name': name,
+    'cat': 'async',
+    'ph': 'b',
+    'id': async_id,
+    'ts': _Now(),
+    'pid': os.getpid(),
+    'tid': threading.get_ident(),
+    'args': args,
+  } )
+
+
+def AsyncEnd( name, async_id, **args ):
+  if not _enabled:
+    return
+  _events.append( {
+    'name': name,
+    'cat': 'async',
+    'ph': 'e',
+    'id': async_id,
+    'ts': _Now(),
+    'pid': os.getpid(),
+    'tid': threading.get_ident(),
+    'args': args,
+  } )
+
+
+def Instant( name, **args ):
+  if not _enabled:
+    return
+  _events.append( {
+    'name': name,
+    'cat': 'vimspector',
+    'ph': 'i',
+    's': 't',
+    'ts': _Now(),
+    'pid': os.getpid(),
+    'tid': threading.get_ident(),
+    'args': args,
+  } )
+
+
+def Events():
+  return list( _events )
+
+
+def Export( path ):
+  """Write the recorded events to path as Chrome trace-event JSON"""
+  with open( path, 'w', encoding = 'utf-8' ) as f:
+    json.dump( {
+      'traceEvents': Events(),
+      'displayTimeUnit': 'ms',
+    }, f )
@@ -0,0 +1,75 @@
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Recording of the DAP conversation with the debug adapter.
+
+A transcript is a JSONL file with one line per message:
+
+  {"t": <ms since recording started>, "d": "out"|"in", "m": <DAP message>}
+
+"out" messages were sent to the adapter, "in" messages were received from it.
+support/replay/replay_adapter.py can play a transcript back to vimspector.
+This module doesn't import vim."""
+
+import json
+import os
+import time
+
+SENT = 'out'
+RECEIVED = 'in'
+
+
+class Recorder( object ):
+  def __init__( self, path ):
+    self.path = path
+    self._start = time.monotonic()
+    self._file = open( path, 'w', encoding = 'utf-8' )
+
+
+  def Record( self, direction, message ):
+    if self._file is None:
+      return
+
+    self._file.write( json.dumps( {
+      't': round( ( time.monotonic() - self._start ) * 1000, 3 ),
+      'd': direction,
+      'm': message,
+    }, separators = ( ',', ':' ) ) )
+    self._file.write( '\n' )
+
+
+  def Close( self ):
+    if self._file is not None:
+      self._file.close()
+      self._file = None
+
+
+def NewRecorder( directory, session_id ):
+  os.makedirs( directory, exist_ok = True )
+  return Recorder( os.path.join(
+    directory,
+    'vimspector-{}-{}.jsonl'.format( time.strftime( '%Y%m%d-%H%M%S' ),
+                                     session_id ) ) )
+
+
+def Load( path ):
+  """Returns a list of ( time, direction, message )"""
+  entries = []
+  with open( path, encoding = 'utf-8' ) as f:
+    for line in f:
+      if line.strip():
+        entry = json.loads( line )
+        entries.append( ( entry[ 't' ], entry[ 'd' ], entry[ 'm' ] ) )
+  return entries
@@ -0,0 +1,320 @@
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A transport to the debug adapter where python threads own the pipes or the
+socket.
+
+Reading, framing and JSON decoding all happen on background threads. The UI
+thread collects the results with Poll(), which returns a batch of events:
+
+  ( MESSAGE, <decoded DAP message> )
+  ( STDERR, <text> )
+  ( ERROR, <message for the user> )
+  ( EXIT, <exit status> )
+
+EXIT is always the last event. This module doesn't import vim."""
+
+import logging
+import os
+import queue
+import shlex
+import socket
+import subprocess
+import threading
+
+from vimspector import framing
+
+MESSAGE = 'message'
+STDERR = 'stderr'
+ERROR = 'error'
+EXIT = 'exit'
+
+READ_SIZE = 64 * 1024
+
+CONNECT_ATTEMPTS = 10
+CONNECT_INTERVAL = 1
+STOP_TIMEOUT = 5
+
+_logger = logging.getLogger( __name__ )
+
+
+def _ToArgs( command ):
+  if isinstance( command, str ):
+    return shlex.split( command )
+  return list( command )
+
+
+def _Environment( env ):
+  environment = dict( os.environ )
+  environment.update( { k: str( v ) for k, v in ( env or {} ).items() } )
+  return environment
+
+
+class ThreadedTransport( object ):
+  def __init__( self, on_wakeup = None, logger = None ):
+    """on_wakeup, if supplied, is called from a background thread when events
+    become available after the queue was drained."""
+    self._logger = logger or _logger
+    self._on_wakeup = on_wakeup
+
+    self._events = queue.SimpleQueue()
+    self._signalled = threading.Event()
+    self._outgoing = queue.SimpleQueue()
+
+    self._process = None
+    self._socket = None
+    self._reader = None
+    self._writer = None
+    self._threads = []
+    self._stopping = False
+    self._stop_connecting = threading.Event()
+    # Protects _stopping and _socket, which the reader thread sets once
+    # connected
+    self._lock = threading.Lock()
+    self._exited = False
+    self._exit_lock = threading.Lock()
+    # Only written by the reader thread
+    self.bytes_received = 0
+
+
+  def StartJob( self, command, cwd = None, env = None ):
+    """Start the adapter and talk to it over its stdin/stdout"""
+    self._process = self._StartProcess( command,
+                                        cwd,
+                                        env,
+                                        capture_stdout = True )
+    self._reader = self._process.stdout
+    self._writer = self._process.stdin
+    self._Spawn( self._ReadLoop, 'reader' )
+    self._Spawn( self._WriteLoop, 'writer' )
+    stderr = self._process.stderr
+    self._Spawn( lambda: self._StderrLoop( stderr ), 'stderr' )
+
+
+  def StartChannel( self, host, port, command = None, cwd = None, env = None ):
+    """Connect to the adapter on host:port, first starting command if supplied.
+    This doesn't wait for the connection: the reader thread connects, retrying
+    while the adapter starts up. Anything sent in the meantime is sent once
+    connected. If it can't connect, Poll() returns an ERROR then the EXIT."""
+    port = int( port )
+    if command:
+      # Anything written to stdout is just logged, like the stderr
+      self._process = self._StartProcess( command,
+                                          cwd,
+                                          env,
+                                          capture_stdout = False )
+      stdout = self._process.stdout
+      self._Spawn( lambda: self._StderrLoop( stdout ), 'stderr' )
+
+    self._Spawn( lambda: self._ConnectAndRead( host, port ), 'reader' )
+
+
+  def Send( self, data ):
+    if self._stopping or self._exited:
+      return False
+
+    if isinstance( data, str ):
+      data = data.encode( 'utf-8' )
+    self._outgoing.put( data )
+    return True
+
+
+  def Poll( self ):
+    """Return all available events. Must only be called from one thread."""
+    self._signalled.clear()
+    events = []
+    while True:
+      try:
+        events.append( self._events.get_nowait() )
+      except queue.Empty:
+        return events
+
+
+  def Wait( self, timeout ):
+    """Block for up to timeout seconds until an event is available."""
+    return self._signalled.wait( timeout )
+
+
+  def Stop( self ):
+    """Shut down the adapter connection and wait for the reader to finish, so
+    that after this returns, the EXIT event is available from Poll()."""
+    with self._lock:
+      if self._stopping:
+        return
+      self._stopping = True
+      sock = self._socket
+    self._stop_connecting.set()
+    self._outgoing.put( None )
+
+    if sock is not None:
+      try:
+        sock.shutdown( socket.SHUT_RDWR )
+      except OSError:
+        pass
+
+    self._KillProcess()
+
+    for thread in self._threads:
+      thread.join( STOP_TIMEOUT )
+
+    if not self._exited:
+      # The reader is wedged; don't wait for it any more
+      self._Exit( -1 )
+
+
+  def _StartProcess( self, command, cwd, env, capture_stdout ):
+    return subprocess.Popen(
+      _ToArgs( command ),
+      cwd = cwd,
+      env = _Environment( env ),
+      stdin = subprocess.PIPE,
+      stdout = subprocess.PIPE,
+      stderr = subprocess.PIPE if capture_stdout else subprocess.STDOUT,
+      bufsize = 0 )
+
+
+  def _Spawn( self, target, name ):
+    thread = threading.Thread( target = target,
+                               name = 'vimspector-' + name,
+                               daemon = True )
+    thread.start()
+    self._threads.append( thread )
+
+
+  def _Post( self, event ):
+    self._events.put( event )
+    if not self._signalled.is_set():
+      self._signalled.set()
+      if self._on_wakeup:
+        self._on_wakeup()
+
+
+  def _Connect( self, host, port ):
+    """Returns the connected socket, or None"""
+    for attempt in range( CONNECT_ATTEMPTS ):
+      if attempt > 0 and self._stop_connecting.wait( CONNECT_INTERVAL ):
+        return None
+
+      try:
+        return socket.create_connection( ( host, port ) )
+      except ConnectionRefusedError:
+        self._logger.debug( 'Connection to %s:%s refused (attempt %s)',
+                            host,
+                            port,
+                            attempt + 1 )
+      except OSError:
+        self._logger.exception( 'Unable to connect to %s:%s', host, port )
+        return None
+
+    return None
+
+
+  def _ConnectAndRead( self, host, port ):
+    sock = self._Connect( host, port )
+    with self._lock:
+      if sock is not None and self._stopping:
+        sock.close()
+        sock = None
+      self._socket = sock
+
+    if sock is None:
+      if not self._stopping:
+        self._logger.error( 'Unable to connect to %s:%s', host, port )
+        self._Post( ( ERROR, f'Unable to connect to { host }:{ port }' ) )
+      self._KillProcess()
+      self._Exit( -1 )
+      return
+
+    sock.setsockopt( socket.IPPROTO_TCP, socket.TCP_NODELAY, 1 )
+    self._reader = sock.makefile( 'rb', buffering = 0 )
+    self._writer = sock.makefile( 'wb', buffering = 0 )
+    self._Spawn( self._WriteLoop, 'writer' )
+    self._ReadLoop()
+
+
+  def _ReadLoop( self ):
+    decoder = framing.MessageDecoder( self._logger )
+    try:
+      while True:
+        data = self._reader.read( READ_SIZE )
+        if not data:
+          break
+
+        self.bytes_received += len( data )
+        for message in decoder.FeedMessages( data ):
+          self._Post( ( MESSAGE, message ) )
+    except OSError:
+      if not self._stopping:
+        self._logger.exception( 'Error reading from debug adapter' )
+
+    status = 0
+    if self._process is not None and self._socket is None:
+      try:
+        status = self._process.wait( STOP_TIMEOUT )
+      except subprocess.TimeoutExpired:
+        status = -1
+
+    self._Exit( status )
+
+
+  def _WriteLoop( self ):
+    while True:
+      data = self._outgoing.get()
+      if data is None:
+        break
+
+      try:
+        self._writer.write( data )
+        self._writer.flush()
+      except OSError:
+        if not self._stopping:
+          self._logger.exception( 'Error writing to debug adapter' )
+        break
+
+    try:
+      self._writer.close()
+    except OSError:
+      pass
+
+
+  def _StderrLoop( self, stream ):
+    try:
+      while True:
+        data = stream.read( READ_SIZE )
+        if not data:
+          break
+        self._Post( ( STDERR, str( data, 'utf-8', errors = 'replace' ) ) )
+    except OSError:
+      pass
+
+
+  def _KillProcess( self ):
+    if self._process is None or self._process.poll() is not None:
+      return
+
+    self._process.terminate()
+    try:
+      self._process.wait( 1 )
+    except subprocess.TimeoutExpired:
+      self._process.kill()
+
+
+  def _Exit( self, status ):
+    with self._exit_lock:
+      if self._exited:
+        return
+      self._exited = True
+    self._outgoing.put( None )
+    self._Post( ( EXIT, status ) )
@@ -14,9 +14,12 @@
 # limitations under the License.
 
 
+import atexit
 import logging
+import logging.handlers
 import os
 import contextlib
+import queue
 import vim
 import json
 import subprocess
@@ -26,17 +29,66 @@ import re
 import typing
 import base64
 
-from vimspector.core_utils import memoize, NormalizePath
+from vimspector.core_utils import memoize, NormalizePath, DiffLines
 from vimspector.vendor.hexdump import hexdump
 
 LOG_FILE = os.path.expanduser( os.path.join( '~', '.vimspector.log' ) )
 NVIM_NAMESPACE = None
 
-_log_handler = logging.FileHandler( LOG_FILE, mode = 'w', encoding = 'utf-8' )
+LOG_LEVELS = {
+  'debug': logging.DEBUG,
+  'info': logging.INFO,
+  'warning': logging.WARNING,
+  'error': logging.ERROR,
+  'off': logging.CRITICAL + 1,
+}
 
-_log_handler.setFormatter(
-  logging.Formatter( '%(asctime)s - %(levelname)s - %(filename)s:%(lineno)s - '
-                     '%(context)s - %(message)s' ) )
+
+def _LogSetting( name ):
+  # This is used while this module is being imported, so we can't use
+  # settings.Get (which uses this module)
+  from vimspector import settings
+  value = vim.vars.get( f'vimspector_{ name }', settings.DEFAULTS[ name ] )
+  if isinstance( value, bytes ):
+    return value.decode( 'utf-8' )
+  return value
+
+
+def _LogLevel():
+  level = str( _LogSetting( 'log_level' ) ).lower()
+  return LOG_LEVELS.get( level, logging.DEBUG )
+
+
+def _CreateLogFileHandler():
+  # Start each vim with an empty log. RotatingFileHandler always appends, so
+  # truncate it first.
+  try:
+    open( LOG_FILE, 'w' ).close()
+  except OSError:
+    pass
+
+  handler = logging.handlers.RotatingFileHandler(
+    LOG_FILE,
+    maxBytes = int( float( _LogSetting( 'log_file_max_mb' ) ) * 1048576 ),
+    backupCount = int( _LogSetting( 'log_file_backups' ) ),
+    encoding = 'utf-8' )
+  handler.setFormatter(
+    logging.Formatter( '%(asctime)s - %(levelname)s - '
+                       '%(filename)s:%(lineno)s - '
+                       '%(context)s - %(message)s' ) )
+  return handler
+
+
+# Loggers put records on a queue, and a background thread writes them to the
+# log file, so that the UI thread doesn't wait for disk I/O. The message is
+# still formatted on the calling thread (because the arguments, e.g. DAP
+# messages, may be modified afterwards), but only if the level is enabled.
+_log_queue = queue.SimpleQueue()
+_log_handler = logging.handlers.QueueHandler( _log_queue )
+_log_listener = logging.handlers.QueueListener( _log_queue,
+                                                _CreateLogFileHandler() )
+_log_listener.start()
+atexit.register( _log_listener.stop )
 
 
 class ContextLogFilter( logging.Filter ):
@@ -55,7 +107,7 @@ class ContextLogFilter( logging.Filter ):
 
 
 def SetUpLogging( logger, context = None ):
-  logger.setLevel( logging.DEBUG )
+  logger.setLevel( _LogLevel() )
   if _log_handler not in logger.handlers:
     logger.addHandler( _log_handler )
     logger.addFilter( ContextLogFilter( context ) )
@@ -165,11 +217,13 @@ def CleanUpHiddenBuffer( buf ):
   if not buf.valid:
     return
 
+  # Wipe rather than delete; a deleted buffer stays in the buffer list
+  # (unlisted), so every session would leave its buffers behind
   try:
-    vim.command( 'bdelete! {}'.format( buf.number ) )
+    vim.command( 'bwipeout! {}'.format( buf.number ) )
   except vim.error as e:
-    # FIXME: For now just ignore the "no buffers were deleted" error
-    if 'E516' not in str( e ):
+    # FIXME: For now just ignore the "no buffers were wiped out" error
+    if 'E517' not in str( e ):
       raise
 
 
@@ -525,6 +579,61 @@ def ClearBuffer( buf, modified = False ):
     buf.options[ 'modified' ] = False
 
 
+def UpdateBufferLines( buf, old_lines, new_lines, modified = False ):
+  """Change buf, which displays old_lines, to display new_lines. Each line is
+  a ( text, highlight group ) pair. Only the lines which differ are changed and
+  re-highlighted, so the cost depends on the size of the change, not the size
+  of the buffer."""
+  if not new_lines:
+    ClearBuffer( buf, modified )
+    return
+
+  extra_lines = len( buf ) - len( old_lines )
+  if extra_lines > 0 and old_lines and IsPromptBuffer( buf ):
+    # Below our lines, vim adds the prompt line and what the user entered at
+    # the prompt. Remove those, as a full redraw would, and diff the rest.
+    buf[ len( old_lines ) : ] = []
+    extra_lines = 0
+
+  if not old_lines or extra_lines != 0:
+    # Either the buffer is empty (it still has one empty line), or it was
+    # changed behind our back; replace everything
+    ClearBuffer( buf, modified )
+    changes = [ ( 0, 1, 0, len( new_lines ) ) ]
+  else:
+    changes = DiffLines( old_lines, new_lines )
+
+  try:
+    # Work from the bottom up, so that the line numbers of each change are
+    # not affected by the changes already made
+    for old_start, old_end, new_start, new_end in reversed( changes ):
+      lines = new_lines[ new_start : new_end ]
+      buf[ old_start : old_end ] = [ text for text, _ in lines ]
+      if not lines:
+        continue
+
+      first = old_start + 1
+      ClearTextPropertiesForLines( buf, first, first + len( lines ) - 1 )
+      for index, ( text, hl ) in enumerate( lines ):
+        HighlightTextSection( buf,
+                              hl = hl,
+                              start_line = first + index,
+                              start_col = 1,
+                              end_line = first + index,
+                              end_col = len( text ) )
+  except Exception:
+    # See AppendToBuffer
+    _logger.exception(
+      'Internal error while updating buffer %s (%s)', buf.name, buf.number )
+  finally:
+    if not modified:
+      buf.options[ 'modified' ] = False
+
+
+def IsPromptBuffer( buf ):
+  return ToUnicode( buf.options[ 'buftype' ] ) == 'prompt'
+
+
 def SetBufferContents( buf, lines, modified=False ):
   try:
     # FIXME: Really any iteratble list-like type would work here (iterable isn't
@@ -884,8 +993,12 @@ def GetVisualSelection( bufnr ):
   lines[ -1 ] = lines[ -1 ][ : end_col + 1 ]
   lines[ 0 ] = lines[ 0 ][ start_col : ]
 
-  _logger.debug( f'Visual selection: { lines } from '
-                 f'{ start_line }/{ start_col } -> { end_line }/{ end_col }' )
+  _logger.debug( 'Visual selection: %s from %s/%s -> %s/%s',
+                 lines,
+                 start_line,
+                 start_col,
+                 end_line,
+                 end_col )
 
   return lines
 
@@ -1134,6 +1247,20 @@ def ClearTextPropertiesForBuffer( buf ):
     Call( 'prop_clear', 1, len( buf ), { 'bufnr': buf.number } )
 
 
+def ClearTextPropertiesForLines( buf, start_line, end_line ):
+  if VimIsNeovim():
+    if NVIM_NAMESPACE is not None:
+      Call( 'nvim_buf_clear_namespace',
+            buf.number,
+            NVIM_NAMESPACE,
+            start_line - 1,
+            end_line )
+    return
+
+  if Exists( '*prop_clear' ):
+    Call( 'prop_clear', start_line, end_line, { 'bufnr': buf.number } )
+
+
 def HighlightTextSection( buf,
                           hl,
                           start_line,
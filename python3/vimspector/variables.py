@@ -16,11 +16,45 @@
 import abc
 import vim
 import logging
+import sys
 from functools import partial
 import typing
 
-from vimspector import utils, settings
-from vimspector.debug_adapter_connection import DebugAdapterConnection
+from vimspector import core_utils, render, utils, settings, tracing
+from vimspector.debug_adapter_connection import ( DebugAdapterConnection,
+                                                   PRIORITY_UI,
+                                                   PRIORITY_VISIBLE,
+                                                   PRIORITY_BACKGROUND )
+
+
+# The fields of a DAP Variable which we use. We can have a lot of Variables, so
+# the rest are dropped to save memory.
+VARIABLE_FIELDS = (
+  'name',
+  'value',
+  'type',
+  'presentationHint',
+  'variablesReference',
+  'indexedVariables',
+  'memoryReference',
+)
+
+
+def _CompactVariable( variable: dict ):
+  """A copy of the DAP Variable variable with only the fields we use. Names and
+  types are repeated a lot (e.g. in arrays), so they are interned."""
+  compact = {}
+  for field in VARIABLE_FIELDS:
+    value = variable.get( field )
+    if value is None:
+      continue
+    if field in ( 'name', 'type' ):
+      value = sys.intern( value )
+    elif field in ( 'variablesReference', 'indexedVariables' ) and not value:
+      # Absent is the same as 0
+      continue
+    compact[ field ] = value
+  return compact
 
 
 class Expandable:
@@ -35,6 +69,10 @@ class Expandable:
   a 'variablesReference' to be resolved by the 'variables' request. Records the
   current state expanded/collapsed. Implementations just implement
   VariablesReference to get the variables."""
+  # There can be a very large number of these, so they use slots rather than a
+  # __dict__. Subclasses must declare __slots__ too.
+  __slots__ = ( 'variables', 'container', 'connection', 'expanded' )
+
   def __init__( self,
                 connection: DebugAdapterConnection,
                 container: 'Expandable' = None ):
@@ -55,6 +93,9 @@ class Expandable:
   def IsExpandable( self ):
     return self.VariablesReference() > 0
 
+  def IsLazy( self ):
+    return False
+
   def IsContained( self ):
     return self.container is not None
 
@@ -62,6 +103,9 @@ class Expandable:
   def VariablesReference( self ):
     assert False
 
+  def IndexedVariables( self ):
+    return 0
+
   @abc.abstractmethod
   def FrameID( self ):
     assert False
@@ -84,13 +128,24 @@ class Expandable:
 
 class Scope( Expandable ):
   """Holds an expandable scope (a DAP scope dict), with expand/collapse state"""
+  __slots__ = ( 'scope', 'deferred' )
+
   def __init__( self, connection: DebugAdapterConnection, scope: dict ):
     super().__init__( connection )
     self.scope = scope
+    # An expanded expensive scope whose variables are only requested when it's
+    # visible. Its old variables aren't drawn until then.
+    self.deferred = False
+
+  def ShouldDrawDrillDown( self ):
+    return not self.deferred and super().ShouldDrawDrillDown()
 
   def VariablesReference( self ):
     return self.scope.get( 'variablesReference', 0 )
 
+  def IndexedVariables( self ):
+    return self.scope.get( 'indexedVariables', 0 )
+
   def MemoryReference( self ):
     return None
 
@@ -110,6 +165,8 @@ class Scope( Expandable ):
 
 class WatchResult( Expandable ):
   """Holds the result of a Watch expression with expand/collapse."""
+  __slots__ = ( 'watch', 'result', 'changed' )
+
   def __init__( self,
                 connection: DebugAdapterConnection,
                 watch,
@@ -123,6 +180,9 @@ class WatchResult( Expandable ):
   def VariablesReference( self ):
     return self.result.get( 'variablesReference', 0 )
 
+  def IndexedVariables( self ):
+    return self.result.get( 'indexedVariables', 0 )
+
   def MemoryReference( self ):
     return self.result.get( 'memoryReference' )
 
@@ -150,6 +210,8 @@ class WatchResult( Expandable ):
 
 
 class WatchFailure( WatchResult ):
+  __slots__ = ()
+
   def __init__( self, connection: DebugAdapterConnection, watch, reason ):
     super().__init__( connection, watch, { 'result': reason } )
     self.changed = True
@@ -157,18 +219,23 @@ class WatchFailure( WatchResult ):
 
 class Variable( Expandable ):
   """Holds one level of an expanded value tree. Also itself expandable."""
+  __slots__ = ( 'variable', 'changed' )
+
   def __init__( self,
                 connection: DebugAdapterConnection,
                 container: Expandable,
                 variable: dict ):
     super().__init__( connection = connection, container = container )
-    self.variable = variable
+    self.variable = _CompactVariable( variable )
     # A new variable appearing is marked as changed
     self.changed = True
 
   def VariablesReference( self ):
     return self.variable.get( 'variablesReference', 0 )
 
+  def IndexedVariables( self ):
+    return self.variable.get( 'indexedVariables', 0 )
+
   def MemoryReference( self ):
     return self.variable.get( 'memoryReference' )
 
@@ -178,12 +245,28 @@ class Variable( Expandable ):
   def Name( self ):
     return self.variable[ 'name' ]
 
+  def IsLazy( self ):
+    """A lazy variable's value (e.g. a property getter) isn't evaluated until
+    the user asks for it, by requesting its only child"""
+    return bool( ( self.variable.get( 'presentationHint' ) or {} ).get( 'lazy' )
+                 and self.VariablesReference() > 0 )
+
+  def ShouldDrawDrillDown( self ):
+    return not self.IsLazy() and super().ShouldDrawDrillDown()
+
+  def Resolve( self, child: dict ):
+    """Replace a lazy variable's value with child, the only child of it"""
+    resolved = dict( child )
+    resolved[ 'name' ] = self.variable[ 'name' ]
+    self.variable = _CompactVariable( resolved )
+    self.variables = None
+
   def Update( self, connection, variable ):
     super().Update( connection )
     self.changed = False
     if self.variable[ 'value' ] != variable[ 'value' ]:
       self.changed = True
-    self.variable = variable
+    self.variable = _CompactVariable( variable )
 
   def HoverText( self ):
     if not self.variable:
@@ -196,8 +279,49 @@ class Variable( Expandable ):
     )
 
 
+class IndexRange( Expandable ):
+  """A range of the indexed children of its container, which has too many to
+  request at once. Its children are either the variables in the range, or
+  smaller ranges."""
+  __slots__ = ( 'start', 'count', 'changed' )
+
+  def __init__( self,
+                connection: DebugAdapterConnection,
+                container: Expandable,
+                start: int,
+                count: int ):
+    super().__init__( connection = connection, container = container )
+    self.start = start
+    self.count = count
+    self.changed = False
+
+  def VariablesReference( self ):
+    return self.container.VariablesReference()
+
+  def IndexedVariables( self ):
+    return self.count
+
+  def IsContained( self ):
+    # Not a real variable, so can't be set, etc.
+    return False
+
+  def MemoryReference( self ):
+    return None
+
+  def FrameID( self ):
+    return self.container.FrameID()
+
+  def Name( self ):
+    return f'[{ self.start }..{ self.start + self.count - 1 }]'
+
+  def HoverText( self ):
+    return None
+
+
 class Watch:
   """Holds a user watch expression (DAP request) and the result (WatchResult)"""
+  __slots__ = ( 'result', 'line', 'connection', 'expression' )
+
   def __init__( self, connection: DebugAdapterConnection, expression: dict ):
     self.result: WatchResult
     self.line = None
@@ -235,6 +359,64 @@ class Watch:
     return Watch( connection, watch )
 
 
+class LineModel:
+  """The lines to display in a View, built from scratch on each draw. Each
+  line is a ( text, highlight group ) pair; items maps the line number (1-based)
+  to the Expandable displayed on it.
+
+  If limit is set, only the lines from first (0-based) to first + limit are
+  kept. Those before first are counted but not stored, drawing stops after the
+  last one, and truncated is set to say that there was more to draw. Line
+  numbers are those in the buffer, where, if first > 0, a TRUNCATED_TEXT line
+  comes before the first line kept."""
+  lines: typing.List[ typing.Tuple[ str, str ] ]
+  items: typing.Dict[ int, Expandable ]
+
+  def __init__( self, first = 0, limit = None ):
+    self.lines = []
+    self.items = {}
+    self.first = first
+    self.limit = limit
+    self.truncated = False
+    # The number of lines drawn, including those before first
+    self.count = 0
+    self._header = 1 if first > 0 else 0
+
+  def IsFull( self ):
+    """Check this before drawing each thing"""
+    if self.limit is not None and self.count >= self.first + self.limit:
+      self.truncated = True
+    return self.truncated
+
+  def IsSkipping( self ):
+    """True if the next line is before first, so it can be counted with Skip
+    rather than laid out"""
+    return self.count < self.first
+
+  def Skip( self, count = 1 ):
+    self.count += count
+
+  def Append( self, text, hl = None, item = None ):
+    line = self.count - self.first + self._header + 1
+    for t in text.split( '\n' ):
+      if self.count >= self.first:
+        self.lines.append( ( t, hl ) )
+      self.count += 1
+    if item is not None and line > self._header:
+      self.items[ line ] = item
+    # Return the first line number of the text, which is less than 1 (or the
+    # TRUNCATED_TEXT line) if it's before first
+    return line
+
+
+# Displayed before the first line and after the last line drawn in virtualised
+# mode, when there's more
+TRUNCATED_TEXT = '...'
+
+# Displayed instead of the value of a lazy variable, until it's expanded
+LAZY_TEXT = '(...)'
+
+
 class View:
   lines: typing.Dict[ int, Expandable ]
   draw: typing.Callable
@@ -244,9 +426,94 @@ class View:
     self.lines = lines
     self.draw = draw
     self.syntax = None
+    # The LineModel lines currently in the buffer
+    self.rendered = []
+    self.win = win
+    # In virtualised mode (see OnWindowScrolled), the index of the first line
+    # drawn. Those before it, and those more than _Limit() after it, aren't.
+    self.virtual = False
+    self.first = 0
+    self.truncated = False
     if win is not None:
       self.buf = win.buffer
       utils.SetUpUIWindow( win )
+      self.virtual = settings.Int( 'variables_render_ahead' ) > 0
+
+  def NewModel( self ):
+    if not self.virtual:
+      return LineModel()
+    return LineModel( self.first, self._Limit() )
+
+  def Render( self, model: LineModel ):
+    """Update the buffer to display model, changing only the lines which
+    differ from what's displayed"""
+    lines = model.lines
+    if model.first > 0:
+      lines = [ ( TRUNCATED_TEXT, 'Comment' ) ] + lines
+    if model.truncated:
+      lines = lines + [ ( TRUNCATED_TEXT, 'Comment' ) ]
+    utils.UpdateBufferLines( self.buf, self.rendered, lines )
+    self.rendered = lines
+    self.truncated = model.truncated
+    self.lines.clear()
+    self.lines.update( model.items )
+
+    if model.first > 0 and not model.lines:
+      # There are now fewer lines than first, e.g. after a stop, so show the
+      # last ones
+      self.first = max( 0, model.count - model.limit )
+      render.Schedule( self.draw )
+
+  def Clear( self ):
+    utils.ClearBuffer( self.buf )
+    self.rendered = []
+    self.first = 0
+    self.lines.clear()
+
+  def OnWindowScrolled( self ):
+    """In virtualised mode, only the lines from
+    g:vimspector_variables_render_ahead lines above the window to that many
+    below it are drawn, with a TRUNCATED_TEXT line in place of those before and
+    those after. When the window scrolls to within half that of either end,
+    move the lines drawn so that the window is in the middle of them again,
+    like the DisassemblyView does. So, however big the tree, a draw only stores
+    and writes that many lines."""
+    if not self.virtual or not self.win.valid:
+      return
+
+    win_id = utils.WindowID( self.win )
+    render_ahead = settings.Int( 'variables_render_ahead' )
+    header = 1 if self.first > 0 else 0
+
+    # line( 'w0' ) makes sure the topline is up to date
+    topline = int( utils.Call( 'line', 'w0', win_id ) )
+    top = self.first + topline - 1 - header
+    bottom = top + self.win.height
+
+    near_top = self.first > 0 and top - self.first < render_ahead // 2
+    near_bottom = ( self.truncated and
+                    self.first + self._Limit() - bottom < render_ahead // 2 )
+    if not near_top and not near_bottom:
+      return
+
+    first = max( 0, top - render_ahead )
+    if first == self.first:
+      return
+
+    # Keep the same lines in the window, and the cursor on the same line
+    shift = ( self.first - header ) - ( first - ( 1 if first > 0 else 0 ) )
+    cursor = self.win.cursor[ 0 ]
+    self.first = first
+    render.Now( self.draw )
+    utils.Call( 'win_execute',
+                win_id,
+                'call winrestview( {{ "topline": {}, "lnum": {} }} )'.format(
+                  max( 1, topline + shift ),
+                  max( 1, cursor + shift ) ) )
+
+  def _Limit( self ):
+    height = self.win.height if self.win.valid else 0
+    return height + 2 * settings.Int( 'variables_render_ahead' )
 
 
 class BufView( View ):
@@ -255,6 +522,15 @@ class BufView( View ):
     self.buf = buf
 
 
+def _LineCount( variable ):
+  """The number of lines VariablesView._DrawVariables draws for variable"""
+  if isinstance( variable, IndexRange ) or variable.IsLazy():
+    return 1
+  if settings.Get( 'variables_display_mode' ) == 'compact':
+    return 1
+  return variable.variable.get( 'value', '' ).count( '\n' ) + 1
+
+
 def AddExpandMappings( mappings = None ):
   if mappings is None:
     mappings = settings.Dict( 'mappings' )[ 'variables' ]
@@ -329,6 +605,18 @@ class VariablesView( object ):
           ( 'Dump', 'vimspector#ReadMemory()', )
         )
 
+    # In virtualised mode, draw more as the windows scroll. Expensive scopes
+    # are fetched when they're scrolled into view.
+    self._augroup = f'VimspectorVariables{ session_id }'
+    if int( vim.eval( "exists( '##WinScrolled' )" ) ):
+      vim.command( f'augroup { self._augroup }' )
+      vim.command( 'autocmd!' )
+      for win in ( variables_win, watches_win ):
+        vim.command( f'autocmd WinScrolled { utils.WindowID( win ) } '
+                     'call vimspector#internal#variables#OnWindowScrolled( '
+                     f'{ session_id } )' )
+      vim.command( 'augroup END' )
+
     # Set the (global!) balloon expr if supported
     self._oldoptions = {}
     if settings.Bool( 'enable_auto_hover' ):
@@ -356,8 +644,9 @@ class VariablesView( object ):
 
 
   def Clear( self ):
+    render.Cancel( self._DrawScopes )
     with utils.ModifiableScratchBuffer( self._vars.buf ):
-      utils.ClearBuffer( self._vars.buf )
+      self._vars.Clear()
     self.ClearTooltip()
 
 
@@ -374,10 +663,22 @@ class VariablesView( object ):
     for k, v in self._oldoptions.items():
       vim.options[ k ] = v
 
+    vim.command( f'silent! autocmd! { self._augroup }' )
+    vim.command( f'silent! augroup! { self._augroup }' )
+
+    render.Cancel( self._DrawScopes )
+    render.Cancel( self._DrawWatches )
     utils.CleanUpHiddenBuffer( self._vars.buf )
     utils.CleanUpHiddenBuffer( self._watch.buf )
     self.ClearTooltip()
 
+  def OnWindowScrolled( self, win_id ):
+    for view in ( self._vars, self._watch ):
+      if view.win.valid and utils.WindowID( view.win ) == win_id:
+        view.OnWindowScrolled()
+        if view is self._vars:
+          self._FetchVisibleScopes()
+
   def Save( self ):
     return {
       'watches': [
@@ -390,21 +691,19 @@ class VariablesView( object ):
       # It's not really possible to save the frameId, so we just supply None
       self._watches.append( Watch.New( None, None, expression, 'watch' ) )
 
-  def LoadScopes( self, connection, frame ):
+  @tracing.Traced
+  def LoadScopes( self, connection, frame, prefetch_frames = () ):
+    """Request and draw the scopes of frame. Once their requests are sent,
+    prefetch those of prefetch_frames (see PrefetchScopes)."""
     def scopes_consumer( message ):
       new_scopes = []
       expanded_some_scope = False
-      for scope_body in message[ 'body' ][ 'scopes' ]:
-        # Find it in the scopes list
-        found = False
-        for index, s in enumerate( self._scopes ):
-          if ( s.connection == connection and
-               s.scope[ 'name' ] == scope_body[ 'name' ] ):
-            found = True
-            scope = s
-            break
-
-        if not found:
+      for scope, scope_body in core_utils.MatchByKey(
+          ( s for s in self._scopes if s.connection == connection ),
+          message[ 'body' ][ 'scopes' ],
+          lambda s: s.scope[ 'name' ],
+          lambda b: b[ 'name' ] ):
+        if scope is None:
           scope = Scope( connection, scope_body )
         else:
           scope.Update( connection, scope_body )
@@ -421,42 +720,81 @@ class VariablesView( object ):
                Expandable.EXPANDED_BY_US ):
           scope.expanded = Expandable.COLLAPSED_BY_DEFAULT
 
-        if scope.IsExpanded():
-          connection.DoRequest( partial( self._ConsumeVariables,
-                                         self._DrawScopes,
-                                         scope ), {
-            'command': 'variables',
-            'arguments': {
-              'variablesReference': scope.VariablesReference(),
-            },
-          } )
+        if scope.IsExpanded() and scope.scope.get( 'expensive' ):
+          # e.g. registers or globals: wait until the user can see it
+          scope.deferred = True
+        elif scope.IsExpanded():
+          self._RequestChildren( self._DrawScopes, scope )
 
       self._scopes = new_scopes
-      self._DrawScopes()
+      render.Schedule( self._DrawScopes )
+
+      if prefetch_frames:
+        self.PrefetchScopes( connection, prefetch_frames )
 
     connection.DoRequest( scopes_consumer, {
       'command': 'scopes',
       'arguments': {
         'frameId': frame[ 'id' ]
       },
-    } )
+    }, priority = PRIORITY_UI )
+
+  @tracing.Traced
+  def PrefetchScopes( self, connection, frames ):
+    """Request the scopes of each of frames, and the variables in their
+    non-expensive scopes, so that when the user moves to one of those frames
+    they're answered from the connection's response cache. The requests are
+    sent at background priority, and at most variables_prefetch_budget are sent.
+    Any still queued when the debuggee resumes are dropped."""
+    budget = settings.Int( 'variables_prefetch_budget' )
+
+    def request( handler, msg ):
+      nonlocal budget
+      if budget <= 0:
+        return
+      budget -= 1
+      connection.DoRequest( handler,
+                            msg,
+                            failure_handler = lambda *_: None,
+                            priority = PRIORITY_BACKGROUND )
+
+    def scopes_consumer( message ):
+      for scope_body in message[ 'body' ][ 'scopes' ]:
+        scope = Scope( connection, scope_body )
+        if scope.scope.get( 'expensive' ) or not scope.IsExpandable():
+          continue
+        arguments = self._ChildrenArguments( scope )
+        if arguments is not None:
+          request( None, {
+            'command': 'variables',
+            'arguments': arguments,
+          } )
+
+    for frame in frames:
+      request( scopes_consumer, {
+        'command': 'scopes',
+        'arguments': {
+          'frameId': frame[ 'id' ]
+        },
+      } )
 
   def _DrawBalloonEval( self ):
     watch = self._variable_eval
     view = self._variable_eval_view
+    if view is None:
+      # The tooltip was closed
+      return
+
+    model = view.NewModel()
+    self._DrawWatchResult( model, 0, watch, is_short = True )
 
     with utils.RestoreCursorPosition():
       with utils.ModifiableScratchBuffer( view.buf ):
-        utils.ClearBuffer( view.buf )
+        view.Render( model )
         view.syntax = utils.SetSyntax( view.syntax,
                                        self._current_syntax,
                                        view.buf )
 
-        self._DrawWatchResult( view,
-                               0,
-                               watch,
-                               is_short = True )
-
         vim.eval( "vimspector#internal#balloon#ResizeTooltip()" )
 
   def ClearTooltip( self ):
@@ -466,6 +804,7 @@ class VariablesView( object ):
 
   def CleanUpTooltip( self ) :
     # remove reference to old tooltip window
+    render.Cancel( self._DrawBalloonEval )
     self._variable_eval_view = None
     vim.vars[ 'vimspector_session_windows' ][ 'eval' ] = None
 
@@ -500,16 +839,10 @@ class VariablesView( object ):
         watch.result.expanded = Expandable.EXPANDED_BY_US
 
       if watch.result.IsExpanded():
-        connection.DoRequest( partial( self._ConsumeVariables,
-                                       self._variable_eval_view.draw,
-                                       watch.result ), {
-          'command': 'variables',
-          'arguments': {
-            'variablesReference': watch.result.VariablesReference(),
-          },
-        } )
+        self._RequestChildren( self._variable_eval_view.draw, watch.result )
 
-      self._DrawBalloonEval()
+      # The tooltip is already open, so fill it in now
+      render.Now( self._DrawBalloonEval )
 
     def failure_handler( reason, message ):
       display = [ reason ]
@@ -526,7 +859,7 @@ class VariablesView( object ):
     connection.DoRequest( handler, {
       'command': 'evaluate',
       'arguments': self._variable_eval.expression,
-    }, failure_handler )
+    }, failure_handler, priority = PRIORITY_UI )
 
     # Return working (meanwhile)
     return ''
@@ -563,11 +896,12 @@ class VariablesView( object ):
     if best_index >= 0:
       del self._watches[ best_index ]
       utils.UserMessage( 'Deleted' )
-      self._DrawWatches()
+      render.Now( self._DrawWatches )
       return
 
     utils.UserMessage( 'No watch found' )
 
+  @tracing.Traced
   def EvaluateWatches( self,
                        fallback_connection: DebugAdapterConnection,
                        current_frame: dict ):
@@ -581,7 +915,8 @@ class VariablesView( object ):
           'arguments': watch.expression,
         },
         failure_handler = lambda reason, msg, watch=watch:
-            self._WatchExpressionFailed( reason, watch ) )
+            self._WatchExpressionFailed( reason, watch ),
+        priority = PRIORITY_VISIBLE )
 
   def _UpdateWatchExpression( self, watch: Watch, message: dict ):
     if watch.result is not None:
@@ -593,16 +928,11 @@ class VariablesView( object ):
 
     if ( watch.result.IsExpandable() and
          watch.result.IsExpanded() ):
-      watch.connection.DoRequest( partial( self._ConsumeVariables,
-                                           self._watch.draw,
-                                           watch.result ), {
-        'command': 'variables',
-        'arguments': {
-          'variablesReference': watch.result.VariablesReference(),
-        },
-      } )
+      self._RequestChildren( self._watch.draw,
+                             watch.result,
+                             priority = PRIORITY_VISIBLE )
 
-    self._DrawWatches()
+    render.Schedule( self._DrawWatches )
 
   def _WatchExpressionFailed( self, reason: str, watch: Watch ):
     if watch.result is not None:
@@ -610,7 +940,7 @@ class VariablesView( object ):
       return
 
     watch.result = WatchFailure( watch.connection, watch, reason )
-    self._DrawWatches()
+    render.Schedule( self._DrawWatches )
 
   def _GetVariable( self, buf = None, line_num = None ):
     none = ( None, None )
@@ -641,24 +971,45 @@ class VariablesView( object ):
     if variable is None:
       return
 
+    if variable.IsLazy():
+      self._ResolveLazyVariable( variable, view )
+      return
+
     if variable.IsExpanded():
       # Collapse
       variable.expanded = Expandable.COLLAPSED_BY_USER
-      view.draw()
+      render.Now( view.draw )
       return
 
     if not variable.IsExpandable():
       return
 
     variable.expanded = Expandable.EXPANDED_BY_USER
-    variable.connection.DoRequest( partial( self._ConsumeVariables,
-                                            view.draw,
-                                            variable ), {
+    self._RequestChildren( view.draw, variable )
+
+  def _ResolveLazyVariable( self, variable: 'Variable', view: View ):
+    def handler( message ):
+      children = message[ 'body' ][ 'variables' ]
+      if len( children ) != 1:
+        # Not what the protocol says, so just show them as children
+        variable.expanded = Expandable.EXPANDED_BY_USER
+        variable.variable[ 'presentationHint' ] = dict(
+          variable.variable[ 'presentationHint' ],
+          lazy = False )
+        self._UpdateChildren( view.draw, variable, children )
+        return
+
+      variable.Resolve( children[ 0 ] )
+      if variable.IsExpandable() and variable.IsExpanded():
+        self._RequestChildren( view.draw, variable )
+      render.Schedule( view.draw )
+
+    variable.connection.DoRequest( handler, {
       'command': 'variables',
       'arguments': {
         'variablesReference': variable.VariablesReference()
       },
-    } )
+    }, priority = PRIORITY_UI )
 
   def SetVariableValue( self, new_value = None, buf = None, line_num = None ):
     variable: Variable
@@ -692,17 +1043,10 @@ class VariablesView( object ):
 
       # If the variable is expanded, re-request its children
       if variable.IsExpanded():
-        variable.connection.DoRequest( partial( self._ConsumeVariables,
-                                                view.draw,
-                                                variable ), {
-          'command': 'variables',
-          'arguments': {
-            'variablesReference': variable.VariablesReference()
-          },
-        } )
+        self._RequestChildren( view.draw, variable )
 
       variable.Update( variable.connection, new_variable )
-      view.draw()
+      render.Schedule( view.draw )
 
     def failure_handler( reason, message ):
       utils.UserMessage( f'Cannot set value: { reason }', error = True )
@@ -726,18 +1070,43 @@ class VariablesView( object ):
     return variable.connection, variable.MemoryReference()
 
 
-  def _DrawVariables( self, view, variables, indent_len, is_short = False ):
+  def _DrawVariables( self, model, variables, indent_len, is_short = False ):
     assert indent_len > 0
     for variable in variables:
+      if model.IsFull():
+        return
+
+      if model.IsSkipping():
+        # It's not displayed, so just count its lines (see below)
+        model.Skip( _LineCount( variable ) )
+        if variable.ShouldDrawDrillDown():
+          self._DrawVariables( model,
+                               variable.variables,
+                               indent_len + 2,
+                               is_short )
+        continue
+
       text = ''
       # We borrow 1 space of indent to draw the change marker
       indent = ' ' * ( indent_len - 1 )
       marker = '*' if variable.changed else ' '
-      icon = '+' if ( variable.IsExpandable()
-                      and not variable.IsExpanded() ) else '-'
+      icon = '+' if ( variable.IsLazy() or
+                      ( variable.IsExpandable()
+                        and not variable.IsExpanded() ) ) else '-'
+
+      if isinstance( variable, IndexRange ):
+        model.Append( f'{indent} {icon} {variable.Name()}', item = variable )
+        if variable.ShouldDrawDrillDown():
+          self._DrawVariables( model,
+                               variable.variables,
+                               indent_len + 2,
+                               is_short )
+        continue
       name = variable.variable.get( 'name', '' )
       kind = variable.variable.get( 'type', '' )
       value = variable.variable.get( 'value', '<unknown>' )
+      if variable.IsLazy():
+        value = LAZY_TEXT
       hl = settings.Dict( 'presentation_hint_hl' ).get(
         variable.variable.get( 'presentationHint', {} ).get( 'kind',
                                                              'normal' ) )
@@ -747,10 +1116,9 @@ class VariablesView( object ):
       # where the expansion is done "internally", resolving to the multi-line
       # value
       if is_short:
-        value = variable.variable.get( 'value', '<unknown>' )
         text = f'{indent}{icon} {name}: {value}'
       elif settings.Get( 'variables_display_mode' ) == 'compact':
-        value = variable.variable.get( 'value', '<unknown>' ).splitlines()
+        value = value.splitlines()
         if len( value ) > 0:
           value = value[ 0 ]
         else:
@@ -762,67 +1130,85 @@ class VariablesView( object ):
       else:
         text = f'{indent}{marker}{icon} {name}: {value}'
 
-      line = utils.AppendToBuffer(
-        view.buf,
-        text.split( '\n' ),
-        hl = hl
-      )
-
-      view.lines[ line ] = variable
+      model.Append( text, hl = hl, item = variable )
 
       if variable.ShouldDrawDrillDown():
-        self._DrawVariables( view,
+        self._DrawVariables( model,
                              variable.variables,
                              indent_len + 2,
                              is_short )
 
+  @tracing.Traced
   def _DrawScopes( self ):
-    # FIXME: The drawing is dumb and draws from scratch every time. This is
-    # simple and works and makes sure the line-map is always correct.
-    # However it is pretty inefficient.
-    self._vars.lines.clear()
+    # The whole tree is laid out every time (or, in virtualised mode, the part
+    # of it around the window), which is simple and makes sure the line-map is
+    # always correct, but only the lines which changed are updated in the
+    # buffer.
+    model = self._vars.NewModel()
+    for scope in self._scopes:
+      self._DrawScope( model, 0, scope )
+
     with utils.RestoreCursorPosition():
       with utils.ModifiableScratchBuffer( self._vars.buf ):
-        utils.ClearBuffer( self._vars.buf )
-        for scope in self._scopes:
-          self._DrawScope( 0, scope )
+        self._vars.Render( model )
+
+    self._FetchVisibleScopes()
+
+  def _FetchVisibleScopes( self ):
+    """Request the variables of the deferred (expensive) scopes which are
+    displayed in the variables window"""
+    if not any( scope.deferred and scope.IsExpanded()
+                for scope in self._scopes ):
+      return
+    if not self._vars.win.valid:
+      return
+
+    win_id = utils.WindowID( self._vars.win )
+    top = int( utils.Call( 'line', 'w0', win_id ) )
+    bottom = int( utils.Call( 'line', 'w$', win_id ) )
+    for line in range( top, bottom + 1 ):
+      item = self._vars.lines.get( line )
+      if isinstance( item, Scope ) and item.deferred and item.IsExpanded():
+        self._RequestChildren( self._DrawScopes, item )
 
+  @tracing.Traced
   def _DrawWatches( self ):
-    # FIXME: The drawing is dumb and draws from scratch every time. This is
-    # simple and works and makes sure the line-map is always correct.
-    # However it is pretty inefficient.
-    self._watch.lines.clear()
+    # See _DrawScopes
+    model = self._watch.NewModel()
+    model.Append( 'Watches: ----', hl = 'Title' )
+    for watch in self._watches:
+      if model.IsFull():
+        watch.line = None
+        continue
+      watch.line = model.Append( 'Expression: '
+                                 + watch.expression[ 'expression' ],
+                                 hl = 'Title' )
+      self._DrawWatchResult( model, 2, watch )
+
     with utils.RestoreCursorPosition():
       with utils.ModifiableScratchBuffer( self._watch.buf ):
-        utils.ClearBuffer( self._watch.buf )
-        utils.AppendToBuffer( self._watch.buf, 'Watches: ----', hl = 'Title' )
-        for watch in self._watches:
-          line = utils.AppendToBuffer( self._watch.buf,
-                                       'Expression: '
-                                       + watch.expression[ 'expression' ],
-                                       hl = 'Title' )
-          watch.line = line
-          self._DrawWatchResult( self._watch, 2, watch )
-
-  def _DrawScope( self, indent, scope ):
+        self._watch.Render( model )
+
+  def _DrawScope( self, model, indent, scope ):
+    if model.IsFull():
+      return
+
     icon = '+' if scope.IsExpandable() and not scope.IsExpanded() else '-'
 
     hl = settings.Dict( 'presentation_hint_hl' ).get(
       scope.scope.get( 'presentationHint', 'normal' ) )
-    line = utils.AppendToBuffer( self._vars.buf,
-                                 '{0}{1} Scope: {2}'.format(
-                                   ' ' * indent,
-                                   icon,
-                                   scope.scope[ 'name' ] ),
-                                 hl = hl )
-    self._vars.lines[ line ] = scope
+    model.Append( '{0}{1} Scope: {2}'.format( ' ' * indent,
+                                              icon,
+                                              scope.scope[ 'name' ] ),
+                  hl = hl,
+                  item = scope )
 
     if scope.ShouldDrawDrillDown():
       indent += 2
-      self._DrawVariables( self._vars, scope.variables, indent )
+      self._DrawVariables( model, scope.variables, indent )
 
-  def _DrawWatchResult( self, view, indent_len, watch, is_short = False ):
-    if not watch.result:
+  def _DrawWatchResult( self, model, indent_len, watch, is_short = False ):
+    if not watch.result or model.IsFull():
       return
 
     assert is_short or indent_len > 0
@@ -851,48 +1237,132 @@ class VariablesView( object ):
 
     line = f'{indent}{marker}{icon}{leader}{value}'
 
-    line = utils.AppendToBuffer( view.buf, line.split( '\n' ) )
-    view.lines[ line ] = watch.result
+    model.Append( line, item = watch.result )
 
     if watch.result.ShouldDrawDrillDown():
-      self._DrawVariables( view,
+      self._DrawVariables( model,
                            watch.result.variables,
                            indent_len + 2,
                            is_short )
 
-  def _ConsumeVariables( self, draw, parent, message ):
+  def _RequestChildren( self, draw, parent, priority = PRIORITY_UI ):
+    """Request the children of parent, then draw. If parent has more indexed
+    children than the page size, they're split into IndexRanges, which are
+    requested (using the variables request's filter, start and count) when
+    they're expanded."""
+    if isinstance( parent, Scope ):
+      parent.deferred = False
+
+    arguments = self._ChildrenArguments( parent )
+    if arguments is None:
+      # Its children are smaller ranges, so there's nothing to request
+      self._UpdateChildren( draw, parent, [], priority )
+      return
+
+    parent.connection.DoRequest( partial( self._ConsumeVariables,
+                                          draw,
+                                          parent,
+                                          priority = priority ), {
+      'command': 'variables',
+      'arguments': arguments,
+    }, priority = priority )
+
+  def _ChildrenArguments( self, parent ):
+    """The arguments of the variables request for the children of parent, or
+    None if there's nothing to request"""
+    page_size = settings.Int( 'variables_page_size' )
+    arguments = {
+      'variablesReference': parent.VariablesReference()
+    }
+
+    if isinstance( parent, IndexRange ):
+      if parent.count > page_size > 0:
+        return None
+
+      arguments.update( {
+        'filter': 'indexed',
+        'start': parent.start,
+        'count': parent.count,
+      } )
+    elif parent.IndexedVariables() > page_size > 0:
+      # Just the named children; the indexed ones are in ranges
+      arguments[ 'filter' ] = 'named'
+
+    return arguments
+
+  def _IndexRanges( self, parent ):
+    """The IndexRanges to display after the named children of parent, if it
+    has too many indexed children to request at once, keeping the existing
+    ranges (and so their state)"""
+    page_size = settings.Int( 'variables_page_size' )
+    if isinstance( parent, IndexRange ):
+      start = parent.start
+    else:
+      start = 0
+    count = parent.IndexedVariables()
+    if page_size <= 0 or count <= page_size:
+      return []
+
+    # Like VS Code, a range contains at most page_size ranges, so there are
+    # at most page_size children at each level
+    range_size = page_size
+    while count > range_size * page_size:
+      range_size *= page_size
+
+    existing = {
+      v.Name(): v for v in parent.variables or []
+      if isinstance( v, IndexRange )
+    }
+    ranges = []
+    for range_start in range( start, start + count, range_size ):
+      index_range = IndexRange( parent.connection,
+                                parent,
+                                range_start,
+                                min( range_size, start + count - range_start ) )
+      index_range = existing.get( index_range.Name(), index_range )
+      index_range.Update( parent.connection )
+      ranges.append( index_range )
+
+    return ranges
+
+  def _ConsumeVariables( self,
+                         draw,
+                         parent,
+                         message,
+                         priority = PRIORITY_UI ):
+    self._UpdateChildren( draw,
+                          parent,
+                          message[ 'body' ][ 'variables' ],
+                          priority )
+
+  def _UpdateChildren( self,
+                       draw,
+                       parent,
+                       variable_bodies,
+                       priority = PRIORITY_UI ):
     new_variables = []
-    for variable_body in message[ 'body' ][ 'variables' ]:
-      if parent.variables is None:
-        parent.variables = []
-
-      # Find the variable in parent
-      found = False
-      for index, v in enumerate( parent.variables ):
-        if v.variable[ 'name' ] == variable_body[ 'name' ]:
-          variable = v
-          found = True
-          break
-      if not found:
+    for variable, variable_body in core_utils.MatchByKey(
+        ( v for v in parent.variables or [] if isinstance( v, Variable ) ),
+        variable_bodies,
+        lambda v: v.variable[ 'name' ],
+        lambda b: b[ 'name' ] ):
+      if variable is None:
         variable = Variable( parent.connection, parent, variable_body )
       else:
         variable.Update( parent.connection, variable_body )
 
       new_variables.append( variable )
 
-      if variable.IsExpandable() and variable.IsExpanded():
-        variable.connection.DoRequest( partial( self._ConsumeVariables,
-                                                draw,
-                                                variable ), {
-          'command': 'variables',
-          'arguments': {
-            'variablesReference': variable.VariablesReference()
-          },
-        } )
-
+    new_variables.extend( self._IndexRanges( parent ) )
     parent.variables = new_variables
 
-    draw()
+    for variable in new_variables:
+      # Lazy variables stay expanded, but aren't fetched until they're resolved
+      if ( variable.IsExpandable() and variable.IsExpanded()
+           and not variable.IsLazy() ):
+        self._RequestChildren( draw, variable, priority = priority )
+
+    render.Schedule( draw )
 
   def SetSyntax( self, syntax ):
     # TODO: Switch to View.syntax
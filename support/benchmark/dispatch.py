@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Micro-benchmark for DAP message dispatch.
+
+Compares the per-message cost of the dispatch table against the previous
+approach of calling dir() on each handler for every message. The handlers mimic
+a custom handler followed by DebugSession, which has a couple of hundred
+attributes.
+
+Usage: support/benchmark/dispatch.py [--messages N]"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert( 0, os.path.join( os.path.dirname( __file__ ),
+                                  '..',
+                                  '..',
+                                  'python3' ) )
+
+from vimspector import dispatch  # noqa: E402
+
+
+EVENTS = [ 'output', 'stopped', 'continued', 'thread', 'module', 'unknown' ]
+
+
+def _MakeHandlerClass( name, events, padding ):
+  def Handler( self, message ):
+    return False
+
+  attrs = { 'OnEvent_' + e: Handler for e in events }
+  attrs.update( { '_Method{}'.format( i ): Handler for i in range( padding ) } )
+  return type( name, ( object, ), attrs )
+
+
+def LegacyDispatch( handlers, message ):
+  method = 'OnEvent_' + message[ 'event' ]
+  for h in handlers:
+    if method in dir( h ):
+      if getattr( h, method )( message ):
+        break
+
+
+def Time( func, messages ):
+  start = time.perf_counter()
+  for message in messages:
+    func( message )
+  return time.perf_counter() - start
+
+
+def Main():
+  parser = argparse.ArgumentParser( description = __doc__.splitlines()[ 0 ] )
+  parser.add_argument( '--messages', type = int, default = 100000 )
+  args = parser.parse_args()
+
+  CustomHandler = _MakeHandlerClass( 'CustomHandler', [ 'output' ], 5 )
+  Session = _MakeHandlerClass( 'Session', EVENTS[ : -1 ], 200 )
+  handlers = [ CustomHandler(), Session() ]
+
+  messages = [ { 'type': 'event', 'event': EVENTS[ i % len( EVENTS ) ] }
+               for i in range( args.messages ) ]
+
+  table = dispatch.DispatchTable( handlers )
+
+  legacy = Time( lambda m: LegacyDispatch( handlers, m ), messages )
+  new = Time( lambda m: table.Dispatch( 'OnEvent_' + m[ 'event' ], m ),
+              messages )
+
+  print( '{} messages'.format( args.messages ) )
+  print( 'dir() per message: {:8.3f} us/msg'.format(
+    legacy * 1e6 / args.messages ) )
+  print( 'dispatch table:    {:8.3f} us/msg'.format(
+    new * 1e6 / args.messages ) )
+
+
+if __name__ == '__main__':
+  Main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Micro-benchmark for the DAP frame decoder.
+
+Feeds bursts of 'output' events (as emitted by chatty adapters such as
+vscode-cpptools) through the decoder in channel-sized chunks and reports the
+throughput. Throughput should be roughly constant as the burst size grows; the
+previous bytes-splitting implementation is included for comparison and degrades
+quadratically.
+
+Usage: support/benchmark/framing.py [--chunk BYTES] [--no-legacy]"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert( 0, os.path.join( os.path.dirname( __file__ ),
+                                  '..',
+                                  '..',
+                                  'python3' ) )
+
+from vimspector import framing  # noqa: E402
+
+
+class LegacyDecoder( object ):
+  """The decoder DebugAdapterConnection.OnData used to implement"""
+
+  def __init__( self ):
+    self._buffer = bytes()
+    self._headers = None
+
+  def Feed( self, data ):
+    self._buffer += data
+    payloads = []
+    while True:
+      if self._headers is None:
+        parts = self._buffer.split( b'\r\n\r\n', 1 )
+        if len( parts ) < 2:
+          break
+        self._headers = {}
+        for line in parts[ 0 ].split( b'\r\n' ):
+          key, value = str( line, 'utf-8' ).split( ':', 1 )
+          self._headers[ key ] = value
+        self._buffer = parts[ 1 ]
+
+      length = int( self._headers[ 'Content-Length' ] )
+      if len( self._buffer ) < length:
+        break
+      payloads.append( self._buffer[ : length ] )
+      self._buffer = self._buffer[ length : ]
+      self._headers = None
+    return payloads
+
+
+def MakeBurst( size ):
+  data = bytearray()
+  seq = 0
+  while len( data ) < size:
+    seq += 1
+    data += framing.Encode( {
+      'seq': seq,
+      'type': 'event',
+      'event': 'output',
+      'body': {
+        'category': 'stdout',
+        'output': 'Loaded module {0} with symbols\n'.format( seq ),
+      }
+    } ).encode( 'utf-8' )
+  return bytes( data ), seq
+
+
+def Run( decoder, data, chunk ):
+  count = 0
+  start = time.perf_counter()
+  for offset in range( 0, len( data ), chunk ):
+    count += len( decoder.Feed( data[ offset : offset + chunk ] ) )
+  return count, time.perf_counter() - start
+
+
+def Main():
+  parser = argparse.ArgumentParser( description = __doc__.splitlines()[ 0 ] )
+  parser.add_argument( '--chunk',
+                       type = int,
+                       default = 256 * 1024,
+                       help = 'Bytes delivered per OnData call' )
+  parser.add_argument( '--no-legacy',
+                       action = 'store_true',
+                       help = 'Skip the legacy decoder' )
+  args = parser.parse_args()
+
+  print( '{:>8} {:>8} {:>14} {:>14}'.format( 'MiB',
+                                             'msgs',
+                                             'new (MiB/s)',
+                                             'legacy (MiB/s)' ) )
+  for mib in ( 1, 2, 4, 8, 16 ):
+    data, expected = MakeBurst( mib * 1024 * 1024 )
+    count, elapsed = Run( framing.MessageDecoder(), data, args.chunk )
+    assert count == expected
+    new = '{:.1f}'.format( mib / elapsed )
+
+    legacy = '-'
+    if not args.no_legacy:
+      count, elapsed = Run( LegacyDecoder(), data, args.chunk )
+      assert count == expected
+      legacy = '{:.1f}'.format( mib / elapsed )
+
+    print( '{:>8} {:>8} {:>14} {:>14}'.format( mib, expected, new, legacy ) )
+
+
+if __name__ == '__main__':
+  Main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Micro-benchmark for matching refreshed variables to the existing ones.
+
+When the variables view is refreshed (e.g. after a step), each variable in the
+'variables' response is matched by name to the existing Variable, so that its
+expanded state is kept. This compares core_utils.MatchByKey with the previous
+approach of a linear scan of the existing variables for each new one.
+
+The linear scan is quadratic, so by default it's skipped for more than 10,000
+children.
+
+Usage: support/benchmark/match_children.py [--sizes N ...] [--legacy-limit N]"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert( 0, os.path.join( os.path.dirname( __file__ ),
+                                  '..',
+                                  '..',
+                                  'python3' ) )
+
+from vimspector import core_utils  # noqa: E402
+
+
+class Variable( object ):
+  def __init__( self, variable ):
+    self.variable = variable
+
+
+def LegacyMatch( existing, bodies ):
+  matches = []
+  for body in bodies:
+    found = None
+    for v in existing:
+      if v.variable[ 'name' ] == body[ 'name' ]:
+        found = v
+        break
+    matches.append( ( found, body ) )
+  return matches
+
+
+def NewMatch( existing, bodies ):
+  return core_utils.MatchByKey( existing,
+                                bodies,
+                                lambda v: v.variable[ 'name' ],
+                                lambda b: b[ 'name' ] )
+
+
+def Time( func, existing, bodies ):
+  start = time.perf_counter()
+  func( existing, bodies )
+  return time.perf_counter() - start
+
+
+def Main():
+  parser = argparse.ArgumentParser( description = __doc__.splitlines()[ 0 ] )
+  parser.add_argument( '--sizes',
+                       type = int,
+                       nargs = '+',
+                       default = [ 1000, 10000, 100000 ] )
+  parser.add_argument( '--legacy-limit', type = int, default = 10000 )
+  args = parser.parse_args()
+
+  print( '{:>10} {:>14} {:>14}'.format( 'children', 'linear scan', 'index' ) )
+  for size in args.sizes:
+    bodies = [ { 'name': f'member_{ i }', 'value': str( i ) }
+               for i in range( size ) ]
+    existing = [ Variable( dict( body ) ) for body in bodies ]
+
+    if size <= args.legacy_limit:
+      legacy = '{:11.3f} ms'.format(
+        Time( LegacyMatch, existing, bodies ) * 1000 )
+    else:
+      legacy = 'skipped'
+
+    new = Time( NewMatch, existing, bodies ) * 1000
+    print( '{:>10} {:>14} {:11.3f} ms'.format( size, legacy, new ) )
+
+
+if __name__ == '__main__':
+  Main()
@@ -0,0 +1,105 @@
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Memory benchmark for the variables tree.
+
+Builds a tree of PARENTS * CHILDREN variables from synthetic 'variables'
+responses, once with a copy of the old Variable (an ordinary class keeping the
+whole DAP Variable dict) and once with variables.Variable, and reports the
+memory used per node, measured with tracemalloc.
+
+variables.py needs vim, so run this in Vim, from the root of the repository:
+
+  vim --clean -c 'py3file support/benchmark/variables_memory.py'
+
+The results are printed as messages (see :messages)."""
+
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert( 0, os.path.abspath( 'python3' ) )
+
+from vimspector import variables  # noqa: E402
+
+PARENTS = 1000
+CHILDREN = 1000
+
+
+class LegacyVariable( object ):
+  """The old Variable: a __dict__, and the whole DAP Variable"""
+  def __init__( self, connection, container, variable ):
+    self.variables = None
+    self.container = container
+    self.connection = connection
+    self.expanded = None
+    self.variable = variable
+    self.changed = True
+
+
+def Response( parent ):
+  """A 'variables' response, as sent by the debug adapter"""
+  return json.dumps( {
+    'variables': [ {
+      'name': f'member_{ i }',
+      'value': str( parent * CHILDREN + i ),
+      'type': 'int',
+      'evaluateName': f'parent_{ parent }.member_{ i }',
+      'variablesReference': 0,
+    } for i in range( CHILDREN ) ]
+  } )
+
+
+def Build( cls ):
+  scope = variables.Scope( None, { 'name': 'Locals',
+                                   'variablesReference': 1 } )
+  scope.variables = []
+  for parent in range( PARENTS ):
+    node = cls( None, scope, {
+      'name': f'parent_{ parent }',
+      'value': '{...}',
+      'type': 'Struct',
+      'variablesReference': parent + 2,
+    } )
+    body = json.loads( Response( parent ) )
+    node.variables = [ cls( None, node, v ) for v in body[ 'variables' ] ]
+    scope.variables.append( node )
+  return scope
+
+
+def Measure( cls ):
+  gc.collect()
+  tracemalloc.start()
+  tree = Build( cls )
+  gc.collect()
+  size = tracemalloc.get_traced_memory()[ 0 ]
+  tracemalloc.stop()
+  del tree
+  return size
+
+
+def Main():
+  nodes = PARENTS * ( CHILDREN + 1 )
+  print( f'{ nodes } nodes' )
+  for name, cls in ( ( 'before', LegacyVariable ),
+                     ( 'after', variables.Variable ) ):
+    size = Measure( cls )
+    print( f'{name:>6}: {size / nodes:6.1f} bytes/node, '
+           f'{size / 2**20:7.1f} MiB' )
+
+
+Main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A stand-in debug adapter which replays a recorded transcript.
+
+Record a transcript by setting g:vimspector_transcript_dir, then configure
+an adapter such as:
+
+  "adapters": {
+    "replay": {
+      "command": [ "python3",
+                   "/path/to/vimspector/support/replay/replay_adapter.py",
+                   "--speed", "1",
+                   "/path/to/vimspector-<date>-<session>.jsonl" ]
+    }
+  }
+
+and start a debug session with the same configuration as when it was recorded
+(but that adapter). The adapter talks DAP on stdin/stdout.
+
+Messages the real adapter sent are replayed in the recorded order. Responses
+are only sent once vimspector has made the matching request; requests are
+matched by command and arguments (or just the command if the arguments differ),
+and the response's request_seq is rewritten. Messages are delayed by the
+recorded gaps divided by --speed; --speed 0 replays as fast as possible.
+
+vimspector may not make every recorded request, e.g. because the response is
+in its cache or it's waiting for an identical one. Once it has made a request
+which was recorded after the one a response is waiting for, the response is
+put aside and the rest of the transcript carries on; it's sent if the request
+is made after all. Otherwise, the transcript waits up to --skip-after seconds
+for the request.
+
+Requests which don't match anything in the transcript get an empty successful
+response. The adapter exits after responding to 'disconnect'."""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert( 0, os.path.join( os.path.dirname( __file__ ),
+                                  '..',
+                                  '..',
+                                  'python3' ) )
+
+from vimspector import framing, transcript  # noqa: E402
+
+
+def _Log( *args ):
+  print( 'replay:', *args, file = sys.stderr, flush = True )
+
+
+def _Canonical( arguments ):
+  return json.dumps( arguments, sort_keys = True )
+
+
+class Replay( object ):
+  def __init__( self, entries, speed, skip_after ):
+    self._speed = speed
+    self._skip_after = skip_after
+    self._lock = threading.Condition()
+    self._seq = 0
+    self._done = False
+
+    # Recorded requests from vimspector which haven't yet been matched with a
+    # live request: list of ( recorded seq, command, canonical arguments )
+    self._unmatched = []
+    # recorded request seq -> ( live seq, time the live request arrived )
+    self._matched = {}
+    # recorded request seq -> time (ms) it was recorded
+    self._request_time = {}
+    # The highest recorded request seq which has been matched
+    self._latest_matched = None
+    # recorded request seq -> response put aside because vimspector made later
+    # requests without making that one (see Run)
+    self._deferred = {}
+    # Live requests which matched nothing in the transcript
+    self._unexpected = []
+    # Deferred responses whose requests have now been made
+    self._ready = []
+
+    # The messages to send, in order: ( time, message )
+    self._outgoing = []
+
+    for t, direction, message in entries:
+      if direction == transcript.SENT:
+        if message.get( 'type' ) == 'request':
+          self._unmatched.append( ( message[ 'seq' ],
+                                    message[ 'command' ],
+                                    _Canonical( message.get( 'arguments' ) ) ) )
+          self._request_time[ message[ 'seq' ] ] = t
+      else:
+        self._outgoing.append( ( t, message ) )
+
+
+  def OnRequest( self, message ):
+    with self._lock:
+      recorded_seq = self._Match( message )
+      if recorded_seq is None:
+        _Log( 'Unexpected request', message[ 'command' ] )
+        self._unexpected.append( message )
+      else:
+        self._matched[ recorded_seq ] = ( message[ 'seq' ], time.monotonic() )
+        if self._latest_matched is None or recorded_seq > self._latest_matched:
+          self._latest_matched = recorded_seq
+        if recorded_seq in self._deferred:
+          self._ready.append( self._deferred.pop( recorded_seq ) )
+      self._lock.notify_all()
+
+
+  def OnClosed( self ):
+    with self._lock:
+      self._done = True
+      self._lock.notify_all()
+
+
+  def Run( self, write ):
+    previous_recorded = None
+    previous_sent = time.monotonic()
+
+    for t, message in self._outgoing:
+      waiting_since = time.monotonic()
+      skip = False
+      with self._lock:
+        while True:
+          self._AnswerOutOfOrder( write )
+          if self._done:
+            return
+
+          ready_at = self._ReadyAt( t,
+                                    message,
+                                    previous_recorded,
+                                    previous_sent )
+          if ready_at is None:
+            # Waiting for vimspector to make the request
+            if self._Overtaken( message[ 'request_seq' ] ):
+              # It made later requests instead, so it's probably not going to
+              # make this one. Don't hold up the rest of the transcript.
+              self._deferred[ message[ 'request_seq' ] ] = message
+              skip = True
+              break
+            give_up = waiting_since + self._skip_after - time.monotonic()
+            if give_up <= 0:
+              _Log( 'Request never made; skipping response to',
+                    message.get( 'command' ) )
+              self._deferred[ message[ 'request_seq' ] ] = message
+              skip = True
+              break
+            self._lock.wait( give_up )
+            continue
+
+          delay = ready_at - time.monotonic()
+          if delay <= 0:
+            break
+          self._lock.wait( delay )
+
+      if skip:
+        continue
+
+      self._SendRecorded( write, message )
+
+      previous_recorded = t
+      previous_sent = time.monotonic()
+
+      if message.get( 'command' ) == 'disconnect':
+        return
+
+    # Transcript exhausted; keep answering until disconnected
+    with self._lock:
+      while not self._done:
+        self._AnswerOutOfOrder( write )
+        self._lock.wait()
+
+
+  def _Match( self, message ):
+    arguments = _Canonical( message.get( 'arguments' ) )
+    for exact in ( True, False ):
+      for index, ( seq, command, recorded_arguments ) in enumerate(
+          self._unmatched ):
+        if command == message[ 'command' ] and (
+            not exact or arguments == recorded_arguments ):
+          del self._unmatched[ index ]
+          return seq
+    return None
+
+
+  def _Overtaken( self, request_seq ):
+    return ( self._latest_matched is not None and
+             self._latest_matched > request_seq )
+
+
+  def _ReadyAt( self, t, message, previous_recorded, previous_sent ):
+    """When message can be sent, or None if it's waiting for a request"""
+    ready_at = previous_sent
+    if previous_recorded is not None:
+      ready_at += self._Scale( t - previous_recorded )
+
+    if message.get( 'type' ) == 'response':
+      request_seq = message[ 'request_seq' ]
+      if request_seq not in self._matched:
+        return None
+      arrived = self._matched[ request_seq ][ 1 ]
+      ready_at = max( ready_at,
+                      arrived + self._Scale( t - self._request_time.get(
+                        request_seq,
+                        t ) ) )
+
+    return ready_at
+
+
+  def _Scale( self, ms ):
+    if not self._speed:
+      return 0
+    return max( ms, 0 ) / 1000 / self._speed
+
+
+  def _AnswerOutOfOrder( self, write ):
+    """Send the deferred responses whose requests have now been made, and
+    answer the requests which aren't in the transcript"""
+    while self._ready:
+      message = self._ready.pop( 0 )
+      self._SendRecorded( write, message )
+      if message.get( 'command' ) == 'disconnect':
+        self._done = True
+
+    while self._unexpected:
+      request = self._unexpected.pop( 0 )
+      self._Send( write, {
+        'type': 'response',
+        'request_seq': request[ 'seq' ],
+        'command': request[ 'command' ],
+        'success': True,
+        'body': {},
+      } )
+      if request[ 'command' ] == 'disconnect':
+        self._done = True
+
+
+  def _SendRecorded( self, write, message ):
+    message = dict( message )
+    if message.get( 'type' ) == 'response':
+      live_seq, _ = self._matched[ message[ 'request_seq' ] ]
+      message[ 'request_seq' ] = live_seq
+    self._Send( write, message )
+
+
+  def _Send( self, write, message ):
+    self._seq += 1
+    message[ 'seq' ] = self._seq
+    write( framing.Encode( message ).encode( 'utf-8' ) )
+
+
+def Main():
+  parser = argparse.ArgumentParser(
+    description = 'Replay a vimspector DAP transcript' )
+  parser.add_argument( '--speed',
+                       type = float,
+                       default = 1.0,
+                       help = 'Timing multiplier. 0 means no delays' )
+  parser.add_argument( '--skip-after',
+                       type = float,
+                       default = 5.0,
+                       help = 'Seconds to wait for vimspector to make a '
+                              'recorded request before skipping its '
+                              'response' )
+  parser.add_argument( 'transcript' )
+  args = parser.parse_args()
+
+  replay = Replay( transcript.Load( args.transcript ),
+                   args.speed,
+                   args.skip_after )
+
+  stdin = sys.stdin.buffer
+  stdout = sys.stdout.buffer
+
+  def write( data ):
+    stdout.write( data )
+    stdout.flush()
+
+  def read():
+    decoder = framing.MessageDecoder()
+    while True:
+      data = stdin.read1( 65536 )
+      if not data:
+        break
+      for message in decoder.FeedMessages( data ):
+        if message.get( 'type' ) == 'request':
+          replay.OnRequest( message )
+    replay.OnClosed()
+
+  reader = threading.Thread( target = read, daemon = True )
+  reader.start()
+  replay.Run( write )
+
+  # The reader is probably still blocked reading stdin, which upsets interpreter
+  # shutdown, so just leave.
+  os._exit( 0 )
+
+
+if __name__ == '__main__':
+  Main()
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A mock debug adapter which generates arbitrarily large threads, stacks,
+variables and output, for testing how vimspector copes at scale.
+
+It talks DAP on stdin/stdout. There's no real debuggee; the "program" is
+always stopped, and stepping/continuing just stops again immediately. The
+shape of the data is controlled by the launch configuration:
+
+  threads          - number of threads (default 1)
+  frames           - number of stack frames in each thread (default 10)
+  variables        - number of scalar variables in the Locals scope
+                     (default 10)
+  arrayLength      - number of elements in the 'array' local; 0 for none
+                     (default 0)
+  depth            - depth of the 'nested' local; 0 for none (default 0)
+  lazy             - if true, add a 'lazy' local whose value is only fetched
+                     when it's expanded, like a property getter (default false)
+  outputLines      - number of lines of output to send before stopping
+                     (default 0)
+  outputLineLength - length of each line of output (default 80)
+  program          - the file that the stack frames refer to
+
+Setting a variable changes its value and, if the client supports it, sends an
+invalidated event, as some adapters do.
+
+See .vimspector.json alongside this file for examples."""
+
+import json
+import os
+import sys
+
+sys.path.insert( 0, os.path.join( os.path.dirname( __file__ ),
+                                  '..',
+                                  '..',
+                                  '..',
+                                  'python3' ) )
+
+from vimspector import framing  # noqa: E402
+
+OUTPUT_LINES_PER_EVENT = 1000
+SOURCE_LINES = 50
+
+DEFAULTS = {
+  'threads': 1,
+  'frames': 10,
+  'variables': 10,
+  'arrayLength': 0,
+  'depth': 0,
+  'lazy': False,
+  'outputLines': 0,
+  'outputLineLength': 80,
+  'program': '',
+}
+
+
+class MockAdapter( object ):
+  def __init__( self, write ):
+    self._write = write
+    self._seq = 0
+    self._config = dict( DEFAULTS )
+    self._done = False
+    self._supports_invalidated = False
+    # ( variablesReference, name ) -> value set with setVariable
+    self._values = {}
+
+    # variablesReference -> function( start, count ) returning the variables
+    self._references = {}
+    # key (tuple describing the container) -> variablesReference
+    self._reference_ids = {}
+    # References whose children are all indexed; the rest are all named
+    self._indexed_references = set()
+
+
+  def OnMessage( self, message ):
+    if message.get( 'type' ) != 'request':
+      return
+
+    handler = getattr( self, '_On_' + message[ 'command' ], None )
+    if handler is None:
+      self._Respond( message,
+                     success = False,
+                     error = 'Unsupported command: ' + message[ 'command' ] )
+      return
+
+    try:
+      handler( message )
+    except Exception as e:
+      print( 'mock: Error handling', json.dumps( message ), repr( e ),
+             file = sys.stderr,
+             flush = True )
+      self._Respond( message, success = False, error = repr( e ) )
+
+
+  def Done( self ):
+    return self._done
+
+
+  def _On_initialize( self, message ):
+    arguments = message.get( 'arguments' ) or {}
+    self._supports_invalidated = bool(
+      arguments.get( 'supportsInvalidatedEvent' ) )
+    self._Respond( message, {
+      'supportsConfigurationDoneRequest': True,
+      'supportsEvaluateForHovers': True,
+      'supportsTerminateRequest': True,
+      'supportsDelayedStackTraceLoading': True,
+      'supportsSetVariable': True,
+    } )
+    self._Event( 'initialized' )
+
+
+  def _On_launch( self, message ):
+    arguments = message.get( 'arguments' ) or {}
+    for key, default in DEFAULTS.items():
+      value = arguments.get( key, default )
+      self._config[ key ] = type( default )( value )
+    self._Respond( message )
+
+
+  _On_attach = _On_launch
+
+
+  def _On_setBreakpoints( self, message ):
+    breakpoints = message[ 'arguments' ].get( 'breakpoints' ) or []
+    self._Respond( message, {
+      'breakpoints': [ { 'verified': True, 'line': bp[ 'line' ] }
+                       for bp in breakpoints ]
+    } )
+
+
+  def _On_setFunctionBreakpoints( self, message ):
+    self._Respond( message, { 'breakpoints': [] } )
+
+
+  def _On_setExceptionBreakpoints( self, message ):
+    self._Respond( message, { 'breakpoints': [] } )
+
+
+  def _On_configurationDone( self, message ):
+    self._Respond( message )
+    self._SendOutput()
+    self._Stop( 'entry' )
+
+
+  def _On_threads( self, message ):
+    self._Respond( message, {
+      'threads': [ { 'id': i, 'name': f'Thread {i}' }
+                   for i in range( 1, self._config[ 'threads' ] + 1 ) ]
+    } )
+
+
+  def _On_stackTrace( self, message ):
+    arguments = message[ 'arguments' ]
+    thread_id = arguments[ 'threadId' ]
+    total = self._config[ 'frames' ]
+    start = arguments.get( 'startFrame' ) or 0
+    end = total
+    if arguments.get( 'levels' ):
+      end = min( total, start + arguments[ 'levels' ] )
+
+    program = self._config[ 'program' ]
+    frames = []
+    for index in range( start, end ):
+      frame = {
+        'id': thread_id * total + index,
+        'name': f'function_{index}',
+        'line': index % SOURCE_LINES + 1,
+        'column': 1,
+      }
+      if program:
+        frame[ 'source' ] = {
+          'name': os.path.basename( program ),
+          'path': program,
+        }
+      frames.append( frame )
+
+    self._Respond( message, {
+      'stackFrames': frames,
+      'totalFrames': total,
+    } )
+
+
+  def _On_scopes( self, message ):
+    frame_id = message[ 'arguments' ][ 'frameId' ]
+    self._Respond( message, {
+      'scopes': [
+        {
+          'name': 'Locals',
+          'variablesReference': self._Reference( ( 'locals', frame_id ),
+                                                 self._Locals ),
+          'namedVariables': self._LocalsCount(),
+          'expensive': False,
+        },
+        {
+          'name': 'Globals',
+          'variablesReference': self._Reference( ( 'globals', ),
+                                                 self._Globals ),
+          'expensive': True,
+        },
+      ]
+    } )
+
+
+  def _On_variables( self, message ):
+    arguments = message[ 'arguments' ]
+    generator = self._references.get( arguments[ 'variablesReference' ] )
+    if generator is None:
+      self._Respond( message, success = False, error = 'Unknown reference' )
+      return
+
+    variables_filter = arguments.get( 'filter' )
+    indexed = arguments[ 'variablesReference' ] in self._indexed_references
+    if variables_filter and ( variables_filter == 'indexed' ) != indexed:
+      variables = []
+    else:
+      variables = generator( arguments.get( 'start' ) or 0,
+                             arguments.get( 'count' ) or None )
+
+    for variable in variables:
+      key = ( arguments[ 'variablesReference' ], variable[ 'name' ] )
+      if key in self._values:
+        variable[ 'value' ] = self._values[ key ]
+
+    self._Respond( message, { 'variables': variables } )
+
+
+  def _On_setVariable( self, message ):
+    arguments = message[ 'arguments' ]
+    if arguments[ 'variablesReference' ] not in self._references:
+      self._Respond( message, success = False, error = 'Unknown reference' )
+      return
+
+    self._values[ ( arguments[ 'variablesReference' ],
+                    arguments[ 'name' ] ) ] = arguments[ 'value' ]
+    self._Respond( message, { 'value': arguments[ 'value' ] } )
+    if self._supports_invalidated:
+      self._Event( 'invalidated', { 'areas': [ 'all' ] } )
+
+
+  def _On_evaluate( self, message ):
+    self._Respond( message, {
+      'result': message[ 'arguments' ][ 'expression' ],
+      'variablesReference': 0,
+    } )
+
+
+  def _On_source( self, message ):
+    self._Respond( message, {
+      'content': '\n'.join( f'line {i}'
+                            for i in range( 1, SOURCE_LINES + 1 ) )
+    } )
+
+
+  def _On_continue( self, message ):
+    self._Respond( message, { 'allThreadsContinued': True } )
+    self._Stop( 'breakpoint' )
+
+
+  def _On_next( self, message ):
+    self._Respond( message )
+    self._Stop( 'step' )
+
+
+  _On_stepIn = _On_next
+  _On_stepOut = _On_next
+
+
+  def _On_pause( self, message ):
+    self._Respond( message )
+    self._Stop( 'pause' )
+
+
+  def _On_terminate( self, message ):
+    self._Respond( message )
+    self._Event( 'terminated' )
+
+
+  def _On_disconnect( self, message ):
+    self._Respond( message )
+    self._done = True
+
+  def _Reference( self, key, generator, indexed = False ):
+    if key not in self._reference_ids:
+      reference = len( self._references ) + 1
+      self._reference_ids[ key ] = reference
+      self._references[ reference ] = generator
+      if indexed:
+        self._indexed_references.add( reference )
+    return self._reference_ids[ key ]
+
+
+  def _LocalsCount( self ):
+    count = self._config[ 'variables' ]
+    if self._config[ 'arrayLength' ]:
+      count += 1
+    if self._config[ 'depth' ]:
+      count += 1
+    if self._config[ 'lazy' ]:
+      count += 1
+    return count
+
+
+  def _Locals( self, start, count ):
+    variables = [ _Scalar( f'var_{i}', i )
+                  for i in range( self._config[ 'variables' ] ) ]
+
+    if self._config[ 'arrayLength' ]:
+      length = self._config[ 'arrayLength' ]
+      variables.append( {
+        'name': 'array',
+        'value': f'int[{length}]',
+        'type': f'int[{length}]',
+        'variablesReference': self._Reference( ( 'array', ),
+                                               self._Array,
+                                               indexed = True ),
+        'indexedVariables': length,
+      } )
+
+    if self._config[ 'depth' ]:
+      variables.append( self._Nested( 1 ) )
+
+    if self._config[ 'lazy' ]:
+      variables.append( {
+        'name': 'lazy',
+        'value': 'getter',
+        'type': 'Lazy',
+        'variablesReference': self._Reference( ( 'lazy', ),
+                                               self._LazyValue ),
+        'presentationHint': { 'lazy': True },
+      } )
+
+    return _Slice( variables, start, count )
+
+
+  def _LazyValue( self, start, count ):
+    # The value of a lazy variable is its only child, with no name
+    return _Slice( [ _Scalar( '', 42 ) ], start, count )
+
+
+  def _Array( self, start, count ):
+    length = self._config[ 'arrayLength' ]
+    end = length if count is None else min( length, start + count )
+    return [ _Scalar( f'[{i}]', i ) for i in range( start, end ) ]
+
+
+  def _Nested( self, level ):
+    variable = {
+      'name': 'nested' if level == 1 else f'level_{level}',
+      'value': '{...}',
+      'type': 'Nested',
+      'variablesReference': 0,
+    }
+    if level <= self._config[ 'depth' ]:
+      def children( start, count ):
+        return _Slice( [ _Scalar( 'value', level ), self._Nested( level + 1 ) ],
+                       start,
+                       count )
+      variable[ 'variablesReference' ] = self._Reference( ( 'nested', level ),
+                                                          children )
+    return variable
+
+
+  def _Globals( self, start, count ):
+    return _Slice( [ _Scalar( 'global', 0 ) ], start, count )
+
+  def _SendOutput( self ):
+    lines = self._config[ 'outputLines' ]
+    width = self._config[ 'outputLineLength' ]
+    for first in range( 0, lines, OUTPUT_LINES_PER_EVENT ):
+      last = min( lines, first + OUTPUT_LINES_PER_EVENT )
+      self._Event( 'output', {
+        'category': 'stdout',
+        'output': ''.join( _OutputLine( i, width ) + '\n'
+                           for i in range( first, last ) )
+      } )
+
+
+  def _Stop( self, reason ):
+    self._Event( 'stopped', {
+      'reason': reason,
+      'threadId': 1,
+      'allThreadsStopped': True,
+    } )
+
+
+  def _Respond( self, request, body = None, success = True, error = None ):
+    response = {
+      'type': 'response',
+      'request_seq': request[ 'seq' ],
+      'command': request[ 'command' ],
+      'success': success,
+    }
+    if body is not None:
+      response[ 'body' ] = body
+    if error is not None:
+      response[ 'message' ] = error
+    self._Send( response )
+
+
+  def _Event( self, event, body = None ):
+    message = { 'type': 'event', 'event': event }
+    if body is not None:
+      message[ 'body' ] = body
+    self._Send( message )
+
+
+  def _Send( self, message ):
+    self._seq += 1
+    message[ 'seq' ] = self._seq
+    self._write( framing.Encode( message ).encode( 'utf-8' ) )
+
+
+def _Scalar( name, value ):
+  return {
+    'name': name,
+    'value': str( value ),
+    'type': 'int',
+    'variablesReference': 0,
+  }
+
+
+def _Slice( variables, start, count ):
+  if count is None:
+    return variables[ start : ]
+  return variables[ start : start + count ]
+
+
+def _OutputLine( index, width ):
+  prefix = f'output line {index} '
+  return ( prefix + '.' * width )[ : width ]
+
+
+def Main():
+  stdin = sys.stdin.buffer
+  stdout = sys.stdout.buffer
+
+  def write( data ):
+    stdout.write( data )
+    stdout.flush()
+
+  adapter = MockAdapter( write )
+  decoder = framing.MessageDecoder()
+  while not adapter.Done():
+    data = stdin.read1( 65536 )
+    if not data:
+      break
+    for message in decoder.FeedMessages( data ):
+      adapter.OnMessage( message )
+
+
+if __name__ == '__main__':
+  Main()
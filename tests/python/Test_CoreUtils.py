@@ -74,6 +74,106 @@ class TestOverrideDict( unittest.TestCase ):
                               core_utils.override( *t ) )
 
 
+def ApplyChanges( old, new, changes ):
+  result = list( old )
+  for old_start, old_end, new_start, new_end in reversed( changes ):
+    result[ old_start : old_end ] = new[ new_start : new_end ]
+  return result
+
+
+class TestDiffLines( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def test_diff( self ):
+    tests = (
+      # old, new, expected changes
+      ( [], [], [] ),
+      ( [ 'a' ], [ 'a' ], [] ),
+      ( [], [ 'a', 'b' ], [ ( 0, 0, 0, 2 ) ] ),
+      ( [ 'a', 'b' ], [], [ ( 0, 2, 0, 0 ) ] ),
+      # Expand: the parent line changes and children are inserted
+      ( [ 'x', '+ a', 'y' ],
+        [ 'x', '- a', '  b', '  c', 'y' ],
+        [ ( 1, 2, 1, 4 ) ] ),
+      # Collapse
+      ( [ 'x', '- a', '  b', '  c', 'y' ],
+        [ 'x', '+ a', 'y' ],
+        [ ( 1, 4, 1, 2 ) ] ),
+      # Separate changes at either end
+      ( [ 'a', 'b', 'c', 'd', 'e' ],
+        [ 'A', 'b', 'c', 'd', 'E' ],
+        [ ( 0, 1, 0, 1 ), ( 4, 5, 4, 5 ) ] ),
+      # Insert and delete
+      ( [ 'a', 'b', 'c', 'd' ],
+        [ 'a', 'x', 'b', 'd' ],
+        [ ( 1, 1, 1, 2 ), ( 2, 3, 3, 3 ) ] ),
+    )
+    for old, new, expect in tests:
+      with self.subTest( old = old, new = new ):
+        changes = core_utils.DiffLines( old, new )
+        self.assertEqual( expect, changes )
+        self.assertEqual( new, ApplyChanges( old, new, changes ) )
+
+  def test_diff_large( self ):
+    old = [ ( f'line { i }', None ) for i in range( 100000 ) ]
+    new = old[ : 500 ] + [ ( 'new', 'Title' ) ] * 3 + old[ 500 : ]
+    self.assertEqual( [ ( 500, 500, 500, 503 ) ],
+                      core_utils.DiffLines( old, new ) )
+
+  def test_diff_over_limit( self ):
+    old = [ str( i ) for i in range( 2000 ) ]
+    new = [ str( i * 2 ) for i in range( 2000 ) ]
+    changes = core_utils.DiffLines( old, new )
+    self.assertEqual( [ ( 1, 2000, 1, 2000 ) ], changes )
+    self.assertEqual( new, ApplyChanges( old, new, changes ) )
+
+
+
+class TestMatchByKey( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def Match( self, existing, new ):
+    return core_utils.MatchByKey( existing,
+                                  new,
+                                  lambda e: e[ 'name' ],
+                                  lambda n: n[ 'name' ] )
+
+  def test_match( self ):
+    a = { 'name': 'a' }
+    b = { 'name': 'b' }
+    self.assertEqual( [], self.Match( [], [] ) )
+    self.assertEqual( [], self.Match( [ a ], [] ) )
+    self.assertEqual( [ ( None, { 'name': 'a' } ) ],
+                      self.Match( [], [ { 'name': 'a' } ] ) )
+    self.assertEqual( [ ( b, { 'name': 'b' } ),
+                        ( None, { 'name': 'c' } ),
+                        ( a, { 'name': 'a' } ) ],
+                      self.Match( [ a, b ], [ { 'name': 'b' },
+                                              { 'name': 'c' },
+                                              { 'name': 'a' } ] ) )
+
+  def test_match_duplicates( self ):
+    # e.g. a shadowed local: each is matched in order, and used only once
+    x1 = { 'name': 'x', 'value': 1 }
+    x2 = { 'name': 'x', 'value': 2 }
+    new = [ { 'name': 'x' }, { 'name': 'x' }, { 'name': 'x' } ]
+    self.assertEqual( [ ( x1, new[ 0 ] ),
+                        ( x2, new[ 1 ] ),
+                        ( None, new[ 2 ] ) ],
+                      self.Match( [ x1, x2 ], new ) )
+    self.assertEqual( [ ( x1, new[ 0 ] ) ],
+                      self.Match( [ x1, x2 ], new[ : 1 ] ) )
+
+  def test_match_large( self ):
+    existing = [ { 'name': f'v{ i }' } for i in range( 100000 ) ]
+    new = [ { 'name': f'v{ i }' } for i in reversed( range( 100000 ) ) ]
+    matches = self.Match( existing, new )
+    self.assertTrue( all( e is not None and e[ 'name' ] == n[ 'name' ]
+                          for e, n in matches ) )
+
+
 assert unittest.main( module=__name__,
                       testRunner=unittest.TextTestRunner( sys.stdout ),
                       exit=False ).result.wasSuccessful()
@@ -0,0 +1,371 @@
+import sys
+import unittest
+
+from vimspector import debug_adapter_connection, framing
+
+
+class Handlers( object ):
+  def __init__( self ):
+    self.events = []
+
+  def OnEvent_stopped( self, message ):
+    self.events.append( message[ 'event' ] )
+
+  def OnEvent_invalidated( self, message ):
+    self.events.append( message[ 'event' ] )
+
+
+class TestResponseCache( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def setUp( self ):
+    self.sent = []
+    self.connection = debug_adapter_connection.DebugAdapterConnection(
+      [ Handlers() ],
+      -1,
+      self._Send )
+    self.responses = []
+
+  def tearDown( self ):
+    self.connection.Reset()
+
+  def _Send( self, data ):
+    self.sent.append( data )
+    return True
+
+  def _Request( self, command, arguments ):
+    self.connection.DoRequest( self.responses.append, {
+      'command': command,
+      'arguments': arguments,
+    }, failure_handler = lambda *_: None )
+
+  def _Respond( self, body ):
+    request_seq = max( self.connection._outstanding_requests )
+    command = self.connection._outstanding_requests[ request_seq ].msg[
+      'command' ]
+    self.connection.OnMessage( {
+      'seq': 1000 + request_seq,
+      'type': 'response',
+      'request_seq': request_seq,
+      'command': command,
+      'success': True,
+      'body': body,
+    } )
+
+  def _Event( self, event ):
+    self.connection.OnMessage( {
+      'seq': 2000,
+      'type': 'event',
+      'event': event,
+      'body': {},
+    } )
+
+  def _CacheStats( self ):
+    return self.connection.GetQueueStats()[ 'cache' ]
+
+  def test_repeat_request_is_served_from_cache( self ):
+    self._Request( 'scopes', { 'frameId': 1 } )
+    self._Respond( { 'scopes': [ { 'name': 'Locals' } ] } )
+    self.assertEqual( len( self.sent ), 1 )
+
+    self._Request( 'scopes', { 'frameId': 1 } )
+    self.assertEqual( len( self.sent ), 1 )
+    # Delivered later, not from within DoRequest
+    self.assertEqual( len( self.responses ), 1 )
+    self.connection.DeliverCachedReplies()
+    self.assertEqual( len( self.responses ), 2 )
+    self.assertEqual( self.responses[ 0 ], self.responses[ 1 ] )
+    self.assertIsNot( self.responses[ 0 ], self.responses[ 1 ] )
+    self.assertEqual( self._CacheStats(),
+                      { 'hits': 1, 'misses': 1, 'size': 1 } )
+
+    # Different arguments aren't a hit
+    self._Request( 'scopes', { 'frameId': 2 } )
+    self.assertEqual( len( self.sent ), 2 )
+
+  def test_handlers_cannot_modify_cached_response( self ):
+    self._Request( 'variables', { 'variablesReference': 1 } )
+    self._Respond( { 'variables': [ { 'name': 'a', 'value': '1' } ] } )
+    self.responses[ 0 ][ 'body' ][ 'variables' ].clear()
+
+    self._Request( 'variables', { 'variablesReference': 1 } )
+    self.connection.DeliverCachedReplies()
+    self.assertEqual( self.responses[ 1 ][ 'body' ][ 'variables' ],
+                      [ { 'name': 'a', 'value': '1' } ] )
+
+  def test_cached_replies_survive_a_failing_handler( self ):
+    self._Request( 'scopes', { 'frameId': 1 } )
+    self._Respond( { 'scopes': [] } )
+
+    def Fail( message ):
+      raise RuntimeError( 'Handler failed' )
+
+    self.connection.DoRequest( Fail, {
+      'command': 'scopes',
+      'arguments': { 'frameId': 1 },
+    } )
+    self._Request( 'scopes', { 'frameId': 1 } )
+
+    with self.assertRaises( RuntimeError ):
+      self.connection.OnReplyTimer( None )
+    self.assertEqual( len( self.responses ), 1 )
+    # The remaining reply is delivered on the next tick
+    self.assertIsNotNone( self.connection._reply_timer )
+    self.connection.OnReplyTimer( None )
+    self.assertEqual( len( self.responses ), 2 )
+    self.assertIsNone( self.connection._reply_timer )
+
+  def test_repl_evaluate_is_not_cached( self ):
+    self._Request( 'evaluate', { 'expression': 'x', 'context': 'watch' } )
+    self._Respond( { 'result': '1' } )
+
+    self._Request( 'evaluate', { 'expression': 'x = 2', 'context': 'repl' } )
+    self._Respond( { 'result': '2' } )
+    self._Request( 'evaluate', { 'expression': 'x = 2', 'context': 'repl' } )
+    self.assertEqual( len( self.sent ), 3 )
+
+    # ... and might have changed things
+    self._Request( 'evaluate', { 'expression': 'x', 'context': 'watch' } )
+    self.assertEqual( len( self.sent ), 4 )
+
+  def test_invalidation( self ):
+    def Check( invalidate ):
+      self._Request( 'scopes', { 'frameId': 1 } )
+      self._Respond( { 'scopes': [] } )
+      sent = len( self.sent )
+      invalidate()
+      self._Request( 'scopes', { 'frameId': 1 } )
+      self.assertGreater( len( self.sent ), sent )
+      self._Respond( { 'scopes': [] } )
+      self.connection.ClearResponseCache()
+
+    Check( lambda: self.connection.BumpStopEpoch() )
+    Check( lambda: self._Event( 'stopped' ) )
+    Check( lambda: self._Event( 'invalidated' ) )
+    Check( lambda: self._Request( 'setVariable', {
+      'variablesReference': 1,
+      'name': 'a',
+      'value': '2'
+    } ) )
+    self.assertEqual( self._CacheStats()[ 'hits' ], 0 )
+
+  def test_invalidation_stops_coalescing( self ):
+    def Check( invalidate ):
+      self._Request( 'variables', { 'variablesReference': 1 } )
+      sent = len( self.sent )
+      invalidate()
+      # An identical request isn't merged with the one sent before, which may
+      # get an out of date response
+      self._Request( 'variables', { 'variablesReference': 1 } )
+      self.assertGreater( len( self.sent ), sent )
+      while self.connection._outstanding_requests:
+        self._Respond( { 'variables': [] } )
+      self.connection.ClearResponseCache()
+
+    Check( lambda: self._Event( 'invalidated' ) )
+    Check( lambda: self._Request( 'setVariable', {
+      'variablesReference': 1,
+      'name': 'a',
+      'value': '2'
+    } ) )
+    self.assertEqual( self.connection.coalesced_requests, 0 )
+
+  def test_response_to_stale_request_is_not_cached( self ):
+    self._Request( 'variables', { 'variablesReference': 1 } )
+    self._Request( 'setVariable', {
+      'variablesReference': 1,
+      'name': 'a',
+      'value': '2'
+    } )
+    # Respond to the variables request, which was sent before the value was
+    # changed
+    request_seq = min( self.connection._outstanding_requests )
+    self.connection.OnMessage( {
+      'seq': 1000,
+      'type': 'response',
+      'request_seq': request_seq,
+      'command': 'variables',
+      'success': True,
+      'body': { 'variables': [ { 'name': 'a', 'value': '1' } ] },
+    } )
+    self.assertEqual( self._CacheStats()[ 'size' ], 0 )
+
+  def test_failures_are_not_cached( self ):
+    self._Request( 'scopes', { 'frameId': 1 } )
+    request_seq = max( self.connection._outstanding_requests )
+    self.connection.OnMessage( {
+      'seq': 1000,
+      'type': 'response',
+      'request_seq': request_seq,
+      'command': 'scopes',
+      'success': False,
+      'message': 'No frame',
+    } )
+    self.assertEqual( self._CacheStats()[ 'size' ], 0 )
+
+  def test_disabled( self ):
+    self.connection.cache_responses = False
+    self._Request( 'scopes', { 'frameId': 1 } )
+    self._Respond( { 'scopes': [] } )
+    self._Request( 'scopes', { 'frameId': 1 } )
+    self.assertEqual( len( self.sent ), 2 )
+
+
+class TestOnData( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def test_invalid_message_is_skipped( self ):
+    handlers = Handlers()
+    connection = debug_adapter_connection.DebugAdapterConnection(
+      [ handlers ],
+      -1,
+      lambda data: True )
+
+    def Event( event ):
+      return framing.Encode( { 'seq': 1, 'type': 'event', 'event': event } )
+
+    connection.OnData( Event( 'stopped' ) +
+                       'Content-Length: 7\r\n\r\n{"seq":' +
+                       Event( 'invalidated' ) )
+    self.assertEqual( handlers.events, [ 'stopped', 'invalidated' ] )
+    connection.Reset()
+
+
+class TestPriority( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def setUp( self ):
+    self.sent = []
+    self.connection = debug_adapter_connection.DebugAdapterConnection(
+      [ Handlers() ],
+      -1,
+      self._Send,
+      max_in_flight = 1 )
+
+  def tearDown( self ):
+    self.connection.Reset()
+
+  def _Send( self, data ):
+    self.sent.append( data )
+    return True
+
+  def _Request( self, arguments, priority ):
+    self.connection.DoRequest( None, {
+      'command': 'scopes',
+      'arguments': arguments,
+    }, failure_handler = lambda *_: None, priority = priority )
+
+  def test_coalesced_request_is_promoted( self ):
+    self._Request( { 'frameId': 0 }, debug_adapter_connection.PRIORITY_UI )
+    self._Request( { 'frameId': 1 },
+                   debug_adapter_connection.PRIORITY_BACKGROUND )
+    self._Request( { 'frameId': 2 },
+                   debug_adapter_connection.PRIORITY_VISIBLE )
+    self.assertEqual( self.connection.GetQueueStats()[ 'queued_by_priority' ],
+                      { 'background': 1, 'visible': 1 } )
+
+    # Now the user wants frame 1
+    self._Request( { 'frameId': 1 }, debug_adapter_connection.PRIORITY_UI )
+    self.assertEqual( self.connection.GetQueueStats()[ 'queued_by_priority' ],
+                      { 'ui': 1, 'visible': 1 } )
+    self.assertEqual( [ r.msg[ 'arguments' ][ 'frameId' ]
+                        for r in self.connection._queue.Clear() ],
+                      [ 1, 2 ] )
+
+  def _Respond( self, request_seq ):
+    self.connection.OnMessage( {
+      'seq': 1000 + request_seq,
+      'type': 'response',
+      'request_seq': request_seq,
+      'command': 'scopes',
+      'success': True,
+      'body': { 'scopes': [] },
+    } )
+
+  def test_superseded_requests_release_their_slots( self ):
+    self._Request( { 'frameId': 0 }, debug_adapter_connection.PRIORITY_UI )
+    self._Request( { 'frameId': 1 }, debug_adapter_connection.PRIORITY_UI )
+    self.assertEqual( len( self.sent ), 1 )
+
+    # The queued request is dropped and the sent one no longer holds up the
+    # requests for the next stop
+    self.connection.BumpStopEpoch()
+    self._Request( { 'frameId': 2 }, debug_adapter_connection.PRIORITY_UI )
+    self.assertEqual( len( self.sent ), 2 )
+    self.assertEqual( self.connection.GetQueueStats()[ 'outstanding' ], 2 )
+
+    # The stale response arrives; the new request still holds the only slot
+    self._Respond( 1 )
+    self._Request( { 'frameId': 3 }, debug_adapter_connection.PRIORITY_UI )
+    self.assertEqual( len( self.sent ), 2 )
+    self.assertEqual( self.connection.GetQueueStats()[ 'queued' ], 1 )
+
+    self._Respond( 2 )
+    self.assertEqual( len( self.sent ), 3 )
+
+  def test_sync_request_for_stop_state_is_rejected( self ):
+    with self.assertRaises( ValueError ):
+      self.connection.DoRequestSync( {
+        'command': 'scopes',
+        'arguments': { 'frameId': 0 },
+      } )
+    self.assertEqual( self.sent, [] )
+
+
+
+class TestSyncRequest( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def setUp( self ):
+    self.success = True
+    self.connection = debug_adapter_connection.DebugAdapterConnection(
+      [ Handlers() ],
+      -1,
+      lambda data: True,
+      wait_func = self._Wait )
+
+  def tearDown( self ):
+    self.connection.Reset()
+
+  def _Wait( self, timeout ):
+    # The adapter responds while vim is waiting
+    request_seq = max( self.connection._outstanding_requests )
+    self.connection.OnMessage( {
+      'seq': 1000,
+      'type': 'response',
+      'request_seq': request_seq,
+      'command': 'completions',
+      'success': self.success,
+      'body': { 'targets': [] },
+    } )
+    return True
+
+  def _Completions( self ):
+    return self.connection.DoRequestSync( {
+      'command': 'completions',
+      'arguments': { 'text': 'x', 'column': 2 },
+    } )
+
+  def test_latency_is_recorded( self ):
+    self.assertEqual( self._Completions()[ 'body' ], { 'targets': [] } )
+    self.success = False
+    with self.assertRaises( RuntimeError ):
+      self._Completions()
+
+    sync = self.connection.GetStats()[ 'sync' ][ 'completions' ]
+    self.assertEqual( sync[ 'count' ], 2 )
+    self.assertEqual( sync[ 'failures' ], 1 )
+    self.assertIsNotNone( sync[ 'p50' ] )
+    # The adapter's latency for the same requests is recorded as usual
+    self.assertEqual(
+      self.connection.GetStats()[ 'commands' ][ 'completions' ][ 'count' ],
+      2 )
+
+
+assert unittest.main( module=__name__,
+                      testRunner=unittest.TextTestRunner( sys.stdout ),
+                      exit=False ).result.wasSuccessful()
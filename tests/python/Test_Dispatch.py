@@ -0,0 +1,64 @@
+import sys
+import unittest
+
+from vimspector import dispatch
+
+
+class First( object ):
+  def __init__( self ):
+    self.calls = []
+
+  def OnEvent_output( self, message ):
+    self.calls.append( message )
+    return message.get( 'handled' )
+
+
+class Second( First ):
+  def OnEvent_stopped( self, message ):
+    self.calls.append( message )
+
+  def OnFailure( self, reason, request, message ):
+    self.calls.append( reason )
+    return True
+
+
+class TestDispatchTable( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def test_method_names( self ):
+    self.assertEqual( set( dispatch.HandlerMethodNames( Second ) ),
+                      { 'OnEvent_output', 'OnEvent_stopped', 'OnFailure' } )
+
+  def test_dispatch_in_order( self ):
+    first, second = First(), Second()
+    table = dispatch.DispatchTable( [ first, second ] )
+
+    self.assertFalse( table.Dispatch( 'OnEvent_output', {} ) )
+    self.assertEqual( ( len( first.calls ), len( second.calls ) ), ( 1, 1 ) )
+
+    # A truthy return stops dispatch
+    self.assertTrue( table.Dispatch( 'OnEvent_output', { 'handled': True } ) )
+    self.assertEqual( ( len( first.calls ), len( second.calls ) ), ( 2, 1 ) )
+
+    self.assertFalse( table.Dispatch( 'OnEvent_unknown', {} ) )
+    self.assertTrue( table.Dispatch( 'OnFailure', 'oops', {}, {} ) )
+    self.assertEqual( second.calls[ -1 ], 'oops' )
+
+  def test_add_remove( self ):
+    first, second = First(), Second()
+    table = dispatch.DispatchTable( [ second ] )
+    table.AddHandler( first, 0 )
+    self.assertEqual( table.Handlers(), [ first, second ] )
+    table.Dispatch( 'OnEvent_output', { 'handled': True } )
+    self.assertEqual( ( len( first.calls ), len( second.calls ) ), ( 1, 0 ) )
+
+    table.RemoveHandler( first )
+    table.Dispatch( 'OnEvent_output', { 'handled': True } )
+    self.assertEqual( ( len( first.calls ), len( second.calls ) ), ( 1, 1 ) )
+    self.assertEqual( len( table ), 1 )
+
+
+assert unittest.main( module=__name__,
+                      testRunner=unittest.TextTestRunner( sys.stdout ),
+                      exit=False ).result.wasSuccessful()
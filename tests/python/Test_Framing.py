@@ -0,0 +1,105 @@
+import logging
+import sys
+import unittest
+
+from vimspector import framing
+
+
+def _Frame( msg ):
+  return bytes( framing.Encode( msg ), 'utf-8' )
+
+
+class TestMessageDecoder( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def test_single_message( self ):
+    decoder = framing.MessageDecoder()
+    msg = { 'seq': 1, 'type': 'event', 'event': 'initialized' }
+    self.assertEqual( decoder.FeedMessages( _Frame( msg ) ), [ msg ] )
+    self.assertEqual( decoder.Pending(), 0 )
+
+  def test_many_messages_in_one_chunk( self ):
+    decoder = framing.MessageDecoder()
+    msgs = [ { 'seq': i, 'type': 'event', 'event': 'output' }
+             for i in range( 100 ) ]
+    data = b''.join( _Frame( m ) for m in msgs )
+    self.assertEqual( decoder.FeedMessages( data ), msgs )
+    self.assertEqual( decoder.Pending(), 0 )
+
+  def test_byte_at_a_time( self ):
+    decoder = framing.MessageDecoder()
+    msgs = [
+      { 'seq': 1, 'type': 'event', 'body': { 'output': 'café\n' } },
+      { 'seq': 2, 'type': 'response', 'body': {} },
+    ]
+    data = b''.join( _Frame( m ) for m in msgs )
+    received = []
+    for i in range( len( data ) ):
+      received.extend( decoder.FeedMessages( data[ i : i + 1 ] ) )
+    self.assertEqual( received, msgs )
+    self.assertEqual( decoder.Pending(), 0 )
+
+  def test_multibyte_payload( self ):
+    decoder = framing.MessageDecoder()
+    payload = '{"output": "éé"}'.encode( 'utf-8' )
+    data = b'Content-Length: ' + str( len( payload ) ).encode() + b'\r\n\r\n'
+    self.assertEqual( decoder.FeedMessages( data + payload ),
+                      [ { 'output': 'éé' } ] )
+
+  def test_partial_body( self ):
+    decoder = framing.MessageDecoder()
+    data = _Frame( { 'seq': 1 } ) + _Frame( { 'seq': 2 } )
+    split = len( data ) - 3
+    self.assertEqual( decoder.FeedMessages( data[ : split ] ),
+                      [ { 'seq': 1 } ] )
+    # The headers are consumed; only the partial body is pending
+    self.assertEqual( decoder.Pending(), len( b'{"seq": 2}' ) - 3 )
+    self.assertEqual( decoder.FeedMessages( data[ split : ] ),
+                      [ { 'seq': 2 } ] )
+
+  def test_extra_headers_and_junk( self ):
+    decoder = framing.MessageDecoder()
+    # cppdbg (mono) writes junk to stdout before the header
+    data = ( b'some junk\nContent-Length: 2\r\n'
+             b'Content-Type: application/json\r\n\r\n{}' )
+    self.assertEqual( decoder.FeedMessages( data ), [ {} ] )
+
+  def test_missing_content_length( self ):
+    decoder = framing.MessageDecoder()
+    self.assertEqual( decoder.FeedMessages( b'X-Header: 1\r\n\r\n{}' ), [] )
+    self.assertEqual( decoder.Pending(), 0 )
+    self.assertEqual( decoder.FeedMessages( _Frame( { 'seq': 3 } ) ),
+                      [ { 'seq': 3 } ] )
+
+  def test_invalid_payload_is_skipped( self ):
+    decoder = framing.MessageDecoder( logging.getLogger( 'test' ) )
+    data = ( _Frame( { 'seq': 1 } ) +
+             b'Content-Length: 7\r\n\r\n{"seq":' +
+             _Frame( { 'seq': 3 } ) )
+    self.assertEqual( decoder.FeedMessages( data ),
+                      [ { 'seq': 1 }, { 'seq': 3 } ] )
+    self.assertEqual( decoder.Pending(), 0 )
+
+  def test_compaction( self ):
+    decoder = framing.MessageDecoder()
+    big = { 'output': 'x' * framing.COMPACT_THRESHOLD }
+    data = _Frame( big ) + _Frame( { 'seq': 1 } )
+    # Leave a partial message behind a large consumed prefix
+    self.assertEqual( decoder.FeedMessages( data[ : -1 ] ), [ big ] )
+    self.assertEqual( decoder.Pending(), len( b'{"seq": 1}' ) - 1 )
+    self.assertEqual( decoder.FeedMessages( data[ -1 : ] ), [ { 'seq': 1 } ] )
+
+
+class TestEncode( unittest.TestCase ):
+  def test_content_length_is_bytes( self ):
+    data = framing.Encode( { 'value': 'é' } )
+    header, payload = data.split( '\r\n\r\n', 1 )
+    self.assertEqual( header,
+                      'Content-Length: {}'.format(
+                        len( payload.encode( 'utf-8' ) ) ) )
+
+
+assert unittest.main( module=__name__,
+                      testRunner=unittest.TextTestRunner( sys.stdout ),
+                      exit=False ).result.wasSuccessful()
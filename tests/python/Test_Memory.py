@@ -0,0 +1,71 @@
+import sys
+import unittest
+
+from vimspector import memory, stats
+
+
+class TestMemory( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def test_object_counts( self ):
+    name = 'vimspector.stats.CommandStats'
+    before = memory.ObjectCounts().get( name, 0 )
+    objects = [ stats.CommandStats() for _ in range( 5 ) ]
+    self.assertEqual( memory.ObjectCounts()[ name ], before + 5 )
+    del objects
+    self.assertEqual( memory.ObjectCounts().get( name, 0 ), before )
+
+  def test_object_counts_collects_cycles( self ):
+    name = 'vimspector.stats.CommandStats'
+    before = memory.ObjectCounts().get( name, 0 )
+    a = stats.CommandStats()
+    b = stats.CommandStats()
+    a.other = b
+    b.other = a
+    del a, b
+    self.assertEqual( memory.ObjectCounts().get( name, 0 ), before )
+
+  def test_session_buffers( self ):
+    self.assertEqual( memory.SessionBuffers( [
+      'vimspector.Console[0]',
+      'vimspector.StackTrace[0]',
+      '/path/to/_vimspector_tmp/1/test.py[1]',
+      'vimspector.Output:stderr[1]',
+      '/path/to/file.py',
+      '',
+    ] ), {
+      0: [ 'vimspector.Console[0]', 'vimspector.StackTrace[0]' ],
+      1: [ '/path/to/_vimspector_tmp/1/test.py[1]',
+           'vimspector.Output:stderr[1]' ],
+    } )
+
+  def test_top_allocations( self ):
+    self.assertEqual( memory.TopAllocations(), [] )
+    memory.StartTracing()
+    try:
+      self.assertTrue( memory.IsTracing() )
+      data = [ bytearray( 1024 ) for _ in range( 100 ) ]
+      allocations = memory.TopAllocations( 5 )
+      self.assertLessEqual( len( allocations ), 5 )
+      self.assertTrue( any( site.startswith( __file__ )
+                            and size >= 100 * 1024
+                            for site, size, _ in allocations ) )
+      del data
+    finally:
+      memory.StopTracing()
+    self.assertFalse( memory.IsTracing() )
+
+  def test_report( self ):
+    lines = memory.Report( [ 'vimspector.Console[0]',
+                             'vimspector.Console[1]' ],
+                           { 1 } )
+    self.assertIn( 'Live objects:', lines )
+    self.assertIn( '  Session 0 (destroyed): 1 buffers', lines )
+    self.assertIn( '  Session 1 (live): 1 buffers', lines )
+    self.assertIn( '  Not tracing; use :VimspectorMemory start', lines )
+
+
+assert unittest.main( module=__name__,
+                      testRunner=unittest.TextTestRunner( sys.stdout ),
+                      exit=False ).result.wasSuccessful()
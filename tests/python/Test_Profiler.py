@@ -0,0 +1,67 @@
+import os
+import pstats
+import sys
+import tempfile
+import time
+import unittest
+
+from vimspector import profiler
+
+
+def BusyFunction( duration ):
+  end = time.monotonic() + duration
+  total = 0
+  while time.monotonic() < end:
+    total += 1
+  return total
+
+
+class TestProfiler( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def test_dump_without_start( self ):
+    p = profiler.Profiler()
+    with tempfile.TemporaryDirectory() as d:
+      self.assertEqual( p.Dump( os.path.join( d, 'profile' ) ), [] )
+
+  def test_profile( self ):
+    p = profiler.Profiler( sample_interval = 0.001 )
+    p.Start()
+    self.assertTrue( p.IsRunning() )
+    BusyFunction( 0.2 )
+    p.Stop()
+    self.assertFalse( p.IsRunning() )
+    self.assertGreater( p.SampleCount(), 0 )
+
+    with tempfile.TemporaryDirectory() as d:
+      base = os.path.join( d, 'profile' )
+      self.assertEqual( p.Dump( base ), [ base + '.pstats',
+                                          base + '.folded' ] )
+
+      stats = pstats.Stats( base + '.pstats' )
+      self.assertTrue( any( name == 'BusyFunction'
+                            for _, _, name in stats.stats.keys() ) )
+
+      with open( base + '.folded' ) as f:
+        lines = f.read().splitlines()
+
+    self.assertTrue( lines )
+    for line in lines:
+      stack, count = line.rsplit( ' ', 1 )
+      self.assertGreater( int( count ), 0 )
+    self.assertTrue( any( stack.endswith( 'Test_Profiler.py:BusyFunction' )
+                          for stack, _ in ( line.rsplit( ' ', 1 )
+                                            for line in lines ) ) )
+
+  def test_dump_stops( self ):
+    p = profiler.Profiler()
+    p.Start()
+    with tempfile.TemporaryDirectory() as d:
+      self.assertEqual( len( p.Dump( os.path.join( d, 'profile' ) ) ), 2 )
+    self.assertFalse( p.IsRunning() )
+
+
+assert unittest.main( module=__name__,
+                      testRunner=unittest.TextTestRunner( sys.stdout ),
+                      exit=False ).result.wasSuccessful()
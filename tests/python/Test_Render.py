@@ -0,0 +1,106 @@
+import sys
+import unittest
+
+from vimspector import render
+
+
+class FakeScheduler( render.Scheduler ):
+  def __init__( self ):
+    super().__init__()
+    self.timers = 0
+
+  def _StartTimer( self ):
+    self.timers += 1
+
+
+class View( object ):
+  def __init__( self, name, drawn ):
+    self.name = name
+    self.drawn = drawn
+
+  def Draw( self ):
+    self.drawn.append( self.name )
+
+
+class TestScheduler( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def setUp( self ):
+    self.scheduler = FakeScheduler()
+    self.drawn = []
+    self.a = View( 'a', self.drawn )
+    self.b = View( 'b', self.drawn )
+
+  def test_coalesces_until_flush( self ):
+    for _ in range( 10 ):
+      self.scheduler.Schedule( self.a.Draw )
+      self.scheduler.Schedule( self.b.Draw )
+    self.assertEqual( self.drawn, [] )
+    self.assertEqual( self.scheduler.timers, 1 )
+
+    self.scheduler.Flush()
+    self.assertEqual( self.drawn, [ 'a', 'b' ] )
+
+    self.scheduler.Flush()
+    self.assertEqual( self.drawn, [ 'a', 'b' ] )
+
+    self.scheduler.Schedule( self.a.Draw )
+    self.assertEqual( self.scheduler.timers, 2 )
+
+  def test_now_cancels_pending( self ):
+    self.scheduler.Schedule( self.a.Draw )
+    self.scheduler.Now( self.a.Draw )
+    self.assertEqual( self.drawn, [ 'a' ] )
+    self.assertFalse( self.scheduler.IsPending( self.a.Draw ) )
+    self.scheduler.Flush()
+    self.assertEqual( self.drawn, [ 'a' ] )
+
+  def test_cancel( self ):
+    self.scheduler.Schedule( self.a.Draw )
+    self.scheduler.Schedule( self.b.Draw )
+    self.scheduler.Cancel( self.a.Draw )
+    self.scheduler.Flush()
+    self.assertEqual( self.drawn, [ 'b' ] )
+
+  def test_scheduled_during_flush( self ):
+    def draw_then_schedule():
+      self.drawn.append( 'first' )
+      self.scheduler.Schedule( self.a.Draw )
+
+    self.scheduler.Schedule( draw_then_schedule )
+    self.scheduler.Flush()
+    self.assertEqual( self.drawn, [ 'first', 'a' ] )
+
+  def test_failure_does_not_stop_other_views( self ):
+    def broken():
+      raise RuntimeError( 'broken' )
+
+    self.scheduler.Schedule( broken )
+    self.scheduler.Schedule( self.a.Draw )
+    self.scheduler.Flush()
+    self.assertEqual( self.drawn, [ 'a' ] )
+
+    stats = self.scheduler.Stats()
+    self.assertEqual( stats[ broken.__qualname__ ][ 'failures' ], 1 )
+    self.assertEqual( stats[ 'View.Draw' ][ 'failures' ], 0 )
+
+  def test_stats( self ):
+    for _ in range( 3 ):
+      self.scheduler.Schedule( self.a.Draw )
+    self.scheduler.Flush()
+    self.scheduler.Now( self.b.Draw )
+
+    stats = self.scheduler.Stats()
+    self.assertEqual( list( stats ), [ 'View.Draw' ] )
+    self.assertEqual( stats[ 'View.Draw' ][ 'requested' ], 4 )
+    self.assertEqual( stats[ 'View.Draw' ][ 'count' ], 2 )
+    self.assertIsNotNone( stats[ 'View.Draw' ][ 'p50' ] )
+
+    self.scheduler.ClearStats()
+    self.assertEqual( self.scheduler.Stats(), {} )
+
+
+assert unittest.main( module=__name__,
+                      testRunner=unittest.TextTestRunner( sys.stdout ),
+                      exit=False ).result.wasSuccessful()
@@ -0,0 +1,84 @@
+import sys
+import unittest
+
+from vimspector import scheduler
+
+
+class TestDeadlineHeap( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def test_expiry_order( self ):
+    heap = scheduler.DeadlineHeap()
+    heap.Add( 1, 300 )
+    heap.Add( 2, 100 )
+    heap.Add( 3, 200 )
+    self.assertEqual( heap.NextDeadline(), 100 )
+    self.assertEqual( heap.PopExpired( 50 ), [] )
+    self.assertEqual( heap.PopExpired( 200 ), [ 2, 3 ] )
+    self.assertEqual( len( heap ), 1 )
+    self.assertEqual( heap.PopExpired( 1000 ), [ 1 ] )
+    self.assertEqual( len( heap ), 0 )
+    self.assertIsNone( heap.NextDeadline() )
+
+  def test_remove( self ):
+    heap = scheduler.DeadlineHeap()
+    heap.Add( 1, 100 )
+    heap.Add( 2, 200 )
+    heap.Remove( 1 )
+    heap.Remove( 1 )
+    heap.Remove( 99 )
+    self.assertNotIn( 1, heap )
+    self.assertEqual( heap.NextDeadline(), 200 )
+    self.assertEqual( heap.PopExpired( 1000 ), [ 2 ] )
+
+  def test_readd( self ):
+    heap = scheduler.DeadlineHeap()
+    heap.Add( 1, 100 )
+    heap.Remove( 1 )
+    heap.Add( 1, 500 )
+    self.assertEqual( heap.PopExpired( 200 ), [] )
+    self.assertEqual( heap.PopExpired( 500 ), [ 1 ] )
+
+  def test_dead_entries_are_compacted( self ):
+    heap = scheduler.DeadlineHeap()
+    heap.Add( 0, 1 )
+    for key in range( 1, 1000 ):
+      heap.Add( key, key )
+      heap.Remove( key )
+    self.assertLess( len( heap._heap ), 100 )
+    self.assertEqual( heap.PopExpired( 10000 ), [ 0 ] )
+
+
+
+class TestPriorityQueue( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def test_priority_then_fifo( self ):
+    queue = scheduler.PriorityQueue()
+    queue.Push( 'b1', 2 )
+    queue.Push( 'a1', 1 )
+    queue.Push( 'b2', 2 )
+    queue.Push( 'a2', 1 )
+    self.assertEqual( queue.Depths(), { 1: 2, 2: 2 } )
+    self.assertEqual( [ queue.Pop() for _ in range( 4 ) ],
+                      [ 'a1', 'a2', 'b1', 'b2' ] )
+    self.assertIsNone( queue.Pop() )
+    self.assertEqual( queue.max_depth, 4 )
+
+  def test_remove( self ):
+    queue = scheduler.PriorityQueue()
+    a = queue.Push( 'a', 0 )
+    queue.Push( 'b', 0 )
+    queue.Remove( a )
+    queue.Remove( a )
+    self.assertEqual( len( queue ), 1 )
+    self.assertEqual( queue.Clear(), [ 'b' ] )
+    self.assertEqual( len( queue ), 0 )
+    self.assertEqual( queue.Depths(), {} )
+
+
+assert unittest.main( module=__name__,
+                      testRunner=unittest.TextTestRunner( sys.stdout ),
+                      exit=False ).result.wasSuccessful()
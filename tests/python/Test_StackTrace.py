@@ -0,0 +1,102 @@
+import sys
+import unittest
+
+from vimspector import render, stack_trace
+
+
+class FakeConnection( object ):
+  def __init__( self ):
+    self.requests = []
+
+  def DoRequest( self,
+                 handler,
+                 msg,
+                 failure_handler = None,
+                 timeout = None,
+                 priority = None ):
+    self.requests.append( ( handler, msg ) )
+
+
+class FakeDebugSession( object ):
+  def __init__( self ):
+    self.connection = FakeConnection()
+    self.frames = []
+
+  def Connection( self ):
+    return self.connection
+
+  def SetCurrentFrame( self, frame, reason ):
+    self.frames.append( ( frame[ 'id' ], reason ) )
+    return True
+
+
+def Frame( frame_id ):
+  return { 'id': frame_id, 'name': f'f{ frame_id }', 'line': 1 }
+
+
+class TestRefreshStackTraces( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def setUp( self ):
+    self.view = object.__new__( stack_trace.StackTraceView )
+    self.view._sessions = []
+    self.debug_session = FakeDebugSession()
+    self.view.AddSession( self.debug_session )
+    self.session = self.view.FindSession( self.debug_session )
+
+    self.threads = []
+    for thread_id, frames in ( ( 1, [ 10, 11, 12 ] ),
+                               ( 2, [ 20, 21 ] ),
+                               ( 3, None ) ):
+      thread = stack_trace.Thread( self.session, { 'id': thread_id,
+                                                   'name': 'thread' } )
+      thread.Paused( {} )
+      if frames is not None:
+        thread.Expand( [ Frame( i ) for i in frames ] )
+      self.session.threads.append( thread )
+      self.threads.append( thread )
+
+    self.view._current_session = self.session
+    self.view._current_thread = 1
+    self.view._current_frame = Frame( 11 )
+
+  def tearDown( self ):
+    render.Cancel( self.view._DrawThreads )
+
+  def _RequestedThreads( self ):
+    return [ msg[ 'arguments' ][ 'threadId' ]
+             for _, msg in self.debug_session.connection.requests ]
+
+  def test_all( self ):
+    self.assertTrue( self.view.RefreshStackTraces( self.debug_session ) )
+    # Thread 3's stack was never loaded
+    self.assertEqual( self._RequestedThreads(), [ 1, 2 ] )
+
+  def test_thread( self ):
+    self.assertFalse( self.view.RefreshStackTraces( self.debug_session, 2 ) )
+    self.assertEqual( self._RequestedThreads(), [ 2 ] )
+
+  def test_frame( self ):
+    self.assertFalse( self.view.RefreshStackTraces( self.debug_session,
+                                                    1,
+                                                    21 ) )
+    self.assertEqual( self._RequestedThreads(), [ 2 ] )
+
+  def test_stays_in_current_frame( self ):
+    self.view.RefreshStackTraces( self.debug_session, 1 )
+    handler, _ = self.debug_session.connection.requests[ 0 ]
+    handler( { 'body': { 'stackFrames': [ Frame( 10 ), Frame( 11 ) ] } } )
+    self.assertEqual( self.debug_session.frames, [ ( 11, 'invalidated' ) ] )
+    self.assertEqual( self.view._current_frame[ 'id' ], 11 )
+
+  def test_current_frame_gone( self ):
+    self.view.RefreshStackTraces( self.debug_session, 1 )
+    handler, _ = self.debug_session.connection.requests[ 0 ]
+    handler( { 'body': { 'stackFrames': [ Frame( 12 ) ] } } )
+    self.assertEqual( self.debug_session.frames, [ ( 12, 'invalidated' ) ] )
+
+
+assert unittest.main( module=__name__,
+                      testRunner=unittest.TextTestRunner( sys.stdout ),
+                      exit=False ).result.wasSuccessful()
@@ -0,0 +1,116 @@
+import sys
+import unittest
+
+from vimspector import stats
+
+
+class TestPercentile( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def test_empty( self ):
+    self.assertIsNone( stats.Percentile( [], 50 ) )
+
+  def test_nearest_rank( self ):
+    samples = list( range( 1, 101 ) )
+    self.assertEqual( stats.Percentile( samples, 50 ), 50 )
+    self.assertEqual( stats.Percentile( samples, 95 ), 95 )
+    self.assertEqual( stats.Percentile( samples, 99 ), 99 )
+    self.assertEqual( stats.Percentile( samples, 100 ), 100 )
+    self.assertEqual( stats.Percentile( samples, 0 ), 1 )
+
+  def test_single( self ):
+    self.assertEqual( stats.Percentile( [ 7 ], 50 ), 7 )
+    self.assertEqual( stats.Percentile( [ 7 ], 99 ), 7 )
+
+
+class TestConnectionStats( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def test_commands( self ):
+    s = stats.ConnectionStats( 0 )
+    for latency in range( 1, 11 ):
+      s.OnResponse( 'variables', latency, True )
+    s.OnResponse( 'evaluate', 3, False )
+    s.OnTimeout( 'evaluate' )
+
+    result = s.AsDict( 1000 )
+    self.assertEqual( list( result[ 'commands' ].keys() ),
+                      [ 'evaluate', 'variables' ] )
+    self.assertEqual( result[ 'commands' ][ 'variables' ], {
+      'count': 10,
+      'failures': 0,
+      'timeouts': 0,
+      'p50': 5,
+      'p95': 10,
+      'p99': 10,
+      'max': 10,
+    } )
+    self.assertEqual( result[ 'commands' ][ 'evaluate' ][ 'count' ], 1 )
+    self.assertEqual( result[ 'commands' ][ 'evaluate' ][ 'failures' ], 1 )
+    self.assertEqual( result[ 'commands' ][ 'evaluate' ][ 'timeouts' ], 1 )
+
+  def test_sync( self ):
+    s = stats.ConnectionStats( 0 )
+    s.OnResponse( 'completions', 2, True )
+    s.OnSyncRequest( 'completions', 5, True )
+    s.OnSyncRequest( 'completions', 7, False )
+
+    result = s.AsDict( 1000 )
+    self.assertEqual( result[ 'commands' ][ 'completions' ][ 'count' ], 1 )
+    self.assertEqual( list( result[ 'sync' ].keys() ), [ 'completions' ] )
+    self.assertEqual( result[ 'sync' ][ 'completions' ], {
+      'count': 2,
+      'failures': 1,
+      'timeouts': 0,
+      'p50': 5,
+      'p95': 7,
+      'p99': 7,
+      'max': 7,
+    } )
+
+  def test_timeout_only( self ):
+    s = stats.ConnectionStats( 0 )
+    s.OnTimeout( 'threads' )
+    result = s.AsDict( 1000 )[ 'commands' ][ 'threads' ]
+    self.assertEqual( result[ 'count' ], 0 )
+    self.assertEqual( result[ 'timeouts' ], 1 )
+    self.assertIsNone( result[ 'p50' ] )
+
+  def test_samples_are_bounded( self ):
+    s = stats.ConnectionStats( 0 )
+    for _ in range( stats.LATENCY_SAMPLES ):
+      s.OnResponse( 'threads', 1000, True )
+    for _ in range( stats.LATENCY_SAMPLES ):
+      s.OnResponse( 'threads', 1, True )
+
+    result = s.AsDict( 1000 )[ 'commands' ][ 'threads' ]
+    self.assertEqual( result[ 'count' ], 2 * stats.LATENCY_SAMPLES )
+    # Old samples are forgotten, but the max isn't
+    self.assertEqual( result[ 'p99' ], 1 )
+    self.assertEqual( result[ 'max' ], 1000 )
+
+  def test_traffic( self ):
+    s = stats.ConnectionStats( 1000 )
+    s.OnSent( 100 )
+    s.OnSent( 50 )
+    s.OnBytesReceived( 300 )
+    s.OnReceived()
+    s.OnReceived()
+    s.OnReceived( 20 )
+    s.OnReceived()
+
+    result = s.AsDict( 3000 )
+    self.assertEqual( result[ 'bytes_sent' ], 150 )
+    self.assertEqual( result[ 'bytes_received' ], 320 )
+    self.assertEqual( result[ 'messages_sent' ], 2 )
+    self.assertEqual( result[ 'messages_received' ], 4 )
+    self.assertEqual( result[ 'messages_per_second' ],
+                      { 'sent': 1.0, 'received': 2.0 } )
+    self.assertEqual( result[ 'uptime_s' ], 2.0 )
+
+
+assert unittest.main( module=__name__,
+                      testRunner=unittest.TextTestRunner( sys.stdout ),
+                      exit=False ).result.wasSuccessful()
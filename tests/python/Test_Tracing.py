@@ -0,0 +1,107 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+from vimspector import tracing
+
+
+class TestTracing( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def setUp( self ):
+    tracing.Disable()
+    tracing.Clear()
+
+  def tearDown( self ):
+    tracing.Disable()
+    tracing.Clear()
+
+  def test_disabled( self ):
+    def callback():
+      pass
+
+    with tracing.Span( 'nothing' ) as span:
+      span.Annotate( x = 1 )
+    self.assertIs( tracing.Bind( callback ), callback )
+    tracing.AsyncBegin( 'request', 1 )
+    tracing.AsyncEnd( 'request', 1 )
+    tracing.Instant( 'instant' )
+    self.assertEqual( tracing.EventCount(), 0 )
+
+  def test_nested_spans( self ):
+    tracing.Enable()
+    with tracing.Span( 'outer', a = 1 ):
+      with tracing.Span( 'inner' ) as span:
+        span.Annotate( size = 10 )
+
+    events = tracing.Events()
+    self.assertEqual( [ e[ 'name' ] for e in events ], [ 'inner', 'outer' ] )
+    inner, outer = events
+    self.assertEqual( inner[ 'ph' ], 'X' )
+    self.assertEqual( inner[ 'args' ], { 'size': 10 } )
+    self.assertEqual( outer[ 'args' ], { 'a': 1 } )
+    self.assertLessEqual( outer[ 'ts' ], inner[ 'ts' ] )
+    self.assertGreaterEqual( outer[ 'ts' ] + outer[ 'dur' ],
+                             inner[ 'ts' ] + inner[ 'dur' ] )
+
+  def test_traced( self ):
+    class Thing:
+      @tracing.Traced
+      def Draw( self, x ):
+        return x * 2
+
+    self.assertEqual( Thing().Draw( 2 ), 4 )
+    self.assertEqual( tracing.EventCount(), 0 )
+
+    tracing.Enable()
+    self.assertEqual( Thing().Draw( 3 ), 6 )
+    self.assertEqual( [ e[ 'name' ] for e in tracing.Events() ],
+                      [ 'TestTracing.test_traced.<locals>.Thing.Draw' ] )
+
+  def test_bind_links_callback( self ):
+    tracing.Enable()
+    results = []
+    with tracing.Span( 'request' ):
+      callback = tracing.Bind( lambda x: results.append( x ), 'response' )
+
+    callback( 1 )
+    self.assertEqual( results, [ 1 ] )
+
+    events = tracing.Events()
+    self.assertEqual( [ ( e[ 'name' ], e[ 'ph' ] ) for e in events ], [
+      ( 'callback', 's' ),
+      ( 'request', 'X' ),
+      ( 'callback', 'f' ),
+      ( 'response', 'X' ),
+    ] )
+    self.assertEqual( events[ 0 ][ 'id' ], events[ 2 ][ 'id' ] )
+
+  def test_bind_without_parent( self ):
+    tracing.Enable()
+    tracing.Bind( lambda: None, 'orphan' )()
+    self.assertEqual( [ ( e[ 'name' ], e[ 'ph' ] ) for e in tracing.Events() ],
+                      [ ( 'orphan', 'X' ) ] )
+
+  def test_export( self ):
+    tracing.Enable()
+    tracing.AsyncBegin( 'threads', '1:1' )
+    tracing.AsyncEnd( 'threads', '1:1', success = True )
+
+    with tempfile.TemporaryDirectory() as d:
+      path = os.path.join( d, 'trace.json' )
+      tracing.Export( path )
+      with open( path ) as f:
+        trace = json.load( f )
+
+    self.assertEqual( [ e[ 'ph' ] for e in trace[ 'traceEvents' ] ],
+                      [ 'b', 'e' ] )
+    self.assertEqual( trace[ 'traceEvents' ][ 1 ][ 'args' ],
+                      { 'success': True } )
+
+
+assert unittest.main( module=__name__,
+                      testRunner=unittest.TextTestRunner( sys.stdout ),
+                      exit=False ).result.wasSuccessful()
@@ -0,0 +1,174 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+import vimspector
+from vimspector import framing, transcript
+
+sys.path.insert( 0, os.path.join( os.path.dirname( vimspector.__file__ ),
+                                  '..',
+                                  '..',
+                                  'support',
+                                  'replay' ) )
+
+import replay_adapter  # noqa: E402
+
+
+class TestRecorder( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def test_round_trip( self ):
+    with tempfile.TemporaryDirectory() as directory:
+      recorder = transcript.NewRecorder( os.path.join( directory, 'new' ), 1 )
+      self.assertTrue( recorder.path.endswith( '-1.jsonl' ) )
+
+      request = { 'seq': 1, 'type': 'request', 'command': 'threads' }
+      response = { 'seq': 1,
+                   'type': 'response',
+                   'request_seq': 1,
+                   'command': 'threads',
+                   'success': True,
+                   'body': { 'threads': [ { 'id': 1, 'name': 'ü' } ] } }
+      recorder.Record( transcript.SENT, request )
+      recorder.Record( transcript.RECEIVED, response )
+      recorder.Close()
+      # Ignored once closed
+      recorder.Record( transcript.SENT, request )
+
+      entries = transcript.Load( recorder.path )
+      self.assertEqual( [ ( d, m ) for _, d, m in entries ], [
+        ( transcript.SENT, request ),
+        ( transcript.RECEIVED, response ),
+      ] )
+      self.assertLessEqual( entries[ 0 ][ 0 ], entries[ 1 ][ 0 ] )
+
+
+def _Request( seq, command, arguments = None ):
+  return { 'seq': seq,
+           'type': 'request',
+           'command': command,
+           'arguments': arguments }
+
+
+def _Response( request_seq, command, body = None ):
+  return { 'seq': 0,
+           'type': 'response',
+           'request_seq': request_seq,
+           'command': command,
+           'success': True,
+           'body': body or {} }
+
+
+class TestReplay( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def _Start( self, entries, skip_after = 60 ):
+    self.replay = replay_adapter.Replay( entries, 0, skip_after )
+    self.sent = []
+    self.wrote = threading.Condition()
+    decoder = framing.MessageDecoder()
+
+    def write( data ):
+      with self.wrote:
+        self.sent.extend( decoder.FeedMessages( data ) )
+        self.wrote.notify_all()
+
+    self.thread = threading.Thread( target = self.replay.Run,
+                                    args = ( write, ),
+                                    daemon = True )
+    self.thread.start()
+
+  def _WaitForSent( self, count ):
+    with self.wrote:
+      self.assertTrue( self.wrote.wait_for( lambda: len( self.sent ) >= count,
+                                            timeout = 5 ) )
+
+  def _Finish( self ):
+    self.thread.join( timeout = 5 )
+    self.assertFalse( self.thread.is_alive() )
+
+  def test_responses_match_requests( self ):
+    self._Start( [
+      ( 0, 'out', _Request( 1, 'initialize' ) ),
+      ( 1, 'in', _Response( 1, 'initialize' ) ),
+      ( 2, 'in', { 'seq': 0, 'type': 'event', 'event': 'initialized' } ),
+      ( 3, 'out', _Request( 2, 'scopes', { 'frameId': 1 } ) ),
+      ( 4, 'out', _Request( 3, 'scopes', { 'frameId': 2 } ) ),
+      ( 5, 'in', _Response( 3, 'scopes', { 'scopes': [ 'two' ] } ) ),
+      ( 6, 'in', _Response( 2, 'scopes', { 'scopes': [ 'one' ] } ) ),
+      ( 7, 'out', _Request( 4, 'disconnect' ) ),
+      ( 8, 'in', _Response( 4, 'disconnect' ) ),
+    ] )
+
+    # The live requests are numbered differently, and the scopes are requested
+    # in the other order
+    self.replay.OnRequest( _Request( 10, 'initialize' ) )
+    self._WaitForSent( 2 )
+    self.replay.OnRequest( _Request( 11, 'scopes', { 'frameId': 2 } ) )
+    self.replay.OnRequest( _Request( 12, 'scopes', { 'frameId': 1 } ) )
+    self.replay.OnRequest( _Request( 13, 'disconnect' ) )
+    self._Finish()
+
+    self.assertEqual( [ ( m[ 'seq' ],
+                          m.get( 'request_seq' ),
+                          m.get( 'command', m.get( 'event' ) ),
+                          m.get( 'body', {} ).get( 'scopes' ) )
+                        for m in self.sent ], [
+      ( 1, 10, 'initialize', None ),
+      ( 2, None, 'initialized', None ),
+      ( 3, 11, 'scopes', [ 'two' ] ),
+      ( 4, 12, 'scopes', [ 'one' ] ),
+      ( 5, 13, 'disconnect', None ),
+    ] )
+
+  def test_unexpected_request( self ):
+    self._Start( [
+      ( 0, 'out', _Request( 1, 'disconnect' ) ),
+      ( 1, 'in', _Response( 1, 'disconnect' ) ),
+    ] )
+    self.replay.OnRequest( _Request( 5, 'threads' ) )
+    self._WaitForSent( 1 )
+    self.replay.OnRequest( _Request( 6, 'disconnect' ) )
+    self._Finish()
+    self.assertEqual( [ ( m[ 'request_seq' ], m[ 'command' ], m[ 'body' ] )
+                        for m in self.sent ], [
+      ( 5, 'threads', {} ),
+      ( 6, 'disconnect', {} ),
+    ] )
+
+  def test_request_not_made_does_not_stall( self ):
+    self._Start( [
+      ( 0, 'out', _Request( 1, 'variables', { 'variablesReference': 1 } ) ),
+      ( 1, 'out', _Request( 2, 'variables', { 'variablesReference': 2 } ) ),
+      ( 2, 'in', _Response( 1, 'variables', { 'variables': [ 'one' ] } ) ),
+      ( 3, 'in', _Response( 2, 'variables', { 'variables': [ 'two' ] } ) ),
+      ( 4, 'out', _Request( 3, 'disconnect' ) ),
+      ( 5, 'in', _Response( 3, 'disconnect' ) ),
+    ] )
+
+    # vimspector had the first variables in its cache, so didn't ask for them
+    # (yet). The rest are replayed without waiting for --skip-after.
+    self.replay.OnRequest( _Request( 7, 'variables',
+                                     { 'variablesReference': 2 } ) )
+    self._WaitForSent( 1 )
+    self.assertEqual( self.sent[ 0 ][ 'request_seq' ], 7 )
+
+    # If it does ask for them after all, they're sent then
+    self.replay.OnRequest( _Request( 8, 'variables',
+                                     { 'variablesReference': 1 } ) )
+    self._WaitForSent( 2 )
+    self.assertEqual( self.sent[ 1 ][ 'request_seq' ], 8 )
+    self.assertEqual( self.sent[ 1 ][ 'body' ], { 'variables': [ 'one' ] } )
+
+    self.replay.OnRequest( _Request( 9, 'disconnect' ) )
+    self._Finish()
+    self.assertEqual( [ m[ 'request_seq' ] for m in self.sent ], [ 7, 8, 9 ] )
+
+
+assert unittest.main( module=__name__,
+                      testRunner=unittest.TextTestRunner( sys.stdout ),
+                      exit=False ).result.wasSuccessful()
@@ -0,0 +1,58 @@
+import sys
+import unittest
+from unittest.mock import patch
+from vimspector import utils
+
+
+class FakeBuffer( list ):
+  def __init__( self, lines, buftype = 'nofile' ):
+    super().__init__( lines )
+    self.name = 'fake'
+    self.number = -1
+    self.options = { 'buftype': buftype, 'modified': False }
+
+
+def Lines( *texts ):
+  return [ ( text, 'Title' ) for text in texts ]
+
+
+@patch( 'vimspector.utils.HighlightTextSection' )
+@patch( 'vimspector.utils.ClearTextPropertiesForLines' )
+@patch( 'vimspector.utils.ClearBuffer' )
+class TestUpdateBufferLines( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def test_diff( self, clear_buffer, *_ ):
+    old = Lines( 'a', 'b', 'c' )
+    new = Lines( 'a', 'x', 'c', 'd' )
+    buf = FakeBuffer( [ 'a', 'b', 'c' ] )
+    utils.UpdateBufferLines( buf, old, new )
+    self.assertEqual( buf, [ 'a', 'x', 'c', 'd' ] )
+    clear_buffer.assert_not_called()
+
+  def test_changed_behind_our_back( self, clear_buffer, *_ ):
+    buf = FakeBuffer( [ 'a', 'b', 'c', 'junk' ] )
+    clear_buffer.side_effect = lambda buf, modified: buf.__setitem__(
+      slice( None ), [ '' ] )
+    utils.UpdateBufferLines( buf, Lines( 'a', 'b', 'c' ), Lines( 'a', 'b' ) )
+    self.assertEqual( buf, [ 'a', 'b' ] )
+    clear_buffer.assert_called_once()
+
+  def test_prompt_buffer( self, clear_buffer, *_ ):
+    # The user entered a watch at the prompt, and vim added a new prompt line
+    old = Lines( 'Watches: ----', 'Expression: a' )
+    new = Lines( 'Watches: ----', 'Expression: a', 'Expression: b' )
+    buf = FakeBuffer( [ 'Watches: ----',
+                        'Expression: a',
+                        'New watch: b',
+                        'New watch: ' ],
+                      buftype = 'prompt' )
+    utils.UpdateBufferLines( buf, old, new )
+    self.assertEqual( buf, [ text for text, _ in new ] )
+    clear_buffer.assert_not_called()
+
+
+assert unittest.main( module=__name__,
+                      testRunner=unittest.TextTestRunner( sys.stdout ),
+                      exit=False ).result.wasSuccessful()
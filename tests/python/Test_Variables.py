@@ -0,0 +1,149 @@
+import sys
+import unittest
+
+from vimspector import variables
+
+
+class TestVariables( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def test_compact( self ):
+    v = variables.Variable( None, None, {
+      'name': 'x',
+      'value': '1',
+      'type': 'int',
+      'evaluateName': 'this->x',
+      'variablesReference': 0,
+      'presentationHint': { 'kind': 'property' },
+    } )
+    self.assertEqual( v.variable, {
+      'name': 'x',
+      'value': '1',
+      'type': 'int',
+      'presentationHint': { 'kind': 'property' },
+    } )
+    self.assertEqual( v.VariablesReference(), 0 )
+    self.assertFalse( v.IsExpandable() )
+
+    v.Update( None, {
+      'name': 'x',
+      'value': '2',
+      'type': 'int',
+      'variablesReference': 10,
+      'indexedVariables': 3,
+    } )
+    self.assertTrue( v.changed )
+    self.assertEqual( v.VariablesReference(), 10 )
+    self.assertEqual( v.IndexedVariables(), 3 )
+
+  def test_interned( self ):
+    # Build the strings at runtime, so that they're not the same constant
+    a = variables.Variable( None, None, { 'name': ''.join( [ 'a', 'b' ] ),
+                                          'value': '1',
+                                          'type': ''.join( [ 'in', 't' ] ) } )
+    b = variables.Variable( None, None, { 'name': ''.join( [ 'a', 'b' ] ),
+                                          'value': '2',
+                                          'type': ''.join( [ 'in', 't' ] ) } )
+    self.assertIs( a.variable[ 'name' ], b.variable[ 'name' ] )
+    self.assertIs( a.variable[ 'type' ], b.variable[ 'type' ] )
+
+  def test_slots( self ):
+    scope = variables.Scope( None, { 'name': 'Locals',
+                                     'variablesReference': 1 } )
+    watch = variables.Watch.New( None, None, 'x', 'watch' )
+    for item in ( scope,
+                  variables.Variable( None, scope, { 'name': 'x',
+                                                     'value': '1' } ),
+                  variables.IndexRange( None, scope, 0, 1000 ),
+                  variables.WatchResult( None, watch, { 'result': '1' } ),
+                  variables.WatchFailure( None, watch, 'failed' ),
+                  watch ):
+      with self.subTest( item = type( item ).__name__ ):
+        self.assertFalse( hasattr( item, '__dict__' ) )
+
+
+class TestLineModel( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def _Draw( self, model, count ):
+    lines = []
+    for i in range( count ):
+      if model.IsFull():
+        break
+      lines.append( model.Append( f'line { i }', item = i ) )
+    return lines
+
+  def test_everything( self ):
+    model = variables.LineModel()
+    self.assertEqual( self._Draw( model, 3 ), [ 1, 2, 3 ] )
+    self.assertEqual( [ text for text, _ in model.lines ],
+                      [ 'line 0', 'line 1', 'line 2' ] )
+    self.assertEqual( model.items, { 1: 0, 2: 1, 3: 2 } )
+    self.assertFalse( model.truncated )
+
+  def test_window( self ):
+    model = variables.LineModel( 3, 2 )
+    # Line 1 is the TRUNCATED_TEXT line, and the lines before it are skipped
+    self.assertEqual( self._Draw( model, 100 ), [ -1, 0, 1, 2, 3 ] )
+    self.assertEqual( [ text for text, _ in model.lines ],
+                      [ 'line 3', 'line 4' ] )
+    self.assertEqual( model.items, { 2: 3, 3: 4 } )
+    self.assertEqual( model.count, 5 )
+    self.assertTrue( model.truncated )
+
+  def test_skip( self ):
+    model = variables.LineModel( 2, 10 )
+    self.assertTrue( model.IsSkipping() )
+    model.Skip( 2 )
+    self.assertFalse( model.IsSkipping() )
+    self.assertEqual( model.Append( 'a\nb', item = 'x' ), 2 )
+    self.assertEqual( [ text for text, _ in model.lines ], [ 'a', 'b' ] )
+    self.assertEqual( model.items, { 2: 'x' } )
+    self.assertFalse( model.truncated )
+
+  def test_window_past_the_end( self ):
+    model = variables.LineModel( 10, 5 )
+    self._Draw( model, 4 )
+    self.assertEqual( model.lines, [] )
+    self.assertEqual( model.items, {} )
+    self.assertEqual( model.count, 4 )
+    self.assertFalse( model.truncated )
+
+
+class TestLazy( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+
+  def test_lazy_variable( self ):
+    v = variables.Variable( None, None, {
+      'name': 'prop',
+      'value': 'getter',
+      'variablesReference': 5,
+      'presentationHint': { 'lazy': True },
+    } )
+    self.assertTrue( v.IsLazy() )
+    v.expanded = variables.Expandable.EXPANDED_BY_USER
+    v.variables = []
+    self.assertFalse( v.ShouldDrawDrillDown() )
+
+    v.Resolve( { 'name': 'value', 'value': '42', 'type': 'int' } )
+    self.assertFalse( v.IsLazy() )
+    self.assertEqual( v.variable, { 'name': 'prop',
+                                    'value': '42',
+                                    'type': 'int' } )
+    self.assertFalse( v.IsExpandable() )
+
+  def test_not_lazy_without_children( self ):
+    v = variables.Variable( None, None, {
+      'name': 'prop',
+      'value': '1',
+      'presentationHint': { 'lazy': True },
+    } )
+    self.assertFalse( v.IsLazy() )
+
+
+assert unittest.main( module=__name__,
+                      testRunner=unittest.TextTestRunner( sys.stdout ),
+                      exit=False ).result.wasSuccessful()
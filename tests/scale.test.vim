@@ -0,0 +1,272 @@
+" These tests use the mock debug adapter in support/test/mock to generate very
+" large threads, stacks, variables and output, and check that vimspector
+" displays them within a time budget. The budgets are deliberately loose; they
+" are there to catch pathological regressions, not to benchmark.
+
+let s:fn = 'program.mock'
+
+" Budgets in milliseconds
+let s:budget = #{
+      \   many_threads: 10000,
+      \   deep_stack: 5000,
+      \   many_variables: 20000,
+      \   big_array: 60000,
+      \   output: 30000,
+      \ }
+
+function! SetUp()
+  call vimspector#test#setup#SetUpWithMappings( v:null )
+endfunction
+
+function! TearDown()
+  call vimspector#test#setup#TearDown()
+endfunction
+
+function! s:Launch( configuration ) abort
+  lcd ../support/test/mock
+  exe 'edit ' . s:fn
+  let start = reltime()
+  call vimspector#LaunchWithSettings( #{ configuration: a:configuration } )
+  call vimspector#test#signs#AssertCursorIsAtLineInBuffer( s:fn, 1, 1 )
+  return start
+endfunction
+
+function! s:End() abort
+  call vimspector#test#setup#Reset()
+  lcd -
+  %bwipeout!
+endfunction
+
+function! s:AssertWithinBudget( start, budget, what ) abort
+  let elapsed = float2nr( reltimefloat( reltime( a:start ) ) * 1000 )
+  call TestLog( a:what . ' took ' . elapsed . 'ms' )
+  call assert_true( elapsed <= a:budget,
+        \ a:what . ' took ' . elapsed . 'ms; budget is ' . a:budget . 'ms' )
+endfunction
+
+function! s:LineCount( winid ) abort
+  return line( '$', a:winid )
+endfunction
+
+function! Test_Scale_StackTrace_ManyThreads()
+  let start = s:Launch( 'many threads' )
+
+  " The stopped thread is expanded (10 frames), the rest are collapsed
+  call WaitForAssert( {->
+        \   assert_equal(
+        \     10000 + 10,
+        \     s:LineCount( g:vimspector_session_windows.stack_trace ) )
+        \ }, s:budget.many_threads )
+  call WaitForAssert( {->
+        \   AssertMatchList(
+        \     [ '+ Thread 10000: Thread 10000 (paused)' ],
+        \     GetBufLine( winbufnr( g:vimspector_session_windows.stack_trace ),
+        \                 '$',
+        \                 '$' )
+        \   )
+        \ } )
+  call s:AssertWithinBudget( start, s:budget.many_threads, 'StackTraceView' )
+
+  call s:End()
+endfunction
+
+function! Test_Scale_StackTrace_DeepStack()
+  let start = s:Launch( 'deep stack' )
+
+  call WaitForAssert( {->
+        \   AssertMatchList(
+        \     [
+        \       '- Thread 1: Thread 1 (paused)',
+        \       '  500: function_0@program.mock:1',
+        \     ],
+        \     GetBufLine( winbufnr( g:vimspector_session_windows.stack_trace ),
+        \                 1,
+        \                 2 )
+        \   )
+        \ }, s:budget.deep_stack )
+  call WaitForAssert( {->
+        \   AssertMatchList(
+        \     [ '  999: function_499@program.mock:50' ],
+        \     GetBufLine( winbufnr( g:vimspector_session_windows.stack_trace ),
+        \                 '$',
+        \                 '$' )
+        \   )
+        \ }, s:budget.deep_stack )
+  call s:AssertWithinBudget( start, s:budget.deep_stack, 'StackTraceView' )
+
+  call s:End()
+endfunction
+
+function! Test_Scale_Variables_ManyVariables()
+  let start = s:Launch( 'many variables' )
+
+  " Locals is expanded, Globals (expensive) is not
+  call WaitForAssert( {->
+        \   assert_equal(
+        \     1 + 100000 + 1,
+        \     s:LineCount( g:vimspector_session_windows.variables ) )
+        \ }, s:budget.many_variables )
+  call AssertMatchList(
+        \ [ '- Scope: Locals', ' [ *]- var_0 (int): 0' ],
+        \ GetBufLine( winbufnr( g:vimspector_session_windows.variables ),
+        \             1,
+        \             2 ) )
+  call AssertMatchList(
+        \ [ ' [ *]- var_99999 (int): 99999', '+ Scope: Globals' ],
+        \ GetBufLine( winbufnr( g:vimspector_session_windows.variables ),
+        \             100001,
+        \             100002 ) )
+  call s:AssertWithinBudget( start, s:budget.many_variables, 'VariablesView' )
+
+  call s:End()
+endfunction
+
+function! Test_Scale_Variables_Virtualised()
+  let g:vimspector_variables_render_ahead = 100
+  let start = s:Launch( 'many variables' )
+
+  " Only the lines in and around the window are drawn
+  let win = g:vimspector_session_windows.variables
+  let most = winheight( win ) + 2 * 100 + 2
+  call WaitForAssert( {->
+        \   AssertMatchList(
+        \     [ '...' ],
+        \     GetBufLine( winbufnr( win ), '$', '$' ) )
+        \ }, s:budget.many_variables )
+  call assert_inrange( 100, most, s:LineCount( win ) )
+  call s:AssertWithinBudget( start,
+                           \ s:budget.many_variables,
+                           \ 'Virtualised VariablesView' )
+
+  " Scrolling down moves the lines drawn, rather than drawing more
+  for i in range( 5 )
+    call win_execute( win, 'normal! G' )
+    call win_execute( win, 'doautocmd WinScrolled ' . win )
+    call assert_inrange( 1, most, s:LineCount( win ) )
+  endfor
+  call AssertMatchList(
+        \ [ '...' ],
+        \ GetBufLine( winbufnr( win ), 1, 1 ) )
+  call AssertMatchList(
+        \ [ '...' ],
+        \ GetBufLine( winbufnr( win ), '$', '$' ) )
+  call assert_match( ' var_\d\{3,} ',
+                  \ GetBufLine( winbufnr( win ), 2, 2 )[ 0 ] )
+
+  " A new stop doesn't draw the whole tree either
+  call vimspector#StepOver()
+  call vimspector#test#signs#AssertCursorIsAtLineInBuffer( s:fn, 1, 1 )
+  call WaitForAssert( {->
+        \   AssertMatchList(
+        \     [ '...' ],
+        \     GetBufLine( winbufnr( win ), '$', '$' ) )
+        \ }, s:budget.many_variables )
+  call assert_inrange( 1, most, s:LineCount( win ) )
+
+  unlet g:vimspector_variables_render_ahead
+  call s:End()
+endfunction
+
+function! Test_Scale_Variables_BigArray()
+  call s:Launch( 'big array' )
+
+  " 10 scalars, then the array
+  call WaitForAssert( {->
+        \   AssertMatchList(
+        \     [ ' [ *]+ array (int\[1000000\]): int\[1000000\]' ],
+        \     GetBufLine( winbufnr( g:vimspector_session_windows.variables ),
+        \                 12,
+        \                 12 )
+        \   )
+        \ } )
+
+  call win_gotoid( g:vimspector_session_windows.variables )
+  call setpos( '.', [ 0, 12, 1 ] )
+  let start = reltime()
+  call vimspector#ExpandVariable()
+
+  " The elements are split into ranges of g:vimspector_variables_page_size
+  call WaitForAssert( {->
+        \   assert_equal(
+        \     1 + 10 + 1 + 1000 + 1,
+        \     s:LineCount( g:vimspector_session_windows.variables ) )
+        \ }, s:budget.big_array )
+  let last = s:LineCount( g:vimspector_session_windows.variables )
+  call AssertMatchList(
+        \ [ '    + \[999000\.\.999999\]', '+ Scope: Globals' ],
+        \ GetBufLine( winbufnr( g:vimspector_session_windows.variables ),
+        \             last - 1,
+        \             last ) )
+
+  " Expanding a range requests just its elements
+  call setpos( '.', [ 0, last - 1, 1 ] )
+  call vimspector#ExpandVariable()
+  call WaitForAssert( {->
+        \   assert_equal(
+        \     1 + 10 + 1 + 1000 + 1000 + 1,
+        \     s:LineCount( g:vimspector_session_windows.variables ) )
+        \ }, s:budget.big_array )
+  let last = s:LineCount( g:vimspector_session_windows.variables )
+  call AssertMatchList(
+        \ [ '     [ *]- \[999999\] (int): 999999', '+ Scope: Globals' ],
+        \ GetBufLine( winbufnr( g:vimspector_session_windows.variables ),
+        \             last - 1,
+        \             last ) )
+  call s:AssertWithinBudget( start, s:budget.big_array, 'VariablesView' )
+
+  call s:End()
+endfunction
+
+function! Test_Scale_Output()
+  " 500,000 lines of 100 characters, sent before the program stops
+  let start = s:Launch( 'lots of output' )
+
+  call WaitForAssert( {->
+        \   AssertMatchList(
+        \     [ 'output line 499999 \.\+' ],
+        \     GetBufLine( bufnr( 'vimspector.Console' ), '$', '$' )
+        \   )
+        \ }, s:budget.output )
+  call s:AssertWithinBudget( start, s:budget.output, 'OutputView' )
+
+  call s:End()
+endfunction
+
+function! s:QueueStats() abort
+  return vimspector#GetStats().queue
+endfunction
+
+function! Test_Scale_StatsWhileQueued()
+  call s:Launch( 'small' )
+  call WaitForAssert( {->
+        \   assert_equal( [ 0, 0 ],
+        \                 [ s:QueueStats().outstanding, s:QueueStats().queued ] )
+        \ } )
+
+  " Send more requests than are allowed in flight, so that some are queued,
+  " and get the stats before vim can process any responses
+  py3 <<EOF
+from vimspector import debug_adapter_connection
+connection = _vimspector_session.Connection()
+connection.max_in_flight = 1
+for i in range( 3 ):
+  for priority in debug_adapter_connection.PRIORITY_NAMES:
+    connection.DoRequest( None, {
+      'command': 'evaluate',
+      'arguments': { 'expression': f'{ priority }_{ i }' }
+    }, priority = priority )
+EOF
+  let stats = s:QueueStats()
+
+  " The first is sent, the rest are queued
+  call assert_equal( 8, stats.queued )
+  call assert_equal( #{ ui: 2, visible: 3, background: 3 },
+                   \ stats.queued_by_priority )
+
+  call WaitForAssert( {->
+        \   assert_equal( 0, s:QueueStats().queued )
+        \ } )
+  call assert_equal( {}, s:QueueStats().queued_by_priority )
+
+  call s:End()
+endfunction
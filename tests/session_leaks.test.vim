@@ -0,0 +1,80 @@
+" These tests run the same debug session repeatedly, using the mock debug
+" adapter in support/test/mock, and check that nothing is left behind when each
+" one is reset: neither python objects nor vim buffers.
+
+let s:fn = 'program.mock'
+let s:cycles = 5
+" These classes may have more instances after a later session without leaking.
+" The render scheduler's stats live for the whole vim session and have one
+" ViewStats per kind of draw, created the first time that draw is requested,
+" which may be after the first session, e.g. a redraw for a response which
+" arrives just before the reset. There's at most one per view method. Every
+" other class must have exactly as many instances as after the first session.
+let s:fluctuating = [ 'vimspector.render.ViewStats' ]
+
+function! SetUp()
+  call vimspector#test#setup#SetUpWithMappings( v:null )
+endfunction
+
+function! TearDown()
+  call vimspector#test#setup#TearDown()
+endfunction
+
+function! s:ObjectCounts() abort
+  " A pending redraw holds on to its view until it's drawn, so draw them now.
+  " ObjectCounts does a full gc.collect() before counting.
+  call vimspector#internal#render#Flush( 0 )
+  return filter(
+        \ py3eval( '__import__( "vimspector", fromlist = [ "memory" ] )'
+        \          . '.memory.ObjectCounts()' ),
+        \ { cls, _ -> index( s:fluctuating, cls ) < 0 } )
+endfunction
+
+function! s:BufferNames() abort
+  return sort( map( getbufinfo(), { _, b -> b.name } ) )
+endfunction
+
+function! s:RunSession() abort
+  call vimspector#LaunchWithSettings( #{ configuration: 'small' } )
+  call vimspector#test#signs#AssertCursorIsAtLineInBuffer( s:fn, 1, 1 )
+  call WaitForAssert( {->
+        \   AssertMatchList(
+        \     [ '- Scope: Locals' ],
+        \     GetBufLine( winbufnr( g:vimspector_session_windows.variables ),
+        \                 1,
+        \                 1 )
+        \   )
+        \ } )
+  call WaitForAssert( {->
+        \   AssertMatchList(
+        \     [ 'output line 99 \.\+' ],
+        \     GetBufLine( bufnr( 'vimspector.Console' ), '$', '$' )
+        \   )
+        \ } )
+
+  call vimspector#StepOver()
+  call vimspector#test#signs#AssertCursorIsAtLineInBuffer( s:fn, 1, 1 )
+
+  call vimspector#test#setup#Reset()
+endfunction
+
+function! Test_Session_Leaks_RepeatedSessions()
+  lcd ../support/test/mock
+  exe 'edit ' . s:fn
+
+  " The first session loads modules, creates highlight groups, etc. so measure
+  " from the end of it
+  call s:RunSession()
+  let objects = s:ObjectCounts()
+  let buffers = s:BufferNames()
+
+  for i in range( s:cycles )
+    call s:RunSession()
+  endfor
+
+  call assert_equal( objects, s:ObjectCounts() )
+  call assert_equal( buffers, s:BufferNames() )
+
+  lcd -
+  %bwipeout!
+endfunction
@@ -595,3 +595,40 @@ function! Test_JumpToProgramCounter()
   delfunc TestJumpToPCAux
   %bwipe!
 endfunction
+
+function! s:StopEpoch()
+  return vimspector#GetStats().queue.stop_epoch
+endfunction
+
+function! s:Continued( thread_id, all_threads_continued )
+  py3 _vimspector_session.OnEvent_continued( { 'body': {
+        \   'threadId': int( vim.eval( 'a:thread_id' ) ),
+        \   'allThreadsContinued':
+        \     bool( int( vim.eval( 'a:all_threads_continued' ) ) ),
+        \ } } )
+endfunction
+
+function! Test_ContinuedEvent_OtherThread()
+  " The mock adapter stops thread 1 of 2
+  lcd ../support/test/mock
+  edit program.mock
+  call vimspector#LaunchWithSettings( #{ configuration: 'small' } )
+  call vimspector#test#signs#AssertCursorIsAtLineInBuffer( 'program.mock',
+                                                         \ 1,
+                                                         \ 1 )
+  let epoch = s:StopEpoch()
+
+  " Another thread continuing doesn't make the current thread's state stale
+  call s:Continued( 2, 0 )
+  call assert_equal( epoch, s:StopEpoch() )
+
+  " The current thread, or all of them, continuing does
+  call s:Continued( 1, 0 )
+  call assert_equal( epoch + 1, s:StopEpoch() )
+  call s:Continued( 2, 1 )
+  call assert_equal( epoch + 2, s:StopEpoch() )
+
+  call vimspector#test#setup#Reset()
+  lcd -
+  %bwipe!
+endfunction
@@ -32,3 +32,68 @@ function! Test_CoreUtils()
   call SkipNeovim()
   call s:RunPyFile( 'Test_CoreUtils.py' )
 endfunction
+
+function! Test_Framing()
+  call SkipNeovim()
+  call s:RunPyFile( 'Test_Framing.py' )
+endfunction
+
+function! Test_Scheduler()
+  call SkipNeovim()
+  call s:RunPyFile( 'Test_Scheduler.py' )
+endfunction
+
+function! Test_Dispatch()
+  call SkipNeovim()
+  call s:RunPyFile( 'Test_Dispatch.py' )
+endfunction
+
+function! Test_Stats()
+  call SkipNeovim()
+  call s:RunPyFile( 'Test_Stats.py' )
+endfunction
+
+function! Test_Tracing()
+  call SkipNeovim()
+  call s:RunPyFile( 'Test_Tracing.py' )
+endfunction
+
+function! Test_Profiler()
+  call SkipNeovim()
+  call s:RunPyFile( 'Test_Profiler.py' )
+endfunction
+
+function! Test_Memory()
+  call SkipNeovim()
+  call s:RunPyFile( 'Test_Memory.py' )
+endfunction
+
+function! Test_Variables()
+  call SkipNeovim()
+  call s:RunPyFile( 'Test_Variables.py' )
+endfunction
+
+function! Test_Render()
+  call SkipNeovim()
+  call s:RunPyFile( 'Test_Render.py' )
+endfunction
+
+function! Test_DebugAdapterConnection()
+  call SkipNeovim()
+  call s:RunPyFile( 'Test_DebugAdapterConnection.py' )
+endfunction
+
+function! Test_StackTrace()
+  call SkipNeovim()
+  call s:RunPyFile( 'Test_StackTrace.py' )
+endfunction
+
+function! Test_UpdateBufferLines()
+  call SkipNeovim()
+  call s:RunPyFile( 'Test_UpdateBufferLines.py' )
+endfunction
+
+function! Test_Transcript()
+  call SkipNeovim()
+  call s:RunPyFile( 'Test_Transcript.py' )
+endfunction
@@ -1305,3 +1305,196 @@ function! Test_WatchAfterExit()
   call vimspector#test#setup#Reset()
   %bwipe!
 endfunction
+
+" The tests below use the mock debug adapter in support/test/mock
+
+function! s:LaunchMock( configuration ) abort
+  lcd ../support/test/mock
+  edit program.mock
+  call vimspector#LaunchWithSettings( #{ configuration: a:configuration } )
+  call vimspector#test#signs#AssertCursorIsAtLineInBuffer( 'program.mock',
+                                                         \ 1,
+                                                         \ 1 )
+endfunction
+
+function! s:EndMock() abort
+  call vimspector#test#setup#Reset()
+  lcd -
+  %bwipe!
+endfunction
+
+function! s:RequestCount( command ) abort
+  " The number of responses received to requests for command
+  return get( get( vimspector#GetStats().commands, a:command, {} ),
+            \ 'count',
+            \ 0 )
+endfunction
+
+function! s:CacheHits() abort
+  return vimspector#GetStats().queue.cache.hits
+endfunction
+
+function! s:VariablesLines( first, last ) abort
+  let buf = winbufnr( g:vimspector_session_windows.variables )
+  let last = a:last
+  if last < 0
+    let last = len( getbufline( buf, 1, '$' ) ) + last + 1
+  endif
+  return getbufline( buf, a:first < 0 ? last + a:first + 1 : a:first, last )
+endfunction
+
+function! s:AssertVariables( expected, first = 1, last = -1 ) abort
+  call WaitForAssert( {->
+        \   AssertMatchList( a:expected,
+        \                    s:VariablesLines( a:first, a:last ) )
+        \ } )
+endfunction
+
+function! Test_Invalidated_KeepsFocus()
+  " The mock adapter sends an invalidated event for 'all' after setVariable
+  call s:LaunchMock( 'small' )
+  call s:AssertVariables( [ '- Scope: Locals', ' [ *]- var_0 (int): 0' ],
+                        \ 1,
+                        \ 2 )
+
+  call win_gotoid( g:vimspector_session_windows.variables )
+  call setpos( '.', [ 0, 2, 1 ] )
+  let stack_traces = s:RequestCount( 'stackTrace' )
+
+  call vimspector#SetVariableValue( '1234' )
+
+  " The stack trace and variables are requested again...
+  call WaitForAssert( {->
+        \   assert_true( s:RequestCount( 'stackTrace' ) > stack_traces )
+        \ } )
+  call s:AssertVariables( [ '- Scope: Locals', ' [ *]- var_0 (int): 1234' ],
+                        \ 1,
+                        \ 2 )
+
+  " ...but the user stays where they were
+  call assert_equal( g:vimspector_session_windows.variables, win_getid() )
+  call assert_equal( 2, line( '.' ) )
+  call vimspector#test#signs#AssertPCIsAtLineInBuffer( 'program.mock', 1 )
+
+  call s:EndMock()
+endfunction
+
+function! Test_Invalidated_OtherThread()
+  " The mock adapter stops thread 1 of 2
+  call s:LaunchMock( 'small' )
+  call s:AssertVariables( [ '- Scope: Locals' ], 1, 1 )
+  let scopes = s:RequestCount( 'scopes' )
+
+  " The variables of another thread aren't displayed, so aren't reloaded...
+  py3 _vimspector_session.Invalidate( [ 'variables' ], 2 )
+  sleep 100m
+  call assert_equal( scopes, s:RequestCount( 'scopes' ) )
+
+  " ...but those of the current thread are
+  py3 _vimspector_session.Invalidate( [ 'variables' ], 1 )
+  call WaitForAssert( {->
+        \   assert_equal( scopes + 1, s:RequestCount( 'scopes' ) )
+        \ } )
+
+  call s:EndMock()
+endfunction
+
+function! Test_LazyVariable()
+  call s:LaunchMock( 'lazy' )
+  call s:AssertVariables( [
+        \   '- Scope: Locals',
+        \   ' [ *]- var_0 (int): 0',
+        \   ' [ *]- var_1 (int): 1',
+        \   ' [ *]+ lazy (Lazy): (\.\.\.)',
+        \   '+ Scope: Globals',
+        \ ] )
+  " Only the Locals have been fetched; not the lazy variable's value
+  call assert_equal( 1, s:RequestCount( 'variables' ) )
+
+  call win_gotoid( g:vimspector_session_windows.variables )
+  call setpos( '.', [ 0, 4, 1 ] )
+  call vimspector#ExpandVariable()
+
+  " Expanding it shows its value in place
+  call s:AssertVariables( [
+        \   '- Scope: Locals',
+        \   ' [ *]- var_0 (int): 0',
+        \   ' [ *]- var_1 (int): 1',
+        \   ' [ *]- lazy (int): 42',
+        \   '+ Scope: Globals',
+        \ ] )
+  call assert_equal( 2, s:RequestCount( 'variables' ) )
+
+  call s:EndMock()
+endfunction
+
+function! Test_ExpensiveScope_FetchedWhenVisible()
+  " 200 locals, then the expensive Globals scope
+  call s:LaunchMock( 'long locals' )
+  call s:AssertVariables( [ ' [ *]- var_199 (int): 199', '+ Scope: Globals' ],
+                        \ -2 )
+  " Expensive scopes aren't expanded by default
+  call assert_equal( 1, s:RequestCount( 'variables' ) )
+
+  call win_gotoid( g:vimspector_session_windows.variables )
+  normal! G
+  call vimspector#ExpandVariable()
+  call s:AssertVariables( [ '- Scope: Globals', ' [ *]- global (int): 0' ],
+                        \ -2 )
+  call assert_equal( 2, s:RequestCount( 'variables' ) )
+
+  " Stop again, with the Globals scrolled out of view
+  normal! gg
+  call vimspector#StepOver()
+  call WaitForAssert( {-> assert_equal( 3, s:RequestCount( 'variables' ) ) } )
+  " Give it the chance to (wrongly) fetch the Globals
+  sleep 100m
+  call assert_equal( 3, s:RequestCount( 'variables' ) )
+  call s:AssertVariables( [ '- Scope: Globals' ], -1 )
+
+  " Scrolling it into view fetches it
+  call win_gotoid( g:vimspector_session_windows.variables )
+  normal! G
+  execute 'doautocmd <nomodeline> WinScrolled' win_getid()
+  call s:AssertVariables( [ '- Scope: Globals', ' [ *]- global (int): 0' ],
+                        \ -2 )
+  call assert_equal( 4, s:RequestCount( 'variables' ) )
+
+  call s:EndMock()
+endfunction
+
+function! Test_PrefetchScopes()
+  let g:vimspector_variables_prefetch_frames = 2
+  call s:LaunchMock( 'small' )
+
+  " The current frame's scopes, and those of its 2 callers, and the Locals of
+  " each (the Globals are expensive)
+  call WaitForAssert( {-> assert_equal( 3, s:RequestCount( 'scopes' ) ) } )
+  call WaitForAssert( {-> assert_equal( 3, s:RequestCount( 'variables' ) ) } )
+
+  " Moving to the caller is answered from the cache
+  let hits = s:CacheHits()
+  call vimspector#UpFrame()
+  call WaitForAssert( {-> assert_equal( hits + 2, s:CacheHits() ) } )
+  call assert_equal( 3, s:RequestCount( 'scopes' ) )
+  call assert_equal( 3, s:RequestCount( 'variables' ) )
+
+  call s:EndMock()
+  unlet g:vimspector_variables_prefetch_frames
+endfunction
+
+function! Test_PrefetchScopes_Budget()
+  let g:vimspector_variables_prefetch_frames = 5
+  let g:vimspector_variables_prefetch_budget = 2
+  call s:LaunchMock( 'small' )
+
+  " The budget is used up by the scopes of the first 2 callers
+  call WaitForAssert( {-> assert_equal( 3, s:RequestCount( 'scopes' ) ) } )
+  sleep 100m
+  call assert_equal( 3, s:RequestCount( 'scopes' ) )
+  call assert_equal( 1, s:RequestCount( 'variables' ) )
+
+  call s:EndMock()
+  unlet g:vimspector_variables_prefetch_frames
+  unlet g:vimspector_variables_prefetch_budget
+endfunction